@@ -1,27 +1,57 @@
 # Zugriff auf Datenbanken durch deren Import
+# Oben werden nur leichte Module importiert. pandas, numpy, pyarrow, requests und matplotlib (zusammen über eine
+# Sekunde beim Start eines Workers) werden erst in den Tabs importiert, die sie brauchen; der Willkommen-Tab
+# kommt ohne sie aus. Messung: python bench_cocktails.py --startup
+import os
+import uuid
 import streamlit as st
-import pandas as pd
-import requests
-from io import StringIO
-import matplotlib.pyplot as plt
-import re
-
-
-# Definieren von alcohol_bases global als Liste. Unsere API wurde manuell analysiert, um festzustellen, welche Alkoholbasen erwähnt wurden.
-alcohol_bases = ['Vodka', 'Rum', 'Gin', 'Tequila', 'Whiskey', 'Brandy', 'Vermouth', 'Liqueurs', 
-                 'Absinthe', 'Aquavit', 'Sake', 'Sherry', 'Port', 'Cachaca', 'Pisco', 'Mezcal']
+# Zeitmessung pro Rerun (Download, Parsing, Filter, Widgets, Diagramme), siehe cocktail_metrics.py.
+from cocktail_metrics import counters, span, rerun, rerun_summary
+# Favoriten und Schrank werden pro Benutzer in SQLite gespeichert, siehe cocktail_store.py.
+from cocktail_store import CocktailStore
 
 # Aktivieren der Funktionen aus unseren Importen
-def load_data(url):
+# Der Datensatz wird über cocktail_cache.py geladen: Bei einem Rerun kommt er aus dem Speicher, nur nach Ablauf der TTL
+# wird beim Server (ETag/Last-Modified) nachgefragt. Das zurückgegebene DataFrame wird geteilt und darf nicht verändert werden.
+# Mit mehreren Quellen (COCKTAILS_SOURCES) werden alle gleichzeitig geladen und zusammengeführt (cocktail_sources.py).
+def load_data(sources):
+    import pandas as pd
+    import requests
+    # Such- und Filterlogik liegt in cocktail_catalog.py (ohne Streamlit), hier wird nur noch angezeigt.
+    from cocktail_catalog import load_dataset
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        csv_data = StringIO(response.text)
-        df = pd.read_csv(csv_data)
-        return df
-    except requests.RequestException as e:
+        return load_dataset(sources)
+    except (requests.RequestException, RuntimeError) as e:
         st.error(f"Failed to retrieve data: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), None
+
+# Der Katalog (Datensatz plus Indizes für Suche, Filter und Statistik) wird nur einmal pro Datensatz-Version
+# angelegt und von allen Sitzungen geteilt; catalog_for (cocktail_catalog.py) merkt ihn sich und baut seine Indizes im
+# Hintergrund vor. Bei einer neuen Version wird der neue Katalog im Hintergrund nachgeführt und vorgebaut, bis dahin
+# bekommen alle Sitzungen weiter den alten.
+def get_catalog():
+    from cocktail_catalog import DATA_SOURCES, catalog_for
+    df, version = load_data(DATA_SOURCES)
+    return catalog_for(df, version)
+
+# Eine Datenbank-Verbindung (Pool und Schreib-Thread) für alle Sitzungen.
+@st.cache_resource
+def get_store():
+    return CocktailStore()
+
+# Der Benutzer wird über ?user=... in der URL wiedererkannt. Ohne Kennung bekommt die Sitzung eine neue,
+# die in die URL geschrieben wird, damit ein Lesezeichen bzw. Neuladen dieselben Favoriten zeigt.
+def current_user():
+    user = st.query_params.get('user')
+    if not user:
+        user = uuid.uuid4().hex
+        st.query_params['user'] = user
+    return user
+
+# Maximale Anzahl Treffer in der Suche, die besten Treffer kommen zuerst.
+SEARCH_LIMIT = 50
+# Gesucht wird im Namen oder im ganzen Rezept (Zutaten, Zubereitung, Garnitur, Bartender, Ort).
+SEARCH_MODES = ["Cocktail name", "Ingredients, preparation, garnish, bartender, location"]
 
 # Tab 1: Willkommen-Seite, Bilder und Text.
 def display_welcome_message():
@@ -58,7 +88,8 @@ def display_welcome_message():
 
 # Tab 2: My Liquor Cabinet. 
 # Der folgende Code verweist zurück auf unsere Alkohol-Liste in Zeile 11-12 'alcohol bases'
-def manage_liquor_cabinet():
+def manage_liquor_cabinet(catalog):
+    alcohol_bases = catalog.bases # die Liste aus cocktail_catalog.py, ohne das Modul hier oben zu importieren
     st.title('Manage Your Liquor Cabinet')
     cols = st.columns(4)
     per_column = len(alcohol_bases) // 4 #Zeile 64 und 65 sind für ästhetische Zwecke, unsere Buttons werden im 4x4 Format angeordnet.
@@ -71,47 +102,171 @@ def manage_liquor_cabinet():
                 st.checkbox(alcohol, key=alcohol, value=alcohol in st.session_state.my_liquor_cabinet)
     if st.button('Save Liquor Cabinet'): # Diese Schaltfläche speichert die Auswahl der Alkohole im Schrank. Es ermöglicht uns, diese Informationen später für andere Seiten zu finden.
         st.session_state.my_liquor_cabinet = [alcohol for alcohol in alcohol_bases if st.session_state.get(alcohol, False)]
+        get_store().set_cabinet(st.session_state.user, st.session_state.my_liquor_cabinet)
         st.success('Your liquor cabinet has been updated!')
 
+    # Welche Cocktails lassen sich mit dem gespeicherten Schrank mixen? Die fehlenden Zutaten werden für alle Rezepte
+    # auf einmal gezählt, die Cocktails mit den wenigsten fehlenden Zutaten kommen zuerst.
+    # Wasser, Eis, Zucker usw. setzen wir voraus (PANTRY_STAPLES in cocktail_coverage.py).
+    st.subheader("What can I make right now?")
+    if st.session_state.my_liquor_cabinet:
+        max_missing = st.selectbox("Missing at most this many ingredients", options=[0, 1, 2, 3], key="makeable_missing")
+        rows, missing = catalog.makeable(st.session_state.my_liquor_cabinet, max_missing)
+        if len(rows):
+            def describe(index):
+                missing_list = catalog.missing_ingredients(index, st.session_state.my_liquor_cabinet)
+                return f" (missing: {', '.join(missing_list)})" if missing_list else ""
+            display_cocktail_results(catalog, rows, 'makeable', describe)
+        else:
+            st.write("Nothing yet - try allowing more missing ingredients or add alcohols to your cabinet.")
+    else:
+        st.write("Save some alcohols in your cabinet to see what you can make.")
+
+# Ausgabe der Treffer für Suche und Filter. Es werden nur die Cocktails der aktuellen Seite als Widgets erzeugt,
+# statt für jeden Treffer einen Expander mit Like-Button (bei breiten Filtern sonst tausende Widgets pro Rerun).
+# Die Treffer kommen als Zeilennummern in den geteilten Katalog; nur die Zeilen der sichtbaren Seite werden gelesen,
+# eine Sitzung hält also keine eigene Kopie der Daten.
+PAGE_SIZES = [10, 25, 50, 100]
+
+# Export der Treffer (cocktail_export.py): Format -> Beschriftung.
+EXPORT_LABELS = {'csv': "CSV", 'jsonl': "JSON Lines", 'parquet': "Parquet"}
+
+def export_file(catalog, row_ids, fmt):
+    # Wird erst beim Klick auf den Download-Button aufgerufen (nicht bei jedem Rerun). Die Treffer werden blockweise
+    # in eine temporäre Datei geschrieben, es entsteht keine Kopie des Datensatzes.
+    import tempfile
+    f = tempfile.TemporaryFile()
+    catalog.export(row_ids, fmt, f)
+    f.seek(0)
+    return f
+
+def display_export(catalog, row_ids, key):
+    from cocktail_export import EXPORT_FORMATS
+    cols = st.columns(2)
+    with cols[0]:
+        fmt = st.selectbox("Export format", list(EXPORT_LABELS), format_func=EXPORT_LABELS.get, key=f"{key}_export_format")
+    extension, mime = EXPORT_FORMATS[fmt]
+    with cols[1]:
+        st.download_button(f"Export {len(row_ids)} cocktails", lambda: export_file(catalog, row_ids, fmt),
+                           file_name=f"cocktails-{key}{extension}", mime=mime, on_click="ignore", key=f"{key}_export")
+
+def change_page(key, step):
+    st.session_state[f"{key}_page"] = max(0, st.session_state.get(f"{key}_page", 0) + step)
+
+def display_cocktail_details(index, row, catalog):
+    # Die Zutaten wurden beim Laden bereits aufgeteilt und gestrippt ('Ingredient List').
+    # Anzeige der Zutaten in Bulletpoint-Format, auf Wunsch für mehrere Portionen umgerechnet (cocktail_ingredients.py).
+    st.write("**Ingredients:**")
+    from cocktail_ingredients import scale_ingredient
+    servings = st.number_input("Servings", min_value=1, max_value=50, value=1,
+                               key=f"servings_{row['Cocktail Name']}_{index}")
+    for ingredient in row['Ingredient List']:
+        st.write(f"- {ingredient if servings == 1 else scale_ingredient(ingredient, servings)}")
+    st.write(f"**Preparation:** {row['Preparation']}")
+    st.write(f"**Garnish:** {row['Garnish']}")
+    st.write(f"**Glassware:** {row['Glassware']}")
+    st.write(f"**Bartender:** {row['Bartender']}")
+    st.write(f"**Location:** {row['Location']}")
+    # Ähnliche Cocktails aus der vorberechneten Nachbar-Tabelle (cocktail_recommend.py), ein Nachschlagen pro Rezept.
+    # Die Tabelle wird im Hintergrund gebaut (catalog_for); bis sie fertig ist, fehlt der Abschnitt.
+    if catalog.ready('recommender'):
+        similar_rows, _ = catalog.similar(index)
+        if len(similar_rows):
+            st.write("**More like this:** " + ", ".join(catalog.df['Cocktail Name'].iloc[similar_rows].tolist()))
+
+# Der folgende Code erlaubt dem Nutzer einen Cocktail seiner / ihrer Wahl in die Favoriten zu speichern.
+# Die Favoriten sind ein Wörterbuch Name -> None: Reihenfolge der Likes bleibt erhalten, "schon geliked?" kostet O(1).
+    like_key = f"like_{row['Cocktail Name']}_{index}"
+    if st.button("Like", key=like_key):
+        if row['Cocktail Name'] not in st.session_state.favorites:
+            st.session_state.favorites[row['Cocktail Name']] = None # speichert unser Like im Favoriten-Tab
+            get_store().add_favorite(st.session_state.user, row['Cocktail Name'])
+    st.write("")  # Formatierung: Leere Zeile.
+
+def display_cocktail_results(catalog, row_ids, key, describe=None):
+    total = len(row_ids)
+    cols = st.columns(2)
+    with cols[0]:
+        page_size = st.selectbox("Cocktails per page", PAGE_SIZES, key=f"{key}_page_size")
+    with cols[1]:
+        # Im sparsamen Modus wird der Inhalt eines Expanders erst erzeugt, wenn er geöffnet wird.
+        lazy = st.toggle("Load recipes only when opened", value=True, key=f"{key}_lazy")
+
+    # Neue Treffer (andere Suche, andere Filter) beginnen wieder auf der ersten Seite.
+    signature = hash(row_ids.tobytes())
+    if st.session_state.get(f"{key}_signature") != signature:
+        st.session_state[f"{key}_signature"] = signature
+        st.session_state[f"{key}_page"] = 0
+    pages = max(1, -(-total // page_size))
+    page = min(st.session_state.get(f"{key}_page", 0), pages - 1)
+    st.session_state[f"{key}_page"] = page
+    start, end = page * page_size, min(total, (page + 1) * page_size)
+
+    with span('widgets'):
+        st.caption(f"Showing {start + 1}-{end} of {total} cocktails (page {page + 1} of {pages})")
+        # index ist die Zeilennummer im Katalog (für similar, missing_ingredients und die Widget-Schlüssel), nicht das
+        # Label des DataFrame-Index: Nach dem Zusammenführen mehrerer Quellen müssen die beiden nicht übereinstimmen.
+        page_ids = row_ids[start:end]
+        for index, (_, row) in zip(page_ids.tolist(), catalog.rows(page_ids).iterrows()):
+            # describe kann den Titel ergänzen (z.B. fehlende Zutaten), wird aber nur für die sichtbare Seite aufgerufen.
+            label = f"{row['Cocktail Name']}" + (describe(index) if describe else "")
+            # Der Expander ermöglicht es uns, die Auswahl bei Klick zu erweitern (beim Klick auf den Cocktailtitel erhält man das gesamte Rezept).
+            if lazy:
+                expander = st.expander(label, key=f"{key}_open_{index}", on_change="rerun")
+                if expander.open:
+                    with expander:
+                        display_cocktail_details(index, row, catalog)
+            else:
+                with st.expander(label):
+                    display_cocktail_details(index, row, catalog)
+
+        if pages > 1:
+            cols = st.columns(2)
+            with cols[0]:
+                st.button("Previous page", key=f"{key}_previous", on_click=change_page, args=(key, -1), disabled=page == 0)
+            with cols[1]:
+                st.button("Next page", key=f"{key}_next", on_click=change_page, args=(key, 1), disabled=page == pages - 1)
+
+    # Alle Treffer, nicht nur die sichtbare Seite.
+    display_export(catalog, row_ids, key)
+
 # Tab 3: Cocktail Suche
 # Ermöglicht dem Benutzer die Suche nach einem Cocktail durch Zugriff auf unsere API über ein Suchabfragetab.
-def display_cocktail_search(df):
+def display_cocktail_search(catalog):
     st.title("Cocktail Search")
+    search_in = st.radio("Search in", SEARCH_MODES, horizontal=True, key="search_mode")
     search_query = st.text_input("Search for a cocktail")
+    if search_in == SEARCH_MODES[1]:
+        st.caption('Try `stirred london`, `garnish:mint`, `bartender:"ann lee"` or `"lime juice"` for an exact phrase.')
     if search_query:
-        results = df[df['Cocktail Name'].str.contains(search_query, case=False, na=False)]
-        if not results.empty:
+        # Die Suchmaschine liefert die Zeilennummern der besten Treffer in Rangfolge. Namen: exakter Name, dann
+        # Namensanfang, dann Teil des Namens, zuletzt Namen mit Tippfehlern. Rezepte: Volltext mit BM25
+        # (cocktail_fulltext.py), der Index wird pro Datensatz-Version nur einmal im Hintergrund gebaut (catalog_for)
+        # und auf der Festplatte gespeichert. Bis er fertig ist, bleibt die Rezeptsuche aus.
+        if search_in == SEARCH_MODES[0]:
+            results = catalog.search(search_query, limit=SEARCH_LIMIT)
+        elif not catalog.ready('fulltext'):
+            st.info("The recipe search is still being prepared, try again in a few seconds.")
+            return
+        else:
+            results = catalog.search_text(search_query, limit=SEARCH_LIMIT)
+        if len(results):
             st.subheader("Search Results:")
-            for index, row in results.iterrows(): # Diese Funktion gibt unsere Daten aus
-                with st.expander(f"{row['Cocktail Name']}"): #Der Expander ermöglicht es uns, die Auswahl bei Klick zu erweitern (beim Klick auf den Cocktailtitel erhält man das gesamte Rezept).
-                    # Aufteilung der Zutaten in Strings.
-                    ingredients_list = row['Ingredients'].split(',')
-                    # Anzeige der Zutaten in Bulletpoint-Format.
-                    st.write("**Ingredients:**")
-                    for ingredient in ingredients_list:
-                        st.write(f"- {ingredient.strip()}")  # .strip() entfernt überschüssiger Whitespace, für ein saubereres Erscheinungsbild.
-                    st.write(f"**Preparation:** {row['Preparation']}")          
-                    st.write(f"**Garnish:** {row['Garnish']}")
-                    st.write(f"**Glassware:** {row['Glassware']}")
-                    st.write(f"**Bartender:** {row['Bartender']}")
-                    st.write(f"**Location:** {row['Location']}")
-
-# Der folgende Code erlaubt dem Nutzer einen Cocktail seiner / ihrer Wahl in die Favoriten zu speichern.
-                    like_key = f"like_{row['Cocktail Name']}_{index}"
-                    if st.button("Like", key=like_key):
-                        if row['Cocktail Name'] not in st.session_state.get('favorites', []):
-                            st.session_state.favorites = st.session_state.get('favorites', []) + [row['Cocktail Name']] # speichert unser Like im Favoriten-Tab
-                    st.write("")  # Formatierung: Leere Zeile.
+            if len(results) == SEARCH_LIMIT:
+                st.caption(f"Showing the best {SEARCH_LIMIT} matches, refine your search to narrow them down.")
+            display_cocktail_results(catalog, results, 'search') # Diese Funktion gibt unsere Daten seitenweise aus
         else:
-            st.write("No cocktails found with that name.") # Falls unsere Suchanfrage nicht zu einem Cocktail in unserem API passt.
+            st.write("No cocktails found for that search.") # Falls unsere Suchanfrage nicht zu einem Cocktail in unserem API passt.
 
 # Tab 4: Cocktail Filter
 # Der Code für diesen Tab ist im Wesentlichen analog zu dem des 'Alcohol Cabinets', da sie miteinander interagieren.
 # Die Zeilen 111-115 zeigen, wie unsere Benutzeroberfläche funktioniert und aufgebaut ist. Personalisierung des Inputs durch den Benutzer - Auswahlmöglichkeitetn gegeben durch die Daten in unserer API.
-def display_cocktail_filter(df):
+def display_cocktail_filter(catalog):
+    from cocktail_catalog import Query
+    alcohol_bases = catalog.bases
     st.title("Cocktail Filter")
     num_ingredients = st.selectbox("Maximum Number of Ingredients", options=['Any'] + list(range(1, 11)))
-    glassware_options = ['Any'] + sorted(df['Glassware'].dropna().unique().tolist())
+    glassware_options = ['Any'] + catalog.glassware_options
     glassware = st.selectbox("Type of Glassware", options=glassware_options)
     
     st.write("Select additional alcohols to add to your cabinet:")
@@ -123,6 +278,7 @@ def display_cocktail_filter(df):
                 if st.checkbox(alcohol, key=f"filter_{alcohol}", value=alcohol in st.session_state.my_liquor_cabinet):
                     if alcohol not in st.session_state.my_liquor_cabinet:
                         st.session_state.my_liquor_cabinet.append(alcohol)
+                        get_store().add_to_cabinet(st.session_state.user, alcohol)
 
 # Diese Schaltfläche ermöglicht es dem Benutzer, die Cocktails anzuzeigen. Es kann jedoch nicht deaktiviert werden, wenn es einmal geklickt wurde.
 # Der einzige Fix für dieses Problem besteht derzeit darin, die gesamte Auswahl/die gesamte App zu aktualisieren.
@@ -130,43 +286,17 @@ def display_cocktail_filter(df):
     if display_cocktails or st.session_state.get('display_cocktails', False):
         st.session_state['display_cocktails'] = True
         
-        # Der Filter ermöglicht es uns, die Cocktails anzuzeigen. Wir erstellen eine Kopie, um die Originaldaten nicht zu ändern.
-        filtered_df = df.copy()
-        # Filtern der Zeilen, bei denen die Anzahl der Zutaten (durch Kommas getrennt in der Spalte 'Ingredients') 
-        # der angegebenen Zutatenanzahl entspricht. Gleiches gilt für Gläser.
-        if num_ingredients != 'Any':
-            filtered_df = filtered_df[filtered_df['Ingredients'].apply(lambda x: len(x.split(',')) == int(num_ingredients))]
-        if glassware != 'Any':
-            filtered_df = filtered_df[filtered_df['Glassware'] == glassware]
-        
-        # Hier erstellen wir einen Regex-Filter, um die im Schrank ausgewählten Alkohole abzugleichen.
-        alcohol_regex = '|'.join([re.escape(alcohol) for alcohol in st.session_state.my_liquor_cabinet])
-        filtered_df = filtered_df[filtered_df['Ingredients'].str.contains(alcohol_regex, case=False, na=False)]
+        # Der Katalog filtert mit einer Maske über alle Zeilen, die Originaldaten werden nicht kopiert:
+        # Alkohole im Schrank (vorberechnete Zeilenmengen aus dem Index), Anzahl Zutaten und Glas.
+        query = Query(num_ingredients=None if num_ingredients == 'Any' else int(num_ingredients),
+                      glassware=None if glassware == 'Any' else glassware,
+                      cabinet=tuple(st.session_state.my_liquor_cabinet))
+        filtered = catalog.filter(query)
 
-        if not filtered_df.empty:
+        if len(filtered):
             st.subheader("Search Results:")
-    
-        # Hier verwenden wir den Expander von Streamlit, um Cocktaildetails übersichtlich zu gruppieren.
-        # Gleich wie der Code, der verwendet wird, um die Zutaten im Suchregister anzuzeigen.
-            for index, row in filtered_df.iterrows():
-                with st.expander(f"{row['Cocktail Name']}"):
-                    # die Zutanten werden in Strings aufgetrennt
-                    ingredients_list = row['Ingredients'].split(',')
-                    # Die Zutaten werden in einer Bulletpoint-Liste angezeigt
-                    st.write("**Ingredients:**")
-                    for ingredient in ingredients_list:
-                        st.write(f"- {ingredient.strip()}")  # .strip() entfernt überschüssiger Whitespace
-                    st.write(f"**Preparation:** {row['Preparation']}")          
-                    st.write(f"**Garnish:** {row['Garnish']}")
-                    st.write(f"**Glassware:** {row['Glassware']}")
-                    st.write(f"**Bartender:** {row['Bartender']}")
-                    st.write(f"**Location:** {row['Location']}")
-
-                    like_key = f"like_{row['Cocktail Name']}_{index}"
-                    if st.button("Like", key=like_key):
-                        if row['Cocktail Name'] not in st.session_state.get('favorites', []):
-                            st.session_state.favorites = st.session_state.get('favorites', []) + [row['Cocktail Name']]
-                    st.write("")  # Eine leere Zeile für eine saubere Struktur
+            # Gleich wie im Suchregister: seitenweise Ausgabe in Expandern.
+            display_cocktail_results(catalog, filtered, 'filter')
         else:
              st.warning("No cocktails match your filters.")
 
@@ -176,25 +306,41 @@ def display_cocktail_filter(df):
         #Adapt code that the like checkmark box is below every cocktail title when search and if the like check mark is presse it saves the cocktail 
         #to the favorites list which would then print the favorites list on the last tab, this should be adapted  for both the tabs search cocktail 
         #and filter cocktail: [input entire code]
-def display_favorites(df):
+RECOMMENDATIONS = 10
+
+def display_favorites(catalog):
+    # Die Kreisdiagramme kommen als fertige PNG-Bytes aus einem Cache, siehe cocktail_charts.py (matplotlib wird
+    # erst hier geladen).
+    from cocktail_charts import pie_chart
     st.title("My Favorites")
     if 'favorites' in st.session_state and st.session_state.favorites:
         st.subheader("Liked Cocktails:")
         for favorite in st.session_state.favorites:
             st.write(favorite)
 
+        # Empfehlungen: die Nachbarn aller Favoriten zusammengezählt, die Favoriten selbst ausgenommen.
+        st.subheader("Recommended for you:")
+        if not catalog.ready('recommender'):
+            st.info("Recommendations are still being prepared, check back in a few seconds.")
+        else:
+            rows, _ = catalog.recommend(st.session_state.favorites, limit=RECOMMENDATIONS)
+            if len(rows):
+                display_cocktail_results(catalog, rows, 'recommended')
+            else:
+                st.write("No recommendations yet - like a few more cocktails.")
+
         # Folgend sind die benötigten Daten für unsere Visualisierung als Kreisdiagramm
-        total_cocktails = len(df)
-        liked_cocktails = len(st.session_state.favorites)
+        # Gezählt werden nur Favoriten, die es im aktuellen Katalog noch gibt (gespeicherte Likes können aus einer
+        # älteren Version des Datensatzes stammen), sonst würde das zweite Stück negativ.
+        total_cocktails = len(catalog)
+        liked_cocktails = len(catalog.base_matrix.rows_for(st.session_state.favorites))
         labels = ['Liked Cocktails', 'Total Cocktails']
         sizes = [liked_cocktails, total_cocktails - liked_cocktails]
         explode = (0.1, 0)
         colors = ['#ffcc99', '#66b3ff'] # Farben-Codes erhalten durch Nutzen eines Streamlit-Cheat Sheets
 
-        fig1, ax1 = plt.subplots()
-        ax1.pie(sizes, explode=explode, labels=labels, colors=colors, autopct='%1.1f%%', startangle=140)
-        ax1.axis('equal')
-        st.pyplot(fig1)
+        if total_cocktails:
+            st.image(pie_chart(sizes, labels, explode=explode, colors=colors, startangle=140), width='stretch')
 
         # Erstellung unseres zweiten Kreisdiagramms --> Woraus 'besteht' unser Benutzer?
         # Code geschrieben mit Hilfe von ChatGPT4: Die Prompt lassen wir auf Englisch für eine akkurate und transparente Zitierung.
@@ -204,51 +350,88 @@ def display_favorites(df):
                 #'Absinthe', 'Aquavit', 'Sake', 'Sherry', 'Port', 'Cachaca', 'Pisco', 'Mezcal'] then count the amount each alchol base comes up and display a graph chart , keep the rest of the code as is and show the editing in snippets , edit this following code :
                 #display_favorites(df): [(...) c.f. Code Lines 179-184]
       
-        base_count = {base: 0 for base in alcohol_bases}
-        for cocktail in st.session_state.favorites:
-            ingredients = df.loc[df['Cocktail Name'] == cocktail, 'Ingredients'].values[0]
-            for base in alcohol_bases:
-                if base.lower() in ingredients.lower():
-                    base_count[base] += 1
+        # Die Zählung läuft über die beim Laden vorberechnete Matrix Cocktails x Alkoholbasen:
+        # Name -> Zeilennummer nachschlagen und die Zeilen der Favoriten aufsummieren.
+        base_count = catalog.base_counts(st.session_state.favorites)
 
         bases = [base for base in base_count if base_count[base] > 0]
         counts = [base_count[base] for base in bases]
-        fig2, ax2 = plt.subplots()
-        ax2.pie(counts, labels=bases, autopct='%1.1f%%', startangle=90)
-        ax2.axis('equal')
         st.markdown("### You are made of:")  # Nutzen des Markdowns für Formatierung des Titels.
-        st.pyplot(fig2)
+        if counts:
+            st.image(pie_chart(counts, bases, startangle=90), width='stretch')
+        else:
+            # Ohne erkannte Alkoholbasis gibt es kein Kreisdiagramm (matplotlib kann keine leeren Kuchen zeichnen).
+            st.write("None of your liked cocktails contain one of our alcohol bases.")
 
         # Wird verwendet, um unsere Likes zurückzusetzen. Muss zweimal angeklickt werden, um die Auswahl der App vollständig zurückzusetzen.
         if st.button('Reset Likes'):
-            st.session_state.favorites = []
+            st.session_state.favorites = {}
+            get_store().clear_favorites(st.session_state.user)
             st.success('Your liked cocktails have been reset!')
     else:
         st.write("You haven't liked any cocktails yet.")
 
-# Definition des Mains: Verbindung der verschiedenen Code-Stücke miteinander
-def main():
+# Debug-Panel in der Sidebar mit den Zeiten des letzten Reruns und den Rerun-Zeiten pro Tab.
+# Einschalten mit ?debug=1 in der URL oder COCKTAILS_DEBUG_PANEL=1.
+DEBUG_PANEL = os.environ.get('COCKTAILS_DEBUG_PANEL') == '1'
+
+def display_debug_panel(previous):
+    import pandas as pd
+    with st.sidebar.expander("Rerun timings"):
+        if previous is None or previous['total_ms'] is None:
+            st.caption("No finished rerun yet.")
+        else:
+            st.caption(f"Last rerun ({previous['tab']}): {previous['total_ms']:.1f} ms")
+            st.dataframe(pd.DataFrame(previous['spans'], columns=['Stage', 'ms']), hide_index=True)
+        summary = rerun_summary()
+        if summary:
+            st.caption("Reruns per tab (ms)")
+            st.dataframe(pd.DataFrame(summary), hide_index=True)
+        from cocktail_planner import cache_stats
+        stats = cache_stats()
+        st.caption(f"Filter cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} queries cached ({stats['bytes'] / 1024:.0f} KB)")
+        # Der Diagramm-Cache zählt über cocktail_metrics, dafür muss matplotlib hier nicht geladen werden.
+        charts = {dict(labels)['result']: value for labels, value in counters('cocktail_chart_cache_total').items()}
+        st.caption(f"Chart cache: {charts.get('hit', 0)} hits, {charts.get('miss', 0)} misses")
+
+# Favoriten und Schrank werden einmal pro Sitzung aus der Datenbank gelesen, danach nur noch geschrieben.
+def init_session(catalog):
+    if 'user' not in st.session_state:
+        st.session_state['user'] = current_user()
     if 'my_liquor_cabinet' not in st.session_state:
-        st.session_state['my_liquor_cabinet'] = []
+        cabinet = set(get_store().cabinet(st.session_state.user))
+        st.session_state['my_liquor_cabinet'] = [alcohol for alcohol in catalog.bases if alcohol in cabinet]
     if 'favorites' not in st.session_state:
-        st.session_state['favorites'] = []
-
-# Laden unseres APIs
-    df = load_data('https://github.com/OzanGenc/CocktailAnalysis/raw/main/cocktails.csv')
-# Erschaffen von einer Sidebar mit Tabs des Apps.
-    selected_tab = st.sidebar.radio("Select Tab", ["Hello Mixologist", "Manage Liquor Cabinet", "Cocktail Search", "Cocktail Filter", "My Favorites"])
-
-# Tab Funktionalität:
-    if selected_tab == "Hello Mixologist": # Darstellung des Tab-Titels
-        display_welcome_message() # Tab-Klick ausführen
-    elif selected_tab == "Manage Liquor Cabinet":
-        manage_liquor_cabinet()
-    elif selected_tab == "Cocktail Search":
-        display_cocktail_search(df)
-    elif selected_tab == "Cocktail Filter":
-        display_cocktail_filter(df)
-    elif selected_tab == "My Favorites":
-        display_favorites(df)
+        st.session_state['favorites'] = dict.fromkeys(get_store().favorites(st.session_state.user))
+
+# Definition des Mains: Verbindung der verschiedenen Code-Stücke miteinander
+def main():
+    # Der ganze Durchlauf wird gemessen; das Ergebnis des vorherigen Reruns zeigt das Debug-Panel.
+    with rerun() as record:
+        previous = st.session_state.get('last_rerun')
+        st.session_state['last_rerun'] = record
+        # Erschaffen von einer Sidebar mit Tabs des Apps.
+        selected_tab = st.sidebar.radio("Select Tab", ["Hello Mixologist", "Manage Liquor Cabinet", "Cocktail Search", "Cocktail Filter", "My Favorites"])
+        record['tab'] = selected_tab
+
+        # Tab Funktionalität:
+        if selected_tab == "Hello Mixologist": # Darstellung des Tab-Titels
+            display_welcome_message() # Tab-Klick ausführen
+        else:
+            # Laden unseres APIs, erst wenn ein Tab die Cocktails braucht.
+            catalog = get_catalog()
+            init_session(catalog)
+            if selected_tab == "Manage Liquor Cabinet":
+                manage_liquor_cabinet(catalog)
+            elif selected_tab == "Cocktail Search":
+                display_cocktail_search(catalog)
+            elif selected_tab == "Cocktail Filter":
+                display_cocktail_filter(catalog)
+            elif selected_tab == "My Favorites":
+                display_favorites(catalog)
+
+        if DEBUG_PANEL or st.query_params.get('debug') == '1':
+            display_debug_panel(previous)
 
 # Ausführung des Mains
 if __name__ == "__main__":
@@ -0,0 +1,319 @@
+# Benchmarks für Laden, Suche, Filter, Favoriten-Statistik und ganze Reruns der App bei wachsendem Katalog.
+# Der Katalog wird synthetisch erzeugt (gleiche Spalten wie cocktails.csv) und von einem lokalen HTTP-Server
+# ausgeliefert, damit der ganze Weg über cocktail_cache.py gemessen wird.
+#
+#   python bench_cocktails.py --sizes 1000 10000 100000 --output bench_report.json
+#   python bench_cocktails.py --sizes 1000 --compare bench_report.json
+#   python bench_cocktails.py --sizes 1000 --startup --no-app
+#
+# Mit --startup wird zusätzlich der Start eines frischen Workers gemessen: Importzeit der App (python -X importtime,
+# ohne die Module, die der Interpreter ohnehin lädt) und der erste Rerun des Willkommen-Tabs bzw. des ersten Tabs
+# mit Katalog in einem neuen Prozess.
+#
+# Der Bericht ist JSON (eine Zeile pro Grösse und Szenario mit Median, p95 und Minimum in Millisekunden)
+# und kann mit --compare gegen einen älteren Bericht verglichen werden.
+import argparse
+import csv
+import functools
+import http.server
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_SCRIPT = os.path.join(APP_DIR, 'FINAL VERSION.py')
+COLUMNS = ['Cocktail Name', 'Ingredients', 'Preparation', 'Garnish', 'Glassware', 'Bartender', 'Location']
+
+_NAME_WORDS = ['Smoky', 'Velvet', 'Midnight', 'Golden', 'Paloma', 'Old', 'Fashioned', 'Negroni', 'Sour', 'Last', 'Word',
+               'Jungle', 'Bird', 'Royal', 'Hour', 'Storm', 'Fizz', 'Garden', 'Harbor', 'Ember', 'Spritz', 'Mule', 'Flip']
+_SPIRITS = ['Vodka', 'White Rum', 'Aged Rum', 'London Dry Gin', 'Blanco Tequila', 'Bourbon Whiskey', 'Rye Whiskey',
+            'Cognac Brandy', 'Sweet Vermouth', 'Dry Vermouth', 'Orange Liqueurs', 'Absinthe', 'Aquavit', 'Junmai Sake',
+            'Fino Sherry', 'Tawny Port', 'Cachaca', 'Pisco', 'Mezcal', 'Campari', 'Green Chartreuse']
+_MODIFIERS = ['Lime Juice', 'Lemon Juice', 'Simple Syrup', 'Honey Syrup', 'Demerara Syrup*', 'Angostura Bitters',
+              'Orange Bitters', 'Soda Water', 'Ginger Beer', 'Egg White', 'Mint', 'Grapefruit Juice', 'Pineapple Juice',
+              'Passion Fruit Puree', 'Cucumber', 'Cold Brew Coffee', 'Coconut Cream', 'Maraschino Liqueur']
+_MEASURES = ['2 oz', '1.5 oz', '1 oz', '.75 oz', '.5 oz', '1/4 oz', '2 dashes', '1 barspoon', 'top', '3 leaves']
+_GLASSWARE = ['Coupe', 'Rocks', 'Double Rocks', 'Collins', 'Highball', 'Nick & Nora', 'Martini', 'Tiki Mug', 'Flute']
+_GARNISH = ['Lime wheel', 'Lemon twist', 'Orange peel', 'Mint sprig', 'Cherry', 'Grapefruit twist', 'Nutmeg', '']
+_PREPARATION = ['Shake all ingredients with ice and strain into a chilled glass.', 'Stir over ice and strain.',
+                'Build in the glass over ice and top with soda.', 'Dry shake, then shake with ice and double strain.',
+                'Swizzle with crushed ice.']
+_BARTENDERS = [f"{first} {last}" for first in ['Ann', 'Bo', 'Carla', 'Dev', 'Eli', 'Fran', 'Gus', 'Hana']
+               for last in ['Lee', 'Chen', 'Moreau', 'Patel', 'Okafor', 'Silva', 'Novak']]
+_LOCATIONS = ['London', 'New York', 'Paris', 'Berlin', 'Tokyo', 'Zurich', 'St. Gallen', 'Singapore', 'Mexico City']
+
+
+def generate_catalog(n, path, seed=42):
+    # Synthetischer Katalog mit n Rezepten im Format von cocktails.csv.
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for i in range(n):
+            ingredients = rng.sample(_SPIRITS, rng.choice([1, 1, 2, 2, 3])) + rng.sample(_MODIFIERS, rng.randint(0, 4))
+            writer.writerow([
+                f"{rng.choice(_NAME_WORDS)} {rng.choice(_NAME_WORDS)}" + (f" No. {i}" if i >= len(_NAME_WORDS) ** 2 else ''),
+                ', '.join(f"{rng.choice(_MEASURES)} {ingredient}" for ingredient in ingredients),
+                rng.choice(_PREPARATION),
+                rng.choice(_GARNISH),
+                rng.choice(_GLASSWARE) if rng.random() > 0.03 else '',
+                rng.choice(_BARTENDERS),
+                rng.choice(_LOCATIONS),
+            ])
+    return path
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_directory(directory):
+    # Lokaler Ersatz für GitHub, liefert die erzeugten Kataloge aus.
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(size, scenario, timings, **extra):
+    ordered = sorted(timings)
+    return dict({
+        'size': size,
+        'scenario': scenario,
+        'runs': len(ordered),
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'min_ms': round(ordered[0], 3),
+    }, **extra)
+
+
+def bench_engine(size, url, cache_dir, repeat, seed=0):
+    import cocktail_cache
+    from cocktail_catalog import CocktailCatalog, Query, alcohol_bases
+
+    rng = random.Random(seed)
+    results = []
+
+    # Laden: kalt (Download + Snapshot kompilieren), von der Festplatte (mmap) und aus dem Prozess-Speicher.
+    def cold():
+        cocktail_cache.clear_memory_cache()
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        cocktail_cache.load_cocktails(url, cache_dir=cache_dir)
+
+    def disk():
+        cocktail_cache.clear_memory_cache()
+        cocktail_cache.load_cocktails(url, cache_dir=cache_dir)
+
+    results.append(summarize(size, 'load_cold', timed(cold, max(1, repeat // 5))))
+    results.append(summarize(size, 'load_disk', timed(disk, max(1, repeat // 5))))
+    results.append(summarize(size, 'load_memory', timed(lambda: cocktail_cache.load_cocktails(url, cache_dir=cache_dir), repeat)))
+
+    df, version = cocktail_cache.load_cocktails(url, cache_dir=cache_dir)
+    catalog = CocktailCatalog(df, version, cache_dir=cache_dir)
+    for name in ['ingredient_table', 'ingredient_index', 'name_search', 'base_matrix', 'coverage_index', 'recommender',
+                 'fulltext']:
+        results.append(summarize(size, f'build_{name}', timed(lambda: getattr(catalog, name), 1)))
+
+    names = df['Cocktail Name'].tolist()
+    queries = [rng.choice(names)[:length] for length in (3, 6, 12) for _ in range(max(1, repeat // 3))]
+    queries += ['negorni', 'fashoined', 'midnigth']
+    results.append(summarize(size, 'search', [t for q in queries for t in timed(lambda: catalog.search(q, limit=50), 1)]))
+    # Volltext: ein Wort, Feld, Phrase und mehrere Teile gemischt. Der Index kommt beim zweiten Mal von der Festplatte.
+    texts = ['mint', 'stirred london', 'garnish:lemon', '"lime juice"', 'bartender:"ann lee" shake', '"simple syrup" location:paris']
+    results.append(summarize(size, 'search_text', [t for q in texts * max(1, repeat // len(texts))
+                                                   for t in timed(lambda: catalog.search_text(q, limit=50), 1)]))
+    results.append(summarize(size, 'load_fulltext', timed(lambda: CocktailCatalog(df, catalog.version, cache_dir=cache_dir).fulltext, 1)))
+
+    glassware = catalog.glassware_options
+    filters = [Query(rng.choice([None, 2, 3, 4]), rng.choice([None] + glassware), tuple(rng.sample(alcohol_bases, rng.randint(0, 4))))
+               for _ in range(repeat)]
+    results.append(summarize(size, 'filter', [t for q in filters for t in timed(lambda: catalog.filter(q), 1)]))
+    # Dieselben Filter noch einmal: kommen jetzt aus dem Ergebnis-Cache (cocktail_planner.py).
+    results.append(summarize(size, 'filter_cached', [t for q in filters for t in timed(lambda: catalog.filter(q), 1)]))
+    # Export aller Zeilen in jedem Format, blockweise in eine verworfene Datei (cocktail_export.py).
+    every_row = catalog.filter(Query())
+
+    def export(fmt):
+        with open(os.devnull, 'wb') as f:
+            catalog.export(every_row, fmt, f)
+
+    for fmt in ('csv', 'jsonl', 'parquet'):
+        results.append(summarize(size, f'export_{fmt}', timed(lambda: export(fmt), 1)))
+
+    favorites = rng.sample(names, min(50, len(names)))
+    results.append(summarize(size, 'favorites_stats', timed(lambda: catalog.base_counts(favorites), repeat)))
+    results.append(summarize(size, 'makeable', timed(lambda: catalog.makeable(['Gin', 'Vodka', 'Whiskey'], 1), repeat)))
+    results.append(summarize(size, 'recommend', timed(lambda: catalog.recommend(favorites), repeat)))
+    return results, favorites
+
+
+def bench_app(size, repeat, favorites):
+    # Ganze Reruns der Streamlit-App über AppTest, pro Tab gemessen (nach einem ersten Aufwärm-Lauf).
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(APP_SCRIPT, default_timeout=600)
+    app.run()
+    results = []
+    journeys = [
+        ('rerun_welcome', lambda: app.sidebar.radio[0].set_value("Hello Mixologist")),
+        ('rerun_cabinet', lambda: app.sidebar.radio[0].set_value("Manage Liquor Cabinet")),
+        ('rerun_search', lambda: app.sidebar.radio[0].set_value("Cocktail Search")),
+        ('rerun_search_query', lambda: app.text_input[0].input(random.choice(['sour', 'negroni', 'midnight gold']))),
+        ('rerun_filter', lambda: app.sidebar.radio[0].set_value("Cocktail Filter")),
+        ('rerun_filter_display', lambda: [b for b in app.button if b.label == 'Display Cocktails'][0].click()),
+        ('rerun_favorites', lambda: app.sidebar.radio[0].set_value("My Favorites")),
+    ]
+    app.session_state['favorites'] = dict.fromkeys(favorites)
+    for scenario, action in journeys:
+        timings = []
+        for _ in range(max(1, repeat // 5)):
+            action()
+            start = time.perf_counter()
+            app.run()
+            timings.append((time.perf_counter() - start) * 1000)
+            if app.exception:
+                raise RuntimeError(f"{scenario}: {app.exception[0].message}")
+        results.append(summarize(size, scenario, timings))
+    return results
+
+
+_COLD_START = '''
+import sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=600)
+start = time.perf_counter()
+app.run()
+welcome = (time.perf_counter() - start) * 1000
+app.sidebar.radio[0].set_value("Cocktail Search")
+start = time.perf_counter()
+app.run()
+print(welcome, (time.perf_counter() - start) * 1000)
+'''
+
+
+def import_times(code):
+    # Führt code in einem neuen Interpreter mit -X importtime aus und liefert die Module der obersten Ebene
+    # mit ihrer kumulierten Importzeit in Millisekunden (Zeilen 'import time: self | cumulative | name').
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=APP_DIR, capture_output=True,
+                            text=True).stderr
+    modules = []
+    for line in stderr.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)$', line)
+        if match and not match.group(2):
+            modules.append((match.group(3), int(match.group(1)) / 1000))
+    return modules
+
+
+def bench_startup(size, repeat):
+    baseline = {name for name, _ in import_times('pass')}
+    code = f"import runpy; runpy.run_path({APP_SCRIPT!r}, run_name='bench_startup')"
+    timings, heaviest = [], []
+    for _ in range(max(3, repeat // 5)):
+        modules = [(name, ms) for name, ms in import_times(code) if name not in baseline]
+        timings.append(sum(ms for _, ms in modules))
+        heaviest = sorted(modules, key=lambda module: -module[1])[:5]
+    results = [summarize(size, 'import_app', timings, heaviest=[[name, round(ms, 1)] for name, ms in heaviest])]
+
+    welcome, catalog_tab = [], []
+    for _ in range(max(3, repeat // 5)):
+        output = subprocess.run([sys.executable, '-c', _COLD_START, APP_SCRIPT], cwd=APP_DIR, capture_output=True,
+                                text=True, check=True).stdout.split()
+        welcome.append(float(output[-2]))
+        catalog_tab.append(float(output[-1]))
+    results.append(summarize(size, 'cold_welcome', welcome))
+    results.append(summarize(size, 'cold_catalog_tab', catalog_tab))
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(report, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(row['size'], row['scenario']): row for row in json.load(f)['results']}
+    print(f"{'size':>8} {'scenario':<24} {'baseline':>10} {'now':>10} {'ratio':>7}")
+    for row in report['results']:
+        old = baseline.get((row['size'], row['scenario']))
+        if old and old['median_ms']:
+            print(f"{row['size']:>8} {row['scenario']:<24} {old['median_ms']:>10.2f} {row['median_ms']:>10.2f} "
+                  f"{row['median_ms'] / old['median_ms']:>6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the cocktail engine and app on synthetic catalogs.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=20, help="timed runs per scenario")
+    parser.add_argument('--app-max-size', type=int, default=100000, help="largest catalog for full-app reruns")
+    parser.add_argument('--no-app', action='store_true', help="skip the Streamlit AppTest reruns")
+    parser.add_argument('--startup', action='store_true',
+                        help="also measure app import time (-X importtime) and cold first reruns for the first size")
+    parser.add_argument('--output', help="write the JSON report to this file")
+    parser.add_argument('--compare', help="compare with an earlier JSON report")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='cocktail-bench-')
+    server = serve_directory(workdir)
+    report = {
+        'meta': {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'revision': git_revision(),
+                 'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count()},
+        'results': [],
+    }
+    try:
+        for size in args.sizes:
+            csv_name = f"cocktails_{size}.csv"
+            generate_catalog(size, os.path.join(workdir, csv_name))
+            url = f"http://127.0.0.1:{server.server_port}/{csv_name}"
+            cache_dir = os.path.join(workdir, f"cache_{size}")
+            results, favorites = bench_engine(size, url, cache_dir, args.repeat)
+            report['results'] += results
+            # Die App liest Datenquelle, Cache-Verzeichnis und Datenbank beim Import aus der Umgebung
+            # (auch in den Prozessen von bench_startup).
+            os.environ['COCKTAILS_DATA_URL'] = url
+            os.environ['COCKTAILS_CACHE_DIR'] = cache_dir
+            os.environ['COCKTAILS_STORE'] = os.path.join(workdir, f"store_{size}.db")
+            if args.startup and size == args.sizes[0]:
+                report['results'] += bench_startup(size, args.repeat)
+            if not args.no_app and size <= args.app_max_size:
+                for module in ['cocktail_catalog', 'cocktail_cache', 'cocktail_store', 'cocktail_sources']:
+                    sys.modules.pop(module, None)
+                report['results'] += bench_app(size, args.repeat, favorites)
+            for row in report['results']:
+                if row['size'] == size:
+                    print(f"{size:>8} {row['scenario']:<24} median {row['median_ms']:>10.2f} ms  p95 {row['p95_ms']:>10.2f} ms")
+    finally:
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+# Alkoholbasen einer Zutat erkennen: 'Bourbon', 'Rye Whiskey' und 'Islay Scotch' zählen alle als Whiskey.
+#
+# Zu jeder Basis aus alcohol_bases gehört eine Liste von Begriffen (BASE_TAXONOMY), z.B. Whiskey -> bourbon, rye,
+# scotch. Aus allen Begriffen wird einmal ein Aho-Corasick-Automat gebaut; ein Text wird dann in einem Durchgang
+# Zeichen für Zeichen gelesen und liefert alle Basen, deren Begriffe darin als ganze Wörter vorkommen ('Gin' trifft
+# 'london dry gin', aber nicht 'ginger beer'). Einzahl und Mehrzahl gelten gleich, Akzente werden ignoriert
+# ('cachaça' = 'cachaca'). Überlappen sich Treffer, gilt der längere: 'maraschino cherry' (NON_BASE_TERMS) verdeckt
+# 'maraschino', 'port charlotte' (ein Scotch) verdeckt 'port'. Getaggt wird einmal pro Datensatz-Version, und zwar das Vokabular der Zutaten-Tabelle
+# (cocktail_ingredients.py): Filter, Statistik, "What can I make" und Empfehlungen teilen sich diese Tags.
+#
+#   COCKTAILS_BASE_TAXONOMY   JSON-Datei {"Whiskey": ["bourbon", ...], ...}, ergänzt die Begriffe von BASE_TAXONOMY
+#                             (nur für bestehende Basen, neue Basen gibt es im Filter und in der Statistik nicht)
+#
+#   python cocktail_bases.py "Buffalo Trace Bourbon" "Ginger Beer" "Rhum Agricole"
+import json
+import os
+import sys
+import unicodedata
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+
+# Basis -> Begriffe (klein geschrieben). Die Basis selbst gehört immer dazu. Spezifischere Basen (Pisco, Cachaca,
+# Mezcal) stehen für sich und zählen nicht zusätzlich als Brandy, Rum bzw. Tequila.
+BASE_TAXONOMY = {
+    'Vodka': ['vodka'],
+    'Rum': ['rum', 'rhum'],
+    'Gin': ['gin', 'genever', 'jenever', 'old tom'],
+    'Tequila': ['tequila'],
+    'Whiskey': ['whiskey', 'whisky', 'bourbon', 'rye', 'scotch', 'single malt', 'port charlotte', 'port ellen'],
+    'Brandy': ['brandy', 'cognac', 'armagnac', 'calvados', 'applejack', 'eau de vie', 'eau-de-vie'],
+    'Vermouth': ['vermouth', 'punt e mes', 'lillet', 'cocchi americano'],
+    'Liqueurs': ['liqueur', 'curacao', 'triple sec', 'cointreau', 'grand marnier', 'chartreuse', 'maraschino',
+                 'amaretto', 'st-germain', 'st germain', 'benedictine', 'drambuie', 'kahlua', 'galliano',
+                 'creme de cassis', 'creme de cacao', 'creme de violette', 'creme de menthe', 'cherry heering'],
+    'Absinthe': ['absinthe', 'pastis', 'herbsaint', 'pernod'],
+    'Aquavit': ['aquavit', 'akvavit'],
+    'Sake': ['sake'],
+    'Sherry': ['sherry', 'fino', 'manzanilla', 'amontillado', 'oloroso', 'palo cortado', 'pedro ximenez'],
+    'Port': ['port'],
+    'Cachaca': ['cachaca'],
+    'Pisco': ['pisco'],
+    'Mezcal': ['mezcal', 'mescal'],
+}
+# Zutaten, die einen Begriff enthalten, aber zu keiner Basis gehören. Sie verdecken den kürzeren Begriff darin.
+NON_BASE_TERMS = ['rye bread', 'maraschino cherry', 'maraschino cherries']
+TAXONOMY_PATH = os.environ.get('COCKTAILS_BASE_TAXONOMY')
+
+
+def load_taxonomy(path=TAXONOMY_PATH):
+    # Standard-Taxonomie, ergänzt um die Begriffe aus der JSON-Datei. Unbekannte Basen sind ein Fehler, statt
+    # stillschweigend ignoriert zu werden.
+    taxonomy = {base: list(terms) for base, terms in BASE_TAXONOMY.items()}
+    if path:
+        with open(path, encoding='utf-8') as f:
+            extra = json.load(f)
+        unknown = [base for base in extra if base not in taxonomy]
+        if unknown:
+            raise ValueError(f"{path}: unknown alcohol base(s) {', '.join(map(repr, unknown))}, "
+                             f"expected one of {', '.join(taxonomy)}")
+        for base, terms in extra.items():
+            taxonomy[base].extend(terms)
+    return taxonomy
+
+
+def normalize(text):
+    # Klein geschrieben und ohne Akzente, damit Begriffe und Zutaten gleich verglichen werden.
+    text = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _forms(term):
+    # Einzahl und Mehrzahl: 'liqueurs' -> {'liqueurs', 'liqueur'}, 'gin' -> {'gin', 'gins'}
+    term = ' '.join(normalize(term).split())
+    if not term:
+        return set()
+    singular = term[:-1] if term.endswith('s') and len(term) > 3 else term
+    return {term, singular, singular + 's'}
+
+
+class BaseTagger:
+    # Aho-Corasick über alle Begriffe: Trie mit Fehler-Links, jeder Zustand kennt die Begriffe, die an dieser
+    # Stelle enden (Länge und Basen). Ein Text wird in einem Durchgang gelesen, unabhängig von der Anzahl Begriffe.
+    # Begriffe aus NON_BASE_TERMS haben keine Basen und dienen nur dazu, kürzere Begriffe zu verdecken.
+    def __init__(self, bases, taxonomy, non_base_terms=NON_BASE_TERMS):
+        self.bases = list(bases)
+        terms = {}
+        for i, base in enumerate(self.bases):
+            for term in [base] + list(taxonomy.get(base, [])):
+                for form in _forms(term):
+                    terms.setdefault(form, set()).add(i)
+        for term in non_base_terms:
+            terms.setdefault(' '.join(normalize(term).split()), set())
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # Zustand -> [(Länge des Begriffs, Basen), ...]
+        for term, base_ids in terms.items():
+            state = 0
+            for ch in term:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = self._goto[state][ch] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append((len(term), frozenset(base_ids)))
+        # Fehler-Links in Breitensuche: längstes echtes Suffix, das auch ein Präfix eines Begriffs ist.
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(ch, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def tag(self, text):
+        # Menge der Basennummern (Positionen in self.bases), deren Begriffe als ganze Wörter im Text vorkommen.
+        text = normalize(text)
+        matches = []
+        state = 0
+        for end, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, base_ids in self._output[state]:
+                start = end - length + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end + 1 == len(text) or not text[end + 1].isalnum()):
+                    matches.append((start, end, base_ids))
+        # Treffer, die ganz in einem längeren Treffer liegen, zählen nicht ('rye' in 'rye bread').
+        found = set()
+        for start, end, base_ids in matches:
+            if not any(other_start <= start and end <= other_end and other_end - other_start > end - start
+                       for other_start, other_end, _ in matches):
+                found |= base_ids
+        return found
+
+    def tag_all(self, texts):
+        # Matrix Texte x Basen (bool).
+        tags = np.zeros((len(texts), len(self.bases)), dtype=bool)
+        for row, text in enumerate(texts):
+            if isinstance(text, str):
+                tags[row, list(self.tag(text))] = True
+        return tags
+
+
+@lru_cache(maxsize=8)
+def tagger_for(bases):
+    # Ein Automat pro Liste von Basen (Tupel), gebaut beim ersten Gebrauch.
+    return BaseTagger(bases, load_taxonomy())
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python cocktail_bases.py <ingredient> [<ingredient> ...]")
+    from cocktail_catalog import alcohol_bases
+    tagger = tagger_for(tuple(alcohol_bases))
+    for text in sys.argv[1:]:
+        print(f"{text}\t{', '.join(tagger.bases[i] for i in sorted(tagger.tag(text))) or '-'}")
@@ -0,0 +1,147 @@
+# Batch-Auswertung vieler Schrank-Profile auf einmal (z.B. Menüs für tausende Bars im Voraus berechnen).
+#
+# Ein Profil ist eine Zeile einer Matrix Profile x Spalten, die Spalten sind Alkoholbasen (oder Zutaten) des Katalogs.
+# Ausgewertet wird das boolesche Produkt Profile x (Spalten x Rezepte): Die Matrix Spalten x Rezepte liegt als
+# gepackte Bitsets vor (1 Bit pro Rezept), ein Profil ist das ODER seiner Spalten-Zeilen. Gleiche Profile werden
+# nur einmal ausgewertet. Das Ergebnis ist eine dünn besetzte Matrix im CSR-Format (indptr/indices):
+# Die Treffer von Profil p sind indices[indptr[p]:indptr[p + 1]].
+#
+#   python cocktail_batch.py profiles.csv menus.csv
+# profiles.csv hat eine Spalte 'profile' und pro Alkoholbasis eine Spalte mit 0/1.
+import os
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cocktail_catalog import Query, alcohol_bases, load_catalog
+
+BATCH_CHUNK = 1024  # Profile pro Arbeitspaket, kleinere Batches laufen ohne Zusatzprozesse
+
+BatchResult = namedtuple('BatchResult', ['indptr', 'indices'])
+
+
+def profile_matrix(cabinets, columns):
+    # Liste von Schränken (z.B. [['Gin', 'Vodka'], ['Rum']]) -> boolesche Matrix Profile x Spalten.
+    position = {column: i for i, column in enumerate(columns)}
+    matrix = np.zeros((len(cabinets), len(columns)), dtype=bool)
+    for p, cabinet in enumerate(cabinets):
+        for item in cabinet:
+            if item in position:
+                matrix[p, position[item]] = True
+    return matrix
+
+
+def rows_for_profile(result, p):
+    return result.indices[result.indptr[p]:result.indptr[p + 1]]
+
+
+class _PackedColumns:
+    # Spalten x Rezepte als gepackte Bitsets, bereits auf die Kandidaten (Anzahl Zutaten, Glas) eingeschränkt.
+    def __init__(self, catalog, columns, candidates):
+        index = catalog.ingredient_index
+        self.n = len(catalog)
+        self.bits = np.stack([
+            np.packbits((index.base_mask(column) if column in index.bases else index.ingredient_mask(column)) & candidates,
+                        bitorder='little')
+            for column in columns
+        ])
+        self.candidates = np.flatnonzero(candidates).astype(np.int32)
+
+    def evaluate(self, profiles):
+        # Ein Rezept passt, wenn es mindestens eine Spalte des Profils enthält (wie der Schrank-Filter in der App).
+        # Ein leeres Profil schränkt nicht ein.
+        counts, parts = [], []
+        for profile in profiles:
+            columns = np.flatnonzero(profile)
+            if len(columns):
+                packed = np.bitwise_or.reduce(self.bits[columns], axis=0)
+                matched = np.flatnonzero(np.unpackbits(packed, count=self.n, bitorder='little').view(bool)).astype(np.int32)
+            else:
+                matched = self.candidates
+            counts.append(len(matched))
+            parts.append(matched)
+        return counts, np.concatenate(parts) if parts else self.candidates[:0]
+
+
+def _evaluate_in_process(args):
+    packed_columns, profiles = args
+    return packed_columns.evaluate(profiles)
+
+
+def batch_filter(catalog, profiles, columns=None, num_ingredients=None, glassware=None, workers=None):
+    # profiles: boolesche Matrix Profile x columns (Standard: die Alkoholbasen des Katalogs).
+    columns = list(catalog.bases if columns is None else columns)
+    if not columns:
+        raise ValueError("batch_filter needs at least one column (alcohol base or ingredient)")
+    profiles = np.atleast_2d(np.asarray(profiles, dtype=bool))  # ein einzelnes Profil geht auch
+    if profiles.ndim != 2 or profiles.shape[1] != len(columns):
+        raise ValueError(f"profiles must be a matrix with one column per entry of columns ({len(columns)}), "
+                         f"got shape {profiles.shape}")
+    candidates = catalog.filter_mask(Query(num_ingredients, glassware, ()))
+    packed_columns = _PackedColumns(catalog, columns, candidates)
+
+    # Viele Bars haben denselben Bestand: jedes verschiedene Profil wird nur einmal ausgewertet.
+    unique_profiles, inverse = np.unique(profiles, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    # Grosse Batches werden auf mehrere Prozesse verteilt, kleine laufen direkt, weil das Verschicken
+    # der Bitsets an die Prozesse sonst teurer wäre als die Auswertung.
+    chunks = [unique_profiles[start:start + BATCH_CHUNK] for start in range(0, len(unique_profiles), BATCH_CHUNK)]
+    workers = min(len(chunks), workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_evaluate_in_process, [(packed_columns, chunk) for chunk in chunks]))
+    else:
+        results = [packed_columns.evaluate(chunk) for chunk in chunks]
+
+    # Zurück in die Reihenfolge der ursprünglichen Profile.
+    unique_counts = np.asarray([count for chunk_counts, _ in results for count in chunk_counts], dtype=np.int64)
+    unique_indices = np.concatenate([chunk_indices for _, chunk_indices in results]) if results else np.zeros(0, np.int32)
+    unique_ptr = np.zeros(len(unique_counts) + 1, dtype=np.int64)
+    np.cumsum(unique_counts, out=unique_ptr[1:])
+    counts = unique_counts[inverse]
+    indptr = np.zeros(len(profiles) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    if len(unique_profiles) == len(profiles) and np.array_equal(inverse, np.arange(len(profiles))):
+        indices = unique_indices
+    else:
+        indices = np.concatenate([unique_indices[unique_ptr[u]:unique_ptr[u + 1]] for u in inverse]
+                                 or [np.zeros(0, np.int32)])
+    return BatchResult(indptr, indices)
+
+
+USAGE = ("Usage: python cocktail_batch.py <profiles.csv> <menus.csv>\n"
+         "profiles.csv needs a 'profile' column and one 0/1 column per alcohol base, e.g. profile,Gin,Rum")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        sys.exit(USAGE)
+    try:
+        profiles = pd.read_csv(argv[0])
+    except (OSError, ValueError) as e:
+        sys.exit(f"{argv[0]}: {e}\n{USAGE}")
+    if 'profile' not in profiles:
+        sys.exit(f"{argv[0]}: missing column 'profile'\n{USAGE}")
+    # Die Spalten werden vor dem Laden des Katalogs geprüft, ein Tippfehler soll nicht erst den Download abwarten.
+    columns = [column for column in alcohol_bases if column in profiles]
+    if not columns:
+        sys.exit(f"{argv[0]}: no alcohol base columns (expected some of {', '.join(alcohol_bases)})\n{USAGE}")
+    catalog = load_catalog()
+    result = batch_filter(catalog, profiles[columns].fillna(0).to_numpy(dtype=bool), columns)
+    names = catalog.df['Cocktail Name']
+    with open(argv[1], 'w', encoding='utf-8', newline='') as f:
+        f.write('profile,Cocktail Name\n')
+        for p, profile in enumerate(profiles['profile'].tolist()):
+            rows = rows_for_profile(result, p)
+            pd.DataFrame({'profile': profile, 'Cocktail Name': names.iloc[rows].to_numpy()}).to_csv(f, header=False, index=False)
+    print(f"Wrote menus for {len(profiles)} profiles to {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
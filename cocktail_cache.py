@@ -0,0 +1,219 @@
+# Zwischenspeicher für unseren Cocktail-Datensatz.
+# Reihenfolge beim Laden: Kopie im Prozess-Speicher -> Kopie auf der Festplatte (mit ETag/Last-Modified
+# Revalidierung) -> Netzwerk. Ohne Netz wird notfalls die veraltete Festplatten-Kopie geliefert, beim allerersten Start
+# ohne Netz und ohne Kopie die Offline-Kopie aus COCKTAILS_BUNDLED_CSV (falls gesetzt).
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+import requests
+
+import cocktail_snapshot
+from cocktail_metrics import span
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get('COCKTAILS_CACHE_DIR', os.path.join(APP_DIR, '.cocktail_cache'))
+CACHE_TTL = float(os.environ.get('COCKTAILS_CACHE_TTL', 3600))  # Sekunden, bis wir beim Server nachfragen
+# Mitgelieferte Offline-Kopie (CSV), z.B. in einem Container-Image. Der Datensatz selbst liegt nicht im Repository.
+BUNDLED_CSV = os.environ.get('COCKTAILS_BUNDLED_CSV')
+
+log = logging.getLogger(__name__)
+
+# Prozessweite Kopie: (url, cache_dir) -> {'df', 'checked', 'etag', 'last_modified', 'version', 'source'}
+_memory = {}
+_lock = threading.Lock()
+_key_locks = {}  # Ein Lock pro Quelle, damit mehrere Quellen gleichzeitig geladen werden können
+_refreshing = set()
+
+
+def _paths(url, cache_dir):
+    name = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, name + '.csv'), os.path.join(cache_dir, name + '.json')
+
+
+def _read_frame(csv_path):
+    # Das CSV wird nur einmal pro Version in einen Arrow-Snapshot übersetzt, danach wird nur noch eingeblendet (mmap).
+    with span('parse'):
+        if not cocktail_snapshot.available():
+            return cocktail_snapshot.derive_columns(pd.read_csv(csv_path))
+        snapshot_path = os.path.splitext(csv_path)[0] + cocktail_snapshot.SNAPSHOT_SUFFIX
+        if (not os.path.exists(snapshot_path) or os.path.getmtime(snapshot_path) < os.path.getmtime(csv_path)
+                or not cocktail_snapshot.is_current(snapshot_path)):
+            cocktail_snapshot.compile_snapshot(csv_path, snapshot_path)
+        return cocktail_snapshot.open_snapshot(snapshot_path)
+
+
+def _content_version(data=None, path=None):
+    # Inhalts-Hash des CSV: Alles, was aus dem Datensatz abgeleitet wird (Indizes usw.), wird pro Version einmal gebaut.
+    digest = hashlib.sha1()
+    if path is not None:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    else:
+        digest.update(data)
+    return digest.hexdigest()[:16]
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_atomic(path, data, mode='w'):
+    # Zuerst in eine temporäre Datei schreiben und dann umbenennen, damit parallele Prozesse nie eine halbe Datei lesen.
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, mode, **({} if 'b' in mode else {'encoding': 'utf-8'})) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _read_bundled(bundled_csv, cache_dir):
+    # Die Offline-Kopie wird in den Cache kopiert, damit ihr Snapshot dort und nicht neben der Datei entsteht.
+    bundled_copy = os.path.join(cache_dir, 'bundled.csv')
+    if not os.path.exists(bundled_copy) or os.path.getmtime(bundled_copy) < os.path.getmtime(bundled_csv):
+        with open(bundled_csv, 'rb') as f:
+            _write_atomic(bundled_copy, f.read(), 'wb')
+    return _read_frame(bundled_copy), _content_version(path=bundled_copy)
+
+
+def _replace_copy(data, csv_path):
+    # Ein neuer Download ersetzt die Festplatten-Kopie erst, wenn er sich parsen (und kompilieren) lässt: Eine kaputte
+    # Antwort des Servers zerstört also nie die letzte gute Kopie.
+    tmp_path = f"{os.path.splitext(csv_path)[0]}.{os.getpid()}.{threading.get_ident()}.download.csv"
+    tmp_snapshot = os.path.splitext(tmp_path)[0] + cocktail_snapshot.SNAPSHOT_SUFFIX
+    _write_atomic(tmp_path, data, 'wb')
+    try:
+        df = _read_frame(tmp_path)
+    except Exception:
+        for path in (tmp_path, tmp_snapshot):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    # Zuerst der Snapshot, dann das CSV: Der Snapshot ist nie älter als das CSV und wird nicht neu kompiliert.
+    if os.path.exists(tmp_snapshot):
+        os.replace(tmp_snapshot, os.path.splitext(csv_path)[0] + cocktail_snapshot.SNAPSHOT_SUFFIX)
+    os.replace(tmp_path, csv_path)
+    return df
+
+
+def _fetch(url, entry, csv_path, meta_path, timeout):
+    # Bedingte Anfrage: Der Server antwortet mit 304, wenn sich cocktails.csv nicht verändert hat.
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    with span('fetch'):
+        response = requests.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and os.path.exists(csv_path):
+        df = entry.get('df')
+        if df is None:
+            df = _read_frame(csv_path)
+        version = entry.get('version') or _content_version(path=csv_path)
+        changed = False
+    else:
+        response.raise_for_status()
+        df = _replace_copy(response.content, csv_path)
+        version = _content_version(response.content)
+        entry = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+        changed = True
+    meta = {'url': url, 'checked': time.time(), 'etag': entry.get('etag'), 'last_modified': entry.get('last_modified'),
+            'version': version}
+    _write_atomic(meta_path, json.dumps(meta))
+    return dict(meta, df=df, source='network' if changed else 'revalidated')
+
+
+def _refresh_in_background(url, cache_dir, timeout):
+    # Veraltete Kopie wird sofort zurückgegeben, die Revalidierung läuft im Hintergrund (stale-while-revalidate).
+    key = (url, cache_dir)
+    with _lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            csv_path, meta_path = _paths(url, cache_dir)
+            try:
+                entry = _fetch(url, _memory.get(key, {}), csv_path, meta_path, timeout)
+            except Exception:  # Netz, aber auch ein Download, der sich nicht parsen lässt
+                log.warning("Revalidating %s failed, keeping the current copy", url, exc_info=True)
+                entry = dict(_memory.get(key, {}), checked=time.time())  # Nächster Versuch erst nach Ablauf der TTL
+            with _lock:
+                _memory[key] = entry
+        finally:
+            with _lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, name='cocktail-cache-refresh', daemon=True).start()
+
+
+def _key_lock(key):
+    with _lock:
+        return _key_locks.setdefault(key, threading.Lock())
+
+
+def load_cocktails(url, ttl=None, cache_dir=None, timeout=10, background=True, bundled=True):
+    # Liefert (DataFrame, Version) aus demselben Eintrag, damit eine Revalidierung im Hintergrund nie ein altes
+    # DataFrame mit einer neuen Version zusammenbringt. Ohne Netz und ohne Festplatten-Kopie kommt die Offline-Kopie
+    # (BUNDLED_CSV), ohne eine solche wird der Fehler weitergegeben. bundled=False für zusätzliche Quellen, die nicht
+    # mit unserem Datensatz verwechselt werden dürfen.
+    ttl = CACHE_TTL if ttl is None else ttl
+    cache_dir = cache_dir or CACHE_DIR
+    key = (url, cache_dir)
+    now = time.time()
+
+    # 1. Prozess-Speicher
+    entry = _memory.get(key)
+    if entry is not None:
+        if now - entry['checked'] >= ttl:
+            if background:
+                _refresh_in_background(url, cache_dir, timeout)
+            else:
+                with _lock:
+                    _memory.pop(key, None)
+                return load_cocktails(url, ttl, cache_dir, timeout, background, bundled)
+        return entry['df'], entry['version']
+
+    with _key_lock(key):
+        entry = _memory.get(key)
+        if entry is not None:
+            return entry['df'], entry['version']
+
+        # 2. Festplatte
+        os.makedirs(cache_dir, exist_ok=True)
+        csv_path, meta_path = _paths(url, cache_dir)
+        meta = _read_meta(meta_path) if os.path.exists(csv_path) else {}
+        if meta and now - meta.get('checked', 0) < ttl:
+            entry = dict(meta, df=_read_frame(csv_path), source='disk')
+            entry.setdefault('version', _content_version(path=csv_path))
+        else:
+            # 3. Netzwerk, notfalls veraltete Festplatten-Kopie oder Offline-Kopie
+            try:
+                entry = _fetch(url, meta, csv_path, meta_path, timeout)
+            except Exception:  # auch ein Download, der sich nicht parsen lässt: die alte Kopie bleibt gültig
+                if meta:
+                    entry = dict(meta, df=_read_frame(csv_path), checked=now, source='stale')
+                    entry.setdefault('version', _content_version(path=csv_path))
+                elif bundled and BUNDLED_CSV and os.path.exists(BUNDLED_CSV):
+                    # Ohne ETag: Nach Ablauf der TTL wird wieder beim Server nachgefragt.
+                    df, version = _read_bundled(BUNDLED_CSV, cache_dir)
+                    entry = {'df': df, 'checked': now, 'version': version, 'source': 'bundled'}
+                else:
+                    raise
+        with _lock:
+            _memory[key] = entry
+        return entry['df'], entry['version']
+
+
+def clear_memory_cache():
+    with _lock:
+        _memory.clear()
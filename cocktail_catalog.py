@@ -0,0 +1,373 @@
+# Abfrage-Schicht ohne Streamlit: Der Katalog bündelt den Datensatz und alle daraus abgeleiteten Indizes und liefert
+# Ergebnisse als Arrays von Zeilennummern. Die App (FINAL VERSION.py) ist nur noch die Anzeige darüber; dieselbe
+# Schicht läuft auch in Batch-Jobs, Benchmarks und auf der Kommandozeile:
+#   python cocktail_catalog.py search negroni
+#   python cocktail_catalog.py filter --ingredients 3 --glassware Coupe --cabinet Gin Vodka
+#   python cocktail_catalog.py makeable --cabinet Gin Vodka --max-missing 1
+#   python cocktail_catalog.py stats "Last Word" "Negroni"
+#   python cocktail_catalog.py similar "Last Word" --limit 5
+#   python cocktail_catalog.py recipe "Last Word" --servings 4
+#   python cocktail_catalog.py filter --glassware Coupe --export coupe.parquet
+#   python cocktail_catalog.py --source hausrezepte.csv --source partner.jsonl search negroni
+import argparse
+import logging
+import os
+import re
+import sys
+import threading
+from collections import namedtuple
+from functools import cached_property
+
+import pandas as pd
+
+from cocktail_cache import CACHE_DIR, load_cocktails
+from cocktail_coverage import build_coverage_index
+from cocktail_diff import diff_frames, row_hashes
+from cocktail_export import export_rows, format_for_path
+from cocktail_fulltext import fulltext_for
+from cocktail_index import build_ingredient_index, build_base_matrix
+from cocktail_ingredients import build_ingredient_table, format_ingredient, refresh_ingredient_table
+from cocktail_metrics import span
+from cocktail_planner import FilterStats, cached_rows, execute
+from cocktail_recommend import build_recommender
+from cocktail_search import build_name_search, refresh_name_search
+from cocktail_sources import ingest
+
+# Kann für Tests, Benchmarks oder eine eigene Kopie des Datensatzes überschrieben werden.
+DATA_URL = os.environ.get('COCKTAILS_DATA_URL', 'https://github.com/OzanGenc/CocktailAnalysis/raw/main/cocktails.csv')
+# Mehrere Quellen (durch Leerzeichen getrennt) werden über cocktail_sources.py zu einem Katalog zusammengeführt.
+DATA_SOURCES = os.environ.get('COCKTAILS_SOURCES', '').split() or [DATA_URL]
+
+# Definieren von alcohol_bases global als Liste. Unsere API wurde manuell analysiert, um festzustellen, welche Alkoholbasen erwähnt wurden.
+alcohol_bases = ['Vodka', 'Rum', 'Gin', 'Tequila', 'Whiskey', 'Brandy', 'Vermouth', 'Liqueurs',
+                 'Absinthe', 'Aquavit', 'Sake', 'Sherry', 'Port', 'Cachaca', 'Pisco', 'Mezcal']
+# Welche Zutaten zu einer Basis zählen (Bourbon, Rye und Scotch als Whiskey), steht in cocktail_bases.py.
+
+# Indizes, die catalog_for im Hintergrund vorbaut: die billigen zuerst, Volltext (~5 s bei 100k Rezepten) und
+# Empfehlungen (~10 s) zuletzt.
+WARM_INDEXES = ['ingredient_table', 'ingredient_index', 'name_search', 'coverage_index', 'base_matrix', 'filter_stats',
+                'fulltext', 'recommender']
+
+log = logging.getLogger(__name__)
+
+# Filter-Abfrage wie im Filter-Tab: None bzw. ein leerer Schrank schränken nicht ein.
+Query = namedtuple('Query', ['num_ingredients', 'glassware', 'cabinet'], defaults=(None, None, ()))
+
+
+class CocktailCatalog:
+    # Die Indizes werden erst beim ersten Gebrauch gebaut und danach wiederverwendet. Der Katalog ist nach dem Bau
+    # nur lesend und kann von allen Sitzungen bzw. Threads geteilt werden.
+    def __init__(self, df, version=None, bases=None, cache_dir=None):
+        self.df = df
+        self.version = version
+        self.bases = list(alcohol_bases if bases is None else bases)
+        self.cache_dir = cache_dir or CACHE_DIR  # hier liegt der gespeicherte Volltext-Index
+
+    def __len__(self):
+        return len(self.df)
+
+    @cached_property
+    def row_hashes(self):
+        return row_hashes(self.df)
+
+    @cached_property
+    def ingredient_table(self):
+        # Alle Zutaten zerlegt in Menge, Einheit und Zutatennummer; Zutaten-Index und Abdeckung bauen darauf auf.
+        return build_ingredient_table(self.df)
+
+    @cached_property
+    def ingredient_index(self):
+        return build_ingredient_index(self.ingredient_table, self.bases)
+
+    @cached_property
+    def name_search(self):
+        return build_name_search(self.df)
+
+    @cached_property
+    def base_matrix(self):
+        return build_base_matrix(self.df, self.ingredient_index, self.bases)
+
+    @cached_property
+    def coverage_index(self):
+        return build_coverage_index(self.ingredient_table, self.bases)
+
+    @cached_property
+    def recommender(self):
+        # Nachbarn hängen von allen Zeilen ab (TF-IDF), bei einer neuen Version wird neu gerechnet.
+        with span('recommender'):
+            return build_recommender(self.df, self.coverage_index, self.ingredient_index, self.bases)
+
+    @cached_property
+    def fulltext(self):
+        # Volltext-Index über Zutaten, Zubereitung, Garnitur, Bartender und Ort; pro Datensatz-Version einmal gebaut
+        # und im Cache-Verzeichnis gespeichert, ein neuer Prozess lädt ihn nur noch (cocktail_fulltext.py).
+        with span('fulltext_index'):
+            return fulltext_for(self.df, self.version, self.cache_dir)
+
+    @cached_property
+    def filter_stats(self):
+        return FilterStats(self.df, self.ingredient_index)
+
+    @cached_property
+    def glassware_options(self):
+        if 'Glassware' not in self.df:
+            return []
+        glassware = self.df['Glassware']
+        if isinstance(glassware.dtype, pd.CategoricalDtype):
+            # Die Kategorien sind genau die vorkommenden Werte (Wörterbuch aus dem Snapshot).
+            return sorted(glassware.cat.categories.tolist())
+        return sorted(glassware.dropna().unique().tolist())
+
+    def ready(self, name):
+        # Ist der Index schon gebaut? Die App blendet Teile, die auf einen langsamen Index warten, bis dahin aus.
+        return name in vars(self)
+
+    def warm(self, names=WARM_INDEXES):
+        # Baut die Indizes der Reihe nach vor (läuft in catalog_for in einem Hintergrund-Thread).
+        for name in names:
+            try:
+                getattr(self, name)
+            except Exception:  # Der Fehler kommt beim nächsten Zugriff in der Sitzung noch einmal und wird dort angezeigt.
+                log.warning("Building the %s index failed", name, exc_info=True)
+
+    def rows(self, row_ids):
+        return self.df.iloc[row_ids]
+
+    def export(self, row_ids, fmt, out):
+        # Treffer blockweise als CSV, JSON Lines oder Parquet in die Datei out (cocktail_export.py).
+        with span('export'):
+            return export_rows(self.df, row_ids, fmt, out)
+
+    def search(self, text, limit=20):
+        with span('search'):
+            return self.name_search.search(text, limit=limit)
+
+    def search_text(self, text, limit=20):
+        # Rangfolge nach BM25, z.B. 'garnish:mint stirred' oder '"lime juice" location:london'.
+        with span('search_text'):
+            return self.fulltext.search(text, limit=limit)
+
+    def filter_mask(self, query):
+        # Maske über alle Zeilen, es wird nichts kopiert (das Glas wird über die Codes der Kategorie verglichen).
+        predicates = self.filter_stats.predicates(query)
+        mask = predicates[0].mask()
+        for predicate in predicates[1:]:
+            mask &= predicate.mask()
+        return mask
+
+    def filter(self, query):
+        # Selektivste Bedingung zuerst (cocktail_planner.py); das Ergebnis wird prozessweit gecacht und ist nur lesbar.
+        with span('filter'):
+            if self.version is None:
+                return execute(len(self), self.filter_stats.predicates(query))
+            key = (query.num_ingredients, query.glassware, frozenset(query.cabinet), self.version)
+            return cached_rows(key, lambda: execute(len(self), self.filter_stats.predicates(query)))
+
+    def makeable(self, cabinet, max_missing=0):
+        with span('makeable'):
+            return self.coverage_index.makeable(list(cabinet), max_missing)
+
+    def missing_ingredients(self, row, cabinet):
+        return self.coverage_index.missing_ingredients(row, list(cabinet))
+
+    def base_counts(self, names):
+        return self.base_matrix.count_bases(names)
+
+    def recipe(self, row, servings=1):
+        # Zutaten einer Zeile als (Menge, Menge bis, Einheit, Zutat), umgerechnet auf die Anzahl Portionen.
+        return self.ingredient_table.recipe(row, servings)
+
+    def similar(self, row, limit=5):
+        # Ähnlichste Cocktails zu einer Zeile: (Zeilennummern, Ähnlichkeiten).
+        return self.recommender.similar(row, limit)
+
+    def recommend(self, names, limit=10):
+        # Empfehlungen zu einer Liste von Favoriten (Namen), ohne die Favoriten selbst.
+        return self.recommender.for_favorites(self.base_matrix.rows_for(names), limit)
+
+    def refresh(self, df, version=None):
+        # Neuer Katalog für eine neue Version des Datensatzes. Die Zeilen werden per Hash mit dieser Version verglichen
+        # (cocktail_diff.py); Indizes, die hier schon gebaut sind, werden nur um die eingefügten, geänderten und
+        # gelöschten Zeilen nachgeführt statt neu gebaut; Volltext und Empfehlungen hängen von allen Zeilen ab und
+        # werden neu gebaut (in catalog_for im Hintergrund). Dieser Katalog bleibt unverändert, Sitzungen, die ihn
+        # noch benutzen, sehen bis zum nächsten Rerun einen einheitlichen Stand.
+        with span('refresh'):
+            catalog = CocktailCatalog(df, version, self.bases, self.cache_dir)
+            built = vars(self)
+            fresh = vars(catalog)
+            fresh['row_hashes'] = row_hashes(df)
+            diff = diff_frames(self.df, df, self.row_hashes, fresh['row_hashes'])
+            if 'ingredient_table' in built:
+                # Geparst werden nur die eingefügten Zeilen; Zutaten-Index und Abdeckung vergleichen danach nur noch
+                # Zutatennummern und werden aus der nachgeführten Tabelle neu gebaut.
+                fresh['ingredient_table'] = refresh_ingredient_table(self.ingredient_table, diff, df)
+            if 'ingredient_index' in built:
+                fresh['ingredient_index'] = build_ingredient_index(catalog.ingredient_table, self.bases)
+            if 'name_search' in built:
+                fresh['name_search'] = refresh_name_search(self.name_search, diff, df)
+            if 'coverage_index' in built:
+                fresh['coverage_index'] = build_coverage_index(catalog.ingredient_table, self.bases)
+            if 'base_matrix' in built:
+                # Aus dem nachgeführten Zutaten-Index, es werden nur noch Bits gepackt.
+                fresh['base_matrix'] = build_base_matrix(df, catalog.ingredient_index, self.bases)
+            return catalog
+
+
+# Zuletzt ausgelieferter Katalog. Seine Indizes werden im Hintergrund vorgebaut (_warming); kommt eine neue Version
+# des Datensatzes, wird der neue Katalog im Hintergrund nachgeführt und vorgebaut und ersetzt den alten erst danach.
+# Bis dahin arbeiten alle Sitzungen mit dem alten Katalog weiter, keine wartet auf Volltext oder Empfehlungen.
+_latest = None
+_pending = None  # Version, die gerade im Hintergrund gebaut wird
+_warming = None
+_latest_lock = threading.Lock()
+
+
+def _refresh_in_background(previous, warming, df, version):
+    global _latest, _pending
+    try:
+        warming.join()  # Erst wenn alles gebaut ist, kann refresh() alle Indizes übernehmen.
+        catalog = previous.refresh(df, version)
+        catalog.warm()
+        with _latest_lock:
+            _latest = catalog
+    except Exception:  # Der nächste Aufruf von catalog_for versucht es noch einmal.
+        log.warning("Refreshing the catalog to version %s failed", version, exc_info=True)
+    finally:
+        with _latest_lock:
+            _pending = None
+
+
+def catalog_for(df, version, bases=None):
+    global _latest, _pending, _warming
+    bases = list(alcohol_bases if bases is None else bases)
+    with _latest_lock:
+        if version is None:
+            return CocktailCatalog(df, version, bases)
+        if _latest is not None and _latest.version == version:
+            return _latest
+        if _latest is not None and _latest.bases == bases and list(_latest.df.columns) == list(df.columns):
+            if _pending is None:
+                _pending = version
+                _warming = threading.Thread(target=_refresh_in_background, args=(_latest, _warming, df, version),
+                                            name='cocktail-catalog-refresh', daemon=True)
+                _warming.start()
+            return _latest
+        _latest = CocktailCatalog(df, version, bases)
+        _warming = threading.Thread(target=_latest.warm, name='cocktail-catalog-warm', daemon=True)
+        _warming.start()
+        return _latest
+
+
+def load_dataset(sources=None, **cache_options):
+    # Liefert (DataFrame, Version). Eine einzelne URL wird direkt geladen, mehrere Quellen werden zusammengeführt.
+    sources = list(sources or DATA_SOURCES)
+    if len(sources) == 1 and re.match(r'https?://', sources[0]):
+        return load_cocktails(sources[0], **cache_options)
+    result = ingest(sources, cache_dir=cache_options.get('cache_dir'))
+    return result.df, result.version
+
+
+def load_catalog(sources=None, **cache_options):
+    df, version = load_dataset(sources, **cache_options)
+    return CocktailCatalog(df, version, cache_dir=cache_options.get('cache_dir'))
+
+
+def _print_rows(catalog, row_ids, extra=None):
+    names = catalog.df['Cocktail Name']
+    for i, row in enumerate(row_ids):
+        print(names.iloc[row] + (extra[i] if extra is not None else ''))
+
+
+def _export(catalog, row_ids, path, fmt):
+    # '-' schreibt auf die Standardausgabe, z.B. zum Weiterleiten in eine Pipeline.
+    fmt = fmt or format_for_path(path)
+    if path == '-':
+        count = catalog.export(row_ids, fmt, sys.stdout.buffer)
+    else:
+        with open(path, 'wb') as f:
+            count = catalog.export(row_ids, fmt, f)
+    print(f"Exported {count} cocktails to {'stdout' if path == '-' else path}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the cocktail catalog without the Streamlit app.")
+    parser.add_argument('--url', help="CSV to load (goes through the dataset cache)")
+    parser.add_argument('--source', action='append', dest='sources',
+                        help="URL or local file to merge into the catalog, can be repeated")
+    parser.add_argument('--csv', help="local CSV file to load instead of --url")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    search = commands.add_parser('search', help="search cocktails by name")
+    search.add_argument('text')
+    search.add_argument('--limit', type=int, default=20)
+
+    text = commands.add_parser('text', help="full-text search in ingredients, preparation, garnish, bartender, location")
+    text.add_argument('query', help="words, field:word and \"phrases\", e.g. 'garnish:mint \"lime juice\"'")
+    text.add_argument('--limit', type=int, default=20)
+
+    filter_ = commands.add_parser('filter', help="filter like the Cocktail Filter tab")
+    filter_.add_argument('--ingredients', type=int, help="exact number of ingredients")
+    filter_.add_argument('--glassware')
+    filter_.add_argument('--cabinet', nargs='*', default=[], help="alcohol bases in the cabinet")
+
+    makeable = commands.add_parser('makeable', help="cocktails makeable with the cabinet, fewest missing first")
+    makeable.add_argument('--cabinet', nargs='*', default=[])
+    makeable.add_argument('--max-missing', type=int, default=0)
+
+    stats = commands.add_parser('stats', help="alcohol base counts for a list of favorites")
+    stats.add_argument('favorites', nargs='+')
+
+    similar = commands.add_parser('similar', help="cocktails similar to one or more favorites")
+    similar.add_argument('favorites', nargs='+')
+    similar.add_argument('--limit', type=int, default=10)
+
+    for command in (search, text, filter_, makeable):
+        command.add_argument('--export', metavar='PATH', help="write the matching rows to a file ('-' for stdout)")
+        command.add_argument('--format', choices=['csv', 'jsonl', 'parquet'],
+                             help="export format (default: from the file extension, else csv)")
+
+    recipe = commands.add_parser('recipe', help="ingredients of a cocktail, scaled to a number of servings")
+    recipe.add_argument('name')
+    recipe.add_argument('--servings', type=float, default=1)
+
+    args = parser.parse_args(argv)
+    if args.csv:
+        from cocktail_snapshot import derive_columns
+        catalog = CocktailCatalog(derive_columns(pd.read_csv(args.csv)))
+    else:
+        catalog = load_catalog(args.sources or ([args.url] if args.url else None))
+
+    if args.command in ('search', 'text', 'filter', 'makeable'):
+        extra = None
+        if args.command == 'search':
+            rows = catalog.search(args.text, limit=args.limit)
+        elif args.command == 'text':
+            rows = catalog.search_text(args.query, limit=args.limit)
+        elif args.command == 'filter':
+            rows = catalog.filter(Query(args.ingredients, args.glassware, tuple(args.cabinet)))
+        else:
+            rows, missing = catalog.makeable(args.cabinet, args.max_missing)
+            extra = [f"\t{count} missing" for count in missing]
+        if args.export:
+            _export(catalog, rows, args.export, args.format)
+        else:
+            _print_rows(catalog, rows, extra)
+    elif args.command == 'stats':
+        for base, count in catalog.base_counts(args.favorites).items():
+            if count:
+                print(f"{base}\t{count}")
+    elif args.command == 'similar':
+        rows, scores = catalog.recommend(args.favorites, limit=args.limit)
+        _print_rows(catalog, rows, [f"\t{score:.3f}" for score in scores])
+    elif args.command == 'recipe':
+        rows = catalog.base_matrix.rows_for([args.name])
+        if not len(rows):
+            print(f"No cocktail named {args.name!r}", file=sys.stderr)
+            return 1
+        for quantity, quantity_max, unit, ingredient in catalog.recipe(rows[0], args.servings):
+            print(format_ingredient(quantity, quantity_max, unit, ingredient))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
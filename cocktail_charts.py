@@ -0,0 +1,85 @@
+# Kreisdiagramme für den Favoriten-Tab als fertige PNG-Bytes.
+#
+# Die Bilder werden in einem LRU-Cache mit Grössenlimit (Bytes) gehalten, Schlüssel ist ein Hash der dargestellten
+# Werte: Gleiche Favoriten ergeben dieselben Werte, ein erneutes Öffnen des Tabs zeichnet also nichts mehr.
+# Gezeichnet wird mit matplotlib.figure.Figure statt pyplot: Die Figur landet nie in der globalen pyplot-Liste,
+# wird nach dem Speichern geleert und vom Garbage Collector freigegeben, der Speicher bleibt auch nach langer
+# Laufzeit konstant. Treffer und Fehlschläge des Caches zählt cocktail_metrics.py (cocktail_chart_cache_total).
+#
+#   COCKTAILS_CHART_CACHE_BYTES   Grösse des Caches (Standard 16 MB)
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from matplotlib.figure import Figure
+
+from cocktail_metrics import count, span
+
+CHART_CACHE_BYTES = int(os.environ.get('COCKTAILS_CHART_CACHE_BYTES', 16 << 20))
+DPI = 200  # wie st.pyplot
+
+
+class ChartCache:
+    def __init__(self, max_bytes=CHART_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+        count('cocktail_chart_cache_total', result='miss' if data is None else 'hit')
+        return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+_cache = ChartCache()
+
+
+def _render_pie(values, labels, explode, colors, startangle):
+    figure = Figure()
+    axes = figure.subplots()
+    axes.pie(values, explode=explode, labels=labels, colors=colors, autopct='%1.1f%%', startangle=startangle)
+    axes.axis('equal')
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png', dpi=DPI, bbox_inches='tight')
+    figure.clear()
+    return buffer.getvalue()
+
+
+def pie_chart(values, labels, explode=None, colors=None, startangle=90):
+    # Liefert das Diagramm als PNG-Bytes, aus dem Cache oder frisch gezeichnet.
+    values = [float(value) for value in values]
+    key = hashlib.sha1(repr(('pie', values, list(labels), explode and list(explode), colors and list(colors),
+                             startangle)).encode('utf-8')).hexdigest()
+    png = _cache.get(key)
+    if png is None:
+        with span('matplotlib'):
+            png = _render_pie(values, labels, explode, colors, startangle)
+        _cache.put(key, png)
+    return png
@@ -0,0 +1,82 @@
+# "Was kann ich jetzt mixen?": Für jedes Rezept wird gezählt, wie viele Zutaten im Schrank fehlen.
+#
+# Jede kanonische Zutat hat eine Nummer (Vokabular der Zutaten-Tabelle, cocktail_ingredients.py). Die Rezepte werden
+# als Mengen von Zutatennummern gespeichert (CSR: indptr/indices), der Schrank als Maske über das Vokabular
+# (welche Zutaten sind abgedeckt). Die fehlenden Zutaten aller Rezepte ergeben sich dann in einem Durchgang:
+# Maske nachschlagen, negieren und pro Rezept aufsummieren.
+import numpy as np
+
+from cocktail_ingredients import canonical_ingredient, word_pattern
+
+# Zutaten, die wir in jeder Küche voraussetzen und nie als "fehlend" zählen.
+PANTRY_STAPLES = ['water', 'ice', 'crushed ice', 'soda water', 'club soda', 'sugar', 'simple syrup', 'salt']
+
+
+class CoverageIndex:
+    def __init__(self, vocabulary, indptr, indices, bases=(), base_tags=None):
+        self.vocabulary = vocabulary                        # Zutatennummer -> normalisierter Name
+        self.bases = list(bases)
+        self.base_tags = base_tags                          # Zutatennummer x Basis, siehe cocktail_bases.py
+        self.ids = {name: i for i, name in enumerate(vocabulary)}
+        self.indptr = indptr                                # Rezept r hat die Zutaten indices[indptr[r]:indptr[r + 1]]
+        self.indices = indices
+        self.n = len(indptr) - 1
+        self.sizes = np.diff(indptr).astype(np.int32)
+        self.entry_rows = np.repeat(np.arange(self.n, dtype=np.int32), self.sizes)  # Rezept zu jedem Eintrag
+        self._cabinet_cache = {}
+
+    def covered_mask(self, cabinet, staples=PANTRY_STAPLES):
+        # Maske über das Vokabular: Welche Zutaten deckt der Schrank (plus Grundausstattung) ab?
+        key = (frozenset(cabinet), frozenset(staples))
+        mask = self._cabinet_cache.get(key)
+        if mask is None:
+            mask = np.zeros(len(self.vocabulary), dtype=bool)
+            for item in staples:
+                i = self.ids.get(canonical_ingredient(item))
+                if i is not None:
+                    mask[i] = True
+            # Alkoholbasen über ihre Tags: 'Whiskey' deckt auch 'bourbon' ab, 'Gin' nicht 'ginger beer'.
+            known = [self.bases.index(item) for item in cabinet if item in self.bases]
+            if known:
+                mask |= self.base_tags[:, known].any(axis=1)
+            # Alles andere nur als ganze Wörter.
+            pattern = word_pattern([item for item in cabinet if item not in self.bases])
+            if pattern is not None:
+                for i, name in enumerate(self.vocabulary):
+                    if not mask[i] and pattern.search(name):
+                        mask[i] = True
+            if len(self._cabinet_cache) > 256:
+                self._cabinet_cache.clear()
+            self._cabinet_cache[key] = mask
+        return mask
+
+    def missing_counts(self, cabinet, staples=PANTRY_STAPLES):
+        uncovered = ~self.covered_mask(cabinet, staples)[self.indices]
+        return np.bincount(self.entry_rows, weights=uncovered, minlength=self.n).astype(np.int32)
+
+    def makeable(self, cabinet, max_missing=0, staples=PANTRY_STAPLES, candidates=None):
+        # Zeilennummern der Rezepte mit höchstens max_missing fehlenden Zutaten,
+        # sortiert nach Anzahl fehlender Zutaten, dann nach Anzahl Zutaten.
+        missing = self.missing_counts(cabinet, staples)
+        ok = (missing <= max_missing) & (self.sizes > 0)
+        if candidates is not None:
+            ok &= candidates
+        rows = np.flatnonzero(ok)
+        order = np.lexsort((rows, self.sizes[rows], missing[rows]))
+        return rows[order], missing[rows[order]]
+
+    def missing_ingredients(self, row, cabinet, staples=PANTRY_STAPLES):
+        covered = self.covered_mask(cabinet, staples)
+        ids = self.indices[self.indptr[row]:self.indptr[row + 1]]
+        return [self.vocabulary[i] for i in ids if not covered[i]]
+
+
+def build_coverage_index(table, bases=()):
+    # Aus der Zutaten-Tabelle: pro Rezept die sortierten Zutatennummern, doppelte Einträge fallen weg.
+    vocabulary_size = max(len(table.vocabulary), 1)
+    keys = np.sort(table.entry_rows.astype(np.int64) * vocabulary_size + table.ingredient_ids)
+    keys = keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) else keys
+    indptr = np.zeros(table.n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // vocabulary_size, minlength=table.n), out=indptr[1:])
+    return CoverageIndex(table.vocabulary, indptr, (keys % vocabulary_size).astype(np.int32), bases,
+                         table.base_tags(bases))
@@ -0,0 +1,55 @@
+# Vergleich zweier Versionen des Datensatzes Zeile für Zeile über einen Hash der Originalspalten.
+# Zeilen mit gleichem Hash gelten als unverändert (auch wenn sie an eine andere Position gerutscht sind), alle anderen
+# als eingefügt bzw. gelöscht; eine geänderte Zeile ist beides. Die Indizes des Katalogs übernehmen damit die
+# Daten der unveränderten Zeilen und müssen nur die eingefügten Zeilen neu berechnen (siehe CocktailCatalog.refresh).
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from cocktail_snapshot import DERIVED_COLUMNS
+
+# old_for_new[i]: alte Zeile der neuen Zeile i oder -1; new_for_old[j]: neue Zeile der alten Zeile j oder -1.
+# inserted: neue Zeilen ohne Gegenstück (gelöschte Zeilen sind die alten mit new_for_old == -1).
+DatasetDiff = namedtuple('DatasetDiff', ['old_for_new', 'new_for_old', 'inserted'])
+
+
+def row_hashes(df):
+    columns = [column for column in df.columns if column not in DERIVED_COLUMNS]
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+def _occurrence(hashes):
+    # Laufende Nummer jedes Hashes (0 beim ersten Auftreten, 1 beim zweiten, ...), damit doppelte Zeilen
+    # der Reihe nach einander zugeordnet werden.
+    order = np.argsort(hashes, kind='stable')
+    sorted_hashes = hashes[order]
+    starts = np.r_[True, sorted_hashes[1:] != sorted_hashes[:-1]] if len(hashes) else np.zeros(0, dtype=bool)
+    group_start = np.maximum.accumulate(np.where(starts, np.arange(len(hashes)), 0)) if len(hashes) else starts
+    occurrence = np.empty(len(hashes), dtype=np.int64)
+    occurrence[order] = np.arange(len(hashes)) - group_start
+    return occurrence
+
+
+def diff_rows(old_hashes, new_hashes):
+    old = pd.DataFrame({'hash': old_hashes, 'occurrence': _occurrence(old_hashes), 'old': np.arange(len(old_hashes))})
+    new = pd.DataFrame({'hash': new_hashes, 'occurrence': _occurrence(new_hashes), 'new': np.arange(len(new_hashes))})
+    matched = old.merge(new, on=['hash', 'occurrence'])
+    old_for_new = np.full(len(new_hashes), -1, dtype=np.int64)
+    old_for_new[matched['new'].to_numpy()] = matched['old'].to_numpy()
+    new_for_old = np.full(len(old_hashes), -1, dtype=np.int64)
+    new_for_old[matched['old'].to_numpy()] = matched['new'].to_numpy()
+    return DatasetDiff(old_for_new, new_for_old, np.flatnonzero(old_for_new < 0))
+
+
+def diff_frames(old_df, new_df, old_hashes=None, new_hashes=None):
+    old_hashes = row_hashes(old_df) if old_hashes is None else old_hashes
+    new_hashes = row_hashes(new_df) if new_hashes is None else new_hashes
+    return diff_rows(old_hashes, new_hashes)
+
+
+def segment_positions(starts, lengths):
+    # Aneinandergehängte Bereiche starts[k] .. starts[k] + lengths[k] - 1 als ein Array (für CSR-Umkopieren).
+    lengths = np.asarray(lengths, dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(np.asarray(starts, dtype=np.int64) - offsets, lengths) + np.arange(int(lengths.sum()))
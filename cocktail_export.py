@@ -0,0 +1,93 @@
+# Export von Such- und Filterergebnissen als CSV, JSON Lines oder Parquet.
+#
+# Die Treffer sind Zeilennummern in den geteilten Katalog. Geschrieben wird in Blöcken von CHUNK_ROWS Zeilen: pro
+# Block werden nur diese Zeilen gelesen, geschrieben und wieder verworfen. Auch bei zehntausenden Rezepten entsteht
+# also keine Kopie des DataFrames, der Speicherbedarf hängt nur von der Blockgröße ab. Abgeleitete Spalten
+# (DERIVED_COLUMNS) werden nicht exportiert, die Datei hat dieselben Spalten wie der Datensatz.
+#
+#   COCKTAILS_EXPORT_CHUNK_ROWS   Zeilen pro Block (Standard 5000)
+#
+#   python cocktail_catalog.py filter --glassware Coupe --export coupe.csv
+#   python cocktail_catalog.py --csv cocktails.csv text "garnish:mint" --limit 1000 --export mint.parquet
+import os
+
+from cocktail_snapshot import DERIVED_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Ohne pyarrow gibt es nur CSV und JSON Lines.
+    pa = None
+
+CHUNK_ROWS = int(os.environ.get('COCKTAILS_EXPORT_CHUNK_ROWS', 5000))
+# Format -> (Dateiendung, MIME-Typ)
+EXPORT_FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'jsonl': ('.jsonl', 'application/x-ndjson'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def format_for_path(path):
+    # Format aus der Dateiendung, z.B. 'menu.parquet' -> 'parquet'. Ohne bekannte Endung CSV.
+    suffix = os.path.splitext(path)[1].lower()
+    for name, (extension, _) in EXPORT_FORMATS.items():
+        if suffix == extension:
+            return name
+    return 'csv'
+
+
+def _export_columns(df):
+    return [i for i, name in enumerate(df.columns) if name not in DERIVED_COLUMNS]
+
+
+def iter_chunks(df, row_ids, chunk_rows=CHUNK_ROWS):
+    # Die Zeilen der Treffer blockweise, in der Reihenfolge der Treffer (z.B. Rangfolge der Suche).
+    columns = _export_columns(df)
+    for start in range(0, len(row_ids), chunk_rows):
+        yield df.iloc[row_ids[start:start + chunk_rows], columns]
+
+
+def _write_csv(chunks, out):
+    for i, chunk in enumerate(chunks):
+        out.write(chunk.to_csv(index=False, header=i == 0).encode('utf-8'))
+
+
+def _write_jsonl(chunks, out):
+    for chunk in chunks:
+        text = chunk.to_json(orient='records', lines=True, force_ascii=False)
+        out.write(text.encode('utf-8'))
+        if text and not text.endswith('\n'):
+            out.write(b'\n')
+
+
+def _write_parquet(chunks, out):
+    # Jeder Block wird eine eigene Row Group. Das Schema kommt vom ersten Block, Kategorien bleiben Wörterbücher.
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema)
+            writer.write_table(table.cast(writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+WRITERS = {'csv': _write_csv, 'jsonl': _write_jsonl, 'parquet': _write_parquet}
+
+
+def export_rows(df, row_ids, fmt, out, chunk_rows=CHUNK_ROWS):
+    # Schreibt die Zeilen row_ids von df in die (binär geöffnete) Datei out. Gibt die Anzahl Zeilen zurück.
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}, expected one of {', '.join(WRITERS)}")
+    if fmt == 'parquet' and pa is None:
+        raise RuntimeError("Parquet export needs pyarrow")
+    if not len(row_ids):
+        # Auch ohne Treffer eine gültige Datei mit den Spalten des Datensatzes (CSV-Kopfzeile, Parquet-Schema).
+        chunks = [df.iloc[:0, _export_columns(df)]]
+    else:
+        chunks = iter_chunks(df, row_ids, chunk_rows)
+    WRITERS[fmt](chunks, out)
+    return len(row_ids)
@@ -0,0 +1,282 @@
+# Volltextsuche über Zutaten, Zubereitung, Garnitur, Bartender und Ort ("mint garnish", "stirred london").
+#
+# Invertierter Index pro Feld: Wort -> Rezepte (Zeilennummern) mit Häufigkeit und Positionen, spaltenorientiert in
+# numpy-Arrays (CSR wie in cocktail_coverage.py). Wörter werden klein geschrieben, ohne Akzente, mit einer leichten
+# Stammform ('stirred' = 'stir', 'limes' = 'lime'); Zahlen und Füllwörter fallen weg. Jeder verschiedene Text einer
+# Spalte wird nur einmal zerlegt (Garnitur, Bartender und Ort wiederholen sich ständig).
+#
+# Rangfolge mit BM25 pro Feld, gewichtet mit FIELD_BOOSTS (ein Treffer im kurzen Feld Bartender sagt mehr als einer
+# in der Zubereitung). Alle Teile der Anfrage müssen vorkommen:
+#   mint stirred                 beide Wörter, in irgendeinem Feld
+#   garnish:mint bartender:ann   nur im genannten Feld
+#   "lime juice" location:london Wörter in "..." direkt hintereinander (Phrase)
+# Zwischen zwei Zutaten wird eine Position übersprungen, eine Phrase reicht also nie über die Grenze ("juice simple"
+# passt nicht auf "Lime Juice, Simple Syrup"); jedes Feld hat ohnehin eigene Positionen.
+#
+# Der Index wird einmal pro Datensatz-Version gebaut und neben den Snapshots im Cache-Verzeichnis gespeichert
+# (fulltext-<Version>.npz); ein neuer Prozess lädt ihn von dort, statt ihn neu zu bauen.
+#   python cocktail_catalog.py text 'garnish:mint "old tom"'
+import json
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cocktail_bases import normalize
+from cocktail_diff import segment_positions
+from cocktail_ingredients import split_ingredients
+
+FIELDS = ['Ingredients', 'Preparation', 'Garnish', 'Bartender', 'Location']
+FIELD_BOOSTS = {'Ingredients': 1.5, 'Preparation': 1.0, 'Garnish': 2.0, 'Bartender': 3.0, 'Location': 3.0}
+# Feldnamen in Anfragen ('garnish:mint'), klein geschrieben.
+FIELD_NAMES = {'ingredients': 'Ingredients', 'ingredient': 'Ingredients', 'preparation': 'Preparation',
+               'prep': 'Preparation', 'garnish': 'Garnish', 'bartender': 'Bartender', 'location': 'Location'}
+STOP_WORDS = {'a', 'an', 'and', 'at', 'by', 'for', 'from', 'in', 'into', 'of', 'on', 'or', 'over', 'the', 'to',
+              'with', 'drink', 'drinks', 'cocktail', 'cocktails', 'anything'}
+K1 = 1.2
+B = 0.75
+# Wird bei jeder Änderung am Aufbau der Datei erhöht, ältere Indizes werden dann neu gebaut.
+FULLTEXT_FORMAT = '2'
+FULLTEXT_KEEP = 4  # so viele Indizes (Versionen) bleiben im Cache-Verzeichnis liegen
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CLAUSE_RE = re.compile(r'(?:(\w+):)?(?:"([^"]*)"?|(\S+))')
+_SUFFIXES = ('ing', 'ed', 'es', 's', 'e')
+
+
+def stem(word):
+    # Leichte Stammform, gleich für Index und Anfrage: stirred/stirring -> stir, limes/lime -> lim, bitters -> bitter.
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]
+            break
+    return word
+
+
+def tokenize(text):
+    if not isinstance(text, str):
+        return []
+    return [stem(word) for word in _WORD_RE.findall(normalize(text)) if word not in STOP_WORDS and not word.isdigit()]
+
+
+def tokenize_field(text, field):
+    # Wörter mit ihren Positionen im Feld, nach jeder Zutat eine Lücke.
+    parts = split_ingredients(text) if field == 'Ingredients' else [text]
+    words, positions = [], []
+    for part in parts:
+        start = positions[-1] + 2 if positions else 0
+        part_words = tokenize(part)
+        words += part_words
+        positions += range(start, start + len(part_words))
+    return words, positions
+
+
+def parse_query(text):
+    # -> [(Feld oder None, [Wörter]), ...]; ein Teil mit mehreren Wörtern ist eine Phrase.
+    clauses = []
+    for field, phrase, word in _CLAUSE_RE.findall(text or ''):
+        target = FIELD_NAMES.get(field.lower()) if field else None
+        if field and target is None:
+            word = f"{field} {phrase or word}"  # kein bekanntes Feld: alles als einzelne Wörter
+            phrase = ''
+        words = tokenize(phrase or word)
+        if phrase:
+            clauses.append((target, words))
+        else:
+            clauses += [(target, [single]) for single in words]
+    return [(field, words) for field, words in clauses if words]
+
+
+class FieldPostings:
+    # Wort t steht in den Rezepten rows[term_ptr[t]:term_ptr[t + 1]] (aufsteigend) mit Häufigkeit tf; seine Positionen
+    # liegen der Reihe nach in positions[term_pos_ptr[t]:term_pos_ptr[t + 1]]. lengths: Wörter pro Rezept.
+    def __init__(self, term_ptr, rows, tf, term_pos_ptr, positions, lengths):
+        self.term_ptr = term_ptr
+        self.rows = rows
+        self.tf = tf
+        self.term_pos_ptr = term_pos_ptr
+        self.positions = positions
+        self.lengths = lengths
+        self.average_length = max(float(lengths.mean()) if len(lengths) else 0.0, 1.0)
+
+    def arrays(self):
+        return {'term_ptr': self.term_ptr, 'rows': self.rows, 'tf': self.tf, 'term_pos_ptr': self.term_pos_ptr,
+                'positions': self.positions, 'lengths': self.lengths}
+
+    def document_frequency(self, term):
+        return int(self.term_ptr[term + 1] - self.term_ptr[term])
+
+    def term_rows(self, term):
+        start, end = self.term_ptr[term], self.term_ptr[term + 1]
+        return self.rows[start:end], self.tf[start:end]
+
+    def phrase_rows(self, terms):
+        # Rezepte, in denen die Wörter direkt hintereinander stehen, und wie oft.
+        width = int(self.positions.max()) + 1 if len(self.positions) else 1
+
+        def keys(term, offset):
+            rows, tf = self.term_rows(term)
+            positions = self.positions[self.term_pos_ptr[term]:self.term_pos_ptr[term + 1]]
+            keep = positions >= offset  # sonst fiele der Schlüssel in das vorherige Rezept
+            return (np.repeat(rows.astype(np.int64), tf) * width + positions - offset)[keep]
+
+        found = keys(terms[0], 0)
+        for offset, term in enumerate(terms[1:], 1):
+            if not len(found):
+                break
+            found = found[np.isin(found, keys(term, offset))]
+        return np.unique(found // width, return_counts=True)
+
+
+class FullTextIndex:
+    def __init__(self, n, vocabulary, fields):
+        self.n = n
+        self.vocabulary = vocabulary              # Wortnummer -> Wort (Stammform)
+        self.ids = {word: i for i, word in enumerate(vocabulary)}
+        self.fields = fields                      # Feld -> FieldPostings
+
+    def _clause_scores(self, field_name, words, scores):
+        terms = [self.ids.get(word) for word in words]
+        if any(term is None for term in terms):
+            return
+        field = self.fields[field_name]
+        if len(terms) == 1:
+            rows, tf = field.term_rows(terms[0])
+        else:
+            rows, tf = field.phrase_rows(terms)
+        if not len(rows):
+            return
+        # BM25; eine Phrase zählt mit der Summe der IDF ihrer Wörter.
+        idf = sum(np.log(1 + (self.n - df + 0.5) / (df + 0.5)) for df in map(field.document_frequency, terms))
+        tf = tf.astype(np.float32)
+        norm = K1 * (1 - B + B * field.lengths[rows] / field.average_length)
+        scores[rows] += FIELD_BOOSTS.get(field_name, 1.0) * idf * tf * (K1 + 1) / (tf + norm)
+
+    def search_ranked(self, text, limit=20):
+        # Liefert (Zeilennummern, Punkte) nach Punkten absteigend, bei Gleichstand die kleinere Zeilennummer.
+        clauses = parse_query(text)
+        if not clauses or limit <= 0 or self.n == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        total = np.zeros(self.n, dtype=np.float32)
+        matched = np.ones(self.n, dtype=bool)
+        for field_name, words in clauses:
+            scores = np.zeros(self.n, dtype=np.float32)
+            for name in ([field_name] if field_name else FIELDS):
+                if name in self.fields:
+                    self._clause_scores(name, words, scores)
+            matched &= scores > 0
+            total += scores
+        rows = np.flatnonzero(matched)
+        if len(rows) > limit:
+            # Alles ab der Punktzahl des limit-ten Treffers (mit Gleichständen), erst dann genau sortieren.
+            threshold = np.partition(total[rows], len(rows) - limit)[len(rows) - limit]
+            rows = rows[total[rows] >= threshold]
+        rows = rows[np.lexsort((rows, -total[rows]))][:limit]
+        return rows, total[rows]
+
+    def search(self, text, limit=20):
+        return self.search_ranked(text, limit)[0]
+
+
+def _tokenize_column(values, ids, field):
+    # Jeder verschiedene Text wird einmal zerlegt; pro Eintrag (Wort, Rezept, Position) in der Reihenfolge der Rezepte.
+    codes, uniques = pd.factorize(values)
+    tokens = [tokenize_field(text, field) for text in list(uniques)] + [([], [])]
+    codes = np.where(codes >= 0, codes, len(tokens) - 1)  # fehlende Werte zeigen auf die leere Liste am Ende
+    distinct_sizes = np.fromiter((len(words) for words, _ in tokens), dtype=np.int64, count=len(tokens))
+    distinct_ptr = np.zeros(len(tokens) + 1, dtype=np.int64)
+    np.cumsum(distinct_sizes, out=distinct_ptr[1:])
+    count = int(distinct_ptr[-1])
+    flat = np.fromiter((ids.setdefault(word, len(ids)) for words, _ in tokens for word in words), dtype=np.int32,
+                       count=count)
+    flat_positions = np.fromiter((position for _, positions in tokens for position in positions), dtype=np.int32,
+                                 count=count)
+    sizes = distinct_sizes[codes]
+    source = segment_positions(distinct_ptr[codes], sizes)
+    rows = np.repeat(np.arange(len(codes), dtype=np.int32), sizes)
+    return flat[source], rows, flat_positions[source], sizes.astype(np.int32)
+
+
+def _postings(terms, rows, positions, lengths, vocabulary_size):
+    order = np.argsort(terms, kind='stable')  # Rezepte und Positionen sind schon aufsteigend
+    terms, rows, positions = terms[order], rows[order], positions[order]
+    new_entry = np.r_[True, (terms[1:] != terms[:-1]) | (rows[1:] != rows[:-1])] if len(terms) else np.zeros(0, bool)
+    starts = np.flatnonzero(new_entry)
+    tf = np.diff(np.r_[starts, len(terms)]).astype(np.int32)
+    everything = np.arange(vocabulary_size + 1)
+    return FieldPostings(np.searchsorted(terms[starts], everything).astype(np.int64), rows[starts], tf,
+                         np.searchsorted(terms, everything).astype(np.int64), positions, lengths)
+
+
+def build_fulltext(df):
+    ids = {}
+    tokenized = {field: _tokenize_column(df[field], ids, field) for field in FIELDS if field in df}
+    vocabulary = [None] * len(ids)
+    for word, i in ids.items():
+        vocabulary[i] = word
+    fields = {field: _postings(*columns, len(vocabulary)) for field, columns in tokenized.items()}
+    return FullTextIndex(len(df), vocabulary, fields)
+
+
+def fulltext_path(cache_dir, version):
+    return os.path.join(cache_dir, f"fulltext-{version}.npz")
+
+
+def save_fulltext(index, path):
+    arrays = {'vocabulary': np.asarray(index.vocabulary, dtype=str),
+              'meta': np.asarray(json.dumps({'format': FULLTEXT_FORMAT, 'rows': index.n, 'fields': list(index.fields)}))}
+    for i, postings in enumerate(index.fields.values()):
+        arrays.update({f"{i}.{name}": array for name, array in postings.arrays().items()})
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, **arrays)  # unkomprimiert: Laden ist nur Lesen
+    os.replace(tmp_path, path)  # Atomar, ein anderer Prozess liest nie eine halbe Datei.
+
+
+def load_fulltext(path, n):
+    # None, wenn die Datei fehlt, unlesbar ist oder zu einem anderen Aufbau bzw. Datensatz gehört.
+    try:
+        with np.load(path, allow_pickle=False) as arrays:
+            meta = json.loads(str(arrays['meta']))
+            if meta.get('format') != FULLTEXT_FORMAT or meta.get('rows') != n:
+                return None
+            vocabulary = arrays['vocabulary'].tolist()
+            fields = {field: FieldPostings(*(arrays[f"{i}.{name}"] for name in
+                                             ['term_ptr', 'rows', 'tf', 'term_pos_ptr', 'positions', 'lengths']))
+                      for i, field in enumerate(meta['fields'])}
+    except (OSError, KeyError, ValueError):
+        return None
+    return FullTextIndex(n, vocabulary, fields)
+
+
+def _prune(cache_dir, keep=FULLTEXT_KEEP):
+    # Nur die zuletzt gebauten Indizes behalten.
+    paths = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+             if name.startswith('fulltext-') and name.endswith('.npz')]
+    for path in sorted(paths, key=os.path.getmtime, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def fulltext_for(df, version, cache_dir):
+    # Index für eine Datensatz-Version: von der Festplatte, sonst gebaut und gespeichert. Ohne Version (z.B. ein
+    # lokales CSV in der Kommandozeile) wird nur im Speicher gebaut.
+    if version is None:
+        return build_fulltext(df)
+    path = fulltext_path(cache_dir, version)
+    index = load_fulltext(path, len(df))
+    if index is None:
+        index = build_fulltext(df)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            save_fulltext(index, path)
+            _prune(cache_dir)
+        except OSError:
+            pass  # Nur lesbares Cache-Verzeichnis: dann eben bei jedem Start bauen.
+    return index
@@ -0,0 +1,129 @@
+# Invertierter Zutaten-Index: Zutat bzw. Alkoholbasis -> Menge der Zeilen (Zeilennummern im DataFrame).
+# Wird einmal pro Datensatz-Version gebaut. Der Filter-Tab verknüpft dann nur noch vorberechnete Mengen
+# (bitweises ODER/UND) statt bei jedem Rerun einen Regex über alle Zeilen laufen zu lassen.
+#
+# Die Mengen werden wie bei "Roaring Bitmaps" kompakt gespeichert: seltene Zutaten als sortierte Zeilennummern,
+# häufige Zutaten (z.B. die Alkoholbasen) als gepacktes Bitset mit einem Bit pro Zeile.
+import numpy as np
+
+from cocktail_ingredients import canonical_ingredient
+
+# Ab diesem Anteil an Zeilen lohnt sich ein Bitset (1 Bit pro Zeile) gegenüber einem int32-Array (32 Bit pro Treffer).
+BITSET_DENSITY = 1 / 32
+
+
+class RowSet:
+    # Unveränderliche Zeilenmenge, entweder als sortierte Zeilennummern ('ids') oder als gepacktes Bitset ('bits').
+    __slots__ = ('n', 'kind', 'data')
+
+    def __init__(self, n, rows):
+        rows = np.asarray(rows, dtype=np.int32)
+        self.n = n
+        if len(rows) >= n * BITSET_DENSITY:
+            mask = np.zeros(n, dtype=bool)
+            mask[rows] = True
+            self.kind, self.data = 'bits', np.packbits(mask, bitorder='little')
+        else:
+            self.kind, self.data = 'ids', np.unique(rows)
+
+    def __len__(self):
+        if self.kind == 'ids':
+            return len(self.data)
+        return int(np.unpackbits(self.data, count=self.n, bitorder='little').sum())
+
+    def mask(self):
+        if self.kind == 'bits':
+            return np.unpackbits(self.data, count=self.n, bitorder='little').view(bool)
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self.data] = True
+        return mask
+
+
+def union_mask(n, rowsets):
+    # Bitsets werden gepackt verodert (8 Zeilen pro Byte), Zeilennummern direkt in die Maske geschrieben.
+    packed = [rowset.data for rowset in rowsets if rowset.kind == 'bits']
+    if packed:
+        mask = np.unpackbits(np.bitwise_or.reduce(packed), count=n, bitorder='little').view(bool)
+    else:
+        mask = np.zeros(n, dtype=bool)
+    for rowset in rowsets:
+        if rowset.kind == 'ids':
+            mask[rowset.data] = True
+    return mask
+
+
+class IngredientIndex:
+    def __init__(self, n, bases, ingredients, has_ingredients):
+        self.n = n
+        self.bases = bases                      # 'Gin' -> RowSet
+        self.ingredients = ingredients          # 'lime juice' -> RowSet
+        self.has_ingredients = has_ingredients  # Maske der Zeilen mit ausgefüllter Zutatenliste
+
+    def base_mask(self, base):
+        rowset = self.bases.get(base)
+        return rowset.mask() if rowset is not None else np.zeros(self.n, dtype=bool)
+
+    def ingredient_mask(self, ingredient):
+        rowset = self.ingredients.get(canonical_ingredient(ingredient))
+        return rowset.mask() if rowset is not None else np.zeros(self.n, dtype=bool)
+
+    def cabinet_mask(self, cabinet):
+        # Cocktails, die mindestens eine Alkoholbasis aus dem Schrank enthalten. Ein leerer Schrank schränkt nicht ein
+        # (so wie vorher der leere Regex).
+        if not cabinet:
+            return self.has_ingredients.copy()
+        return union_mask(self.n, [self.bases[base] for base in cabinet if base in self.bases])
+
+
+def build_ingredient_index(table, alcohol_bases):
+    # Aus der Zutaten-Tabelle (cocktail_ingredients.py), es werden nur Zutatennummern verglichen. Zu einer
+    # Alkoholbasis gehören die Zutaten, die einer ihrer Begriffe als ganzes Wort trifft ('aged rum' und 'bourbon',
+    # nicht 'rumchata'), getaggt einmal über das Vokabular (cocktail_bases.py). Die Tags der Einträge ergeben in
+    # einem Durchgang die Basen jedes Rezepts.
+    n = table.n
+    has_ingredients = table.sizes > 0
+    entries, columns = np.nonzero(table.base_tags(alcohol_bases)[table.ingredient_ids])
+    recipe_bases = np.zeros((n, len(alcohol_bases)), dtype=bool)
+    recipe_bases[table.entry_rows[entries], columns] = True
+    bases = {base: RowSet(n, np.flatnonzero(recipe_bases[:, j])) for j, base in enumerate(alcohol_bases)}
+
+    order = np.argsort(table.ingredient_ids, kind='stable')
+    boundaries = np.searchsorted(table.ingredient_ids[order], np.arange(len(table.vocabulary) + 1))
+    entry_rows = table.entry_rows[order]
+    index = {name: RowSet(n, entry_rows[boundaries[i]:boundaries[i + 1]]) for i, name in enumerate(table.vocabulary)}
+    return IngredientIndex(n, bases, index, has_ingredients)
+
+
+class BaseMatrix:
+    # Matrix Cocktails x Alkoholbasen, bitweise gepackt (16 Basen = 2 Bytes pro Cocktail),
+    # und eine Zuordnung Cocktail-Name -> Zeilennummer. Damit braucht die Statistik im Favoriten-Tab
+    # pro Favorit nur noch einen Wörterbuch-Zugriff und eine Zeile der Matrix.
+    def __init__(self, bases, packed, name_to_row):
+        self.bases = list(bases)
+        self.packed = packed
+        self.name_to_row = name_to_row
+
+    def rows_for(self, names):
+        rows = [self.name_to_row.get(name) for name in names]
+        return np.asarray([row for row in rows if row is not None], dtype=np.int64)
+
+    def membership(self, rows):
+        return np.unpackbits(self.packed[rows], axis=1, count=len(self.bases), bitorder='little').view(bool)
+
+    def count_bases(self, names):
+        # Anzahl Favoriten pro Alkoholbasis als Wörterbuch in der Reihenfolge von self.bases.
+        counts = self.membership(self.rows_for(names)).sum(axis=0)
+        return dict(zip(self.bases, counts.tolist()))
+
+
+def build_base_matrix(df, ingredient_index, alcohol_bases):
+    n = len(df)
+    if n == 0 or 'Cocktail Name' not in df:
+        return BaseMatrix(alcohol_bases, np.zeros((0, (len(alcohol_bases) + 7) // 8), dtype=np.uint8), {})
+    membership = np.column_stack([ingredient_index.base_mask(base) for base in alcohol_bases])
+    packed = np.packbits(membership, axis=1, bitorder='little')
+    # Bei doppelten Namen gilt wie bisher (.values[0]) die erste Zeile.
+    name_to_row = {}
+    for row, name in enumerate(df['Cocktail Name'].tolist()):
+        name_to_row.setdefault(name, row)
+    return BaseMatrix(alcohol_bases, packed, name_to_row)
@@ -0,0 +1,271 @@
+# Strukturierte Zutaten: '1 1/2 oz London Dry Gin*' -> Menge 1.5, Einheit 'oz', Zutat 'london dry gin'.
+#
+# Jede Zutat jedes Rezepts wird einmal pro Datensatz-Version zerlegt und in einer spaltenorientierten Tabelle abgelegt
+# (CSR wie in cocktail_coverage.py): pro Eintrag Menge, Einheit und Zutat, Einheit und Zutat als Nummern. Filter und
+# Zählungen vergleichen danach nur noch Zutatennummern statt Teilstrings: Welche Zutaten zu einer Alkoholbasis gehören,
+# wird einmal über das Vokabular bestimmt (ganze Wörter und Synonyme, siehe cocktail_bases.py), 'Port' trifft also
+# 'ruby port', aber nicht mehr 'Passion fruit Portion'. Mit den Mengen lassen sich Rezepte auf mehrere Portionen umrechnen.
+#   python cocktail_ingredients.py "1 1/2 oz London Dry Gin" "2 dashes Angostura Bitters" --servings 4
+import re
+import sys
+from fractions import Fraction
+
+import numpy as np
+
+from cocktail_bases import tagger_for
+from cocktail_diff import segment_positions
+
+# Einheit -> Schreibweisen im Datensatz (verglichen ohne Gross-/Kleinschreibung, ein Punkt danach ist erlaubt).
+UNITS = {
+    'oz': ['oz', 'fl oz', 'ounce', 'ounces'],
+    'ml': ['ml'],
+    'cl': ['cl'],
+    'dash': ['dash', 'dashes'],
+    'drop': ['drop', 'drops'],
+    'barspoon': ['barspoon', 'barspoons', 'bar spoon', 'bar spoons'],
+    'tsp': ['tsp', 'teaspoon', 'teaspoons'],
+    'tbsp': ['tbsp', 'tablespoon', 'tablespoons'],
+    'cup': ['cup', 'cups'],
+    'part': ['part', 'parts'],
+    'splash': ['splash', 'splashes'],
+    'pinch': ['pinch', 'pinches'],
+    'leaf': ['leaf', 'leaves'],
+    'sprig': ['sprig', 'sprigs'],
+    'slice': ['slice', 'slices'],
+    'wedge': ['wedge', 'wedges'],
+    'top': ['top with', 'to top', 'top'],
+}
+UNIT_NAMES = list(UNITS)
+_UNIT_CODES = {spelling: code for code, unit in enumerate(UNIT_NAMES) for spelling in UNITS[unit]}
+_PLURALS = {'dash': 'dashes', 'drop': 'drops', 'barspoon': 'barspoons', 'cup': 'cups', 'part': 'parts',
+            'splash': 'splashes', 'pinch': 'pinches', 'leaf': 'leaves', 'sprig': 'sprigs', 'slice': 'slices',
+            'wedge': 'wedges'}
+
+_VULGAR_FRACTIONS = {'½': 0.5, '⅓': 1 / 3, '⅔': 2 / 3, '¼': 0.25, '¾': 0.75, '⅛': 0.125}
+_NUMBER_WORDS = {'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'half': 0.5, 'half a': 0.5, 'half an': 0.5}
+_NUMBER = r"\d+\s+\d+/\d+|\d+\s*[½⅓⅔¼¾⅛]|\d+/\d+|\d*\.\d+|\d+|[½⅓⅔¼¾⅛]"
+_UNIT = '|'.join(re.escape(spelling).replace(r'\ ', r'\s+') for spelling in sorted(_UNIT_CODES, key=len, reverse=True))
+# Eine Einheit zählt nur nach einer Menge ('Parts Unknown Gin' ist ein Name), einzig 'top' steht auch allein.
+_INGREDIENT_RE = re.compile(
+    rf"^(?:(?P<quantity>half\s+an?\b|{_NUMBER}|(?:an?|one|two|three|four|half)\b)"
+    rf"(?:\s*(?:-|–|to)\s*(?P<quantity_max>{_NUMBER}))?\s*"
+    rf"(?:(?P<unit>{_UNIT})\b\.?\s*(?:of\s+)?)?"
+    r"|(?P<top>top\s+with|top)\b\.?\s*)?"
+    r"(?P<name>.*)$",
+    re.IGNORECASE,
+)
+
+
+def split_ingredients(ingredients):
+    if not isinstance(ingredients, str):
+        return []
+    return [ingredient.strip() for ingredient in ingredients.split(',') if ingredient.strip()]
+
+
+def _number(text):
+    text = ' '.join(text.lower().split())
+    if text in _NUMBER_WORDS:
+        return float(_NUMBER_WORDS[text])
+    if text[-1] in _VULGAR_FRACTIONS:
+        return float(text[:-1] or 0) + _VULGAR_FRACTIONS[text[-1]]
+    if ' ' in text:
+        whole, fraction = text.split()
+        return float(whole) + float(Fraction(fraction))
+    return float(Fraction(text)) if '/' in text else float(text)
+
+
+def parse_ingredient(text):
+    # -> (Menge, Menge bis, Einheit, Zutat). Menge und Einheit sind None, wenn sie fehlen ('Soda Water'),
+    # Menge bis ist nur bei Bereichen ('1-2 dashes') gesetzt. Sternchen (Hinweise auf Rezepte in der Notiz) fallen weg.
+    text = ' '.join(text.strip().rstrip('*').split())
+    match = _INGREDIENT_RE.match(text)
+    name = match.group('name').strip()
+    if not name or (match.group('quantity') and not match.group('unit') and not name[:1].isalpha()):
+        # Nur eine Zahl bzw. Einheit ohne Zutat: das Ganze ist der Name.
+        return None, None, None, text.lower()
+    quantity = _number(match.group('quantity')) if match.group('quantity') else None
+    quantity_max = _number(match.group('quantity_max')) if match.group('quantity_max') else None
+    unit = match.group('unit') or match.group('top')
+    unit = UNIT_NAMES[_UNIT_CODES[' '.join(unit.lower().split())]] if unit else None
+    return quantity, quantity_max, unit, name.lower()
+
+
+def canonical_ingredient(text):
+    # '1.5 oz Vodka ' -> 'vodka'
+    return parse_ingredient(text)[3]
+
+
+def format_quantity(value):
+    # 1.5 -> '1 1/2', 0.75 -> '3/4', 22.5 -> '22.5' (Brüche nur, wenn sie glatt aufgehen).
+    fraction = Fraction(value).limit_denominator(8)
+    if abs(float(fraction) - value) > 1e-3 or fraction.denominator == 1:
+        return f"{value:g}" if abs(value - round(value)) > 1e-3 else str(int(round(value)))
+    whole, rest = divmod(fraction, 1)
+    return f"{int(whole)} {rest}" if whole else str(rest)
+
+
+def format_ingredient(quantity, quantity_max, unit, name):
+    parts = []
+    if quantity is not None:
+        parts.append(format_quantity(quantity) + (f"-{format_quantity(quantity_max)}" if quantity_max is not None else ''))
+    if unit is not None:
+        parts.append(_PLURALS.get(unit, unit) if (quantity_max or quantity or 0) > 1 else unit)
+    parts.append(name)
+    return ' '.join(parts)
+
+
+def scale_ingredient(text, servings):
+    # Eine Zutat in Originalschreibweise für mehrere Portionen: '3/4 oz Lime Juice', 2 -> '1 1/2 oz Lime Juice'.
+    # Zutaten ohne Menge ('top Soda Water') bleiben, wie sie sind.
+    quantity, quantity_max, unit, _ = parse_ingredient(text)
+    if quantity is None:
+        return text
+    name = _INGREDIENT_RE.match(' '.join(text.strip().rstrip('*').split())).group('name').strip()
+    return format_ingredient(quantity * servings, quantity_max and quantity_max * servings, unit, name)
+
+
+def word_pattern(items):
+    # Ein Regex für mehrere Wörter, nur ganze Wörter: 'Gin' trifft 'london dry gin', aber nicht 'ginger beer'.
+    # Mehrzahl und Einzahl gelten gleich ('Liqueurs' trifft auch 'orange liqueur').
+    words = set()
+    for item in items:
+        item = item.strip().lower()
+        if item:
+            words.update([re.escape(item), re.escape(item.rstrip('s'))])
+    if not words:
+        return None
+    return re.compile(r"\b(?:" + '|'.join(sorted(words, key=len, reverse=True)) + r")s?\b")
+
+
+class IngredientTable:
+    # Spaltenorientiert, ein Eintrag pro Zutat eines Rezepts in der Reihenfolge der Zutatenliste.
+    def __init__(self, vocabulary, indptr, ingredient_ids, quantities, quantities_max, units):
+        self.vocabulary = vocabulary                # Zutatennummer -> kanonischer Name
+        self.ids = {name: i for i, name in enumerate(vocabulary)}
+        self.indptr = indptr                        # Rezept r hat die Einträge indptr[r]:indptr[r + 1]
+        self.ingredient_ids = ingredient_ids        # int32
+        self.quantities = quantities                # float32, NaN = keine Menge
+        self.quantities_max = quantities_max        # float32, NaN = kein Bereich
+        self.units = units                          # int8, Nummer in UNIT_NAMES, -1 = keine Einheit
+        self.n = len(indptr) - 1
+        self.sizes = np.diff(indptr)
+        self.entry_rows = np.repeat(np.arange(self.n, dtype=np.int32), self.sizes)  # Rezept zu jedem Eintrag
+        self._base_tags = {}
+
+    def __len__(self):
+        return len(self.ingredient_ids)
+
+    def base_tags(self, bases):
+        # Matrix Zutatennummer x Alkoholbasis (bool): Das Vokabular wird einmal pro Tabelle und Liste von Basen
+        # getaggt (cocktail_bases.py), nicht die Rezepte.
+        key = tuple(bases)
+        tags = self._base_tags.get(key)
+        if tags is None:
+            tags = self._base_tags[key] = tagger_for(key).tag_all(self.vocabulary)
+        return tags
+
+    def recipe(self, row, servings=1):
+        # [(Menge, Menge bis, Einheit, Zutat), ...] für die gewünschte Anzahl Portionen.
+        start, end = self.indptr[row], self.indptr[row + 1]
+        records = []
+        for i, quantity, quantity_max, unit in zip(self.ingredient_ids[start:end].tolist(),
+                                                   self.quantities[start:end].tolist(),
+                                                   self.quantities_max[start:end].tolist(),
+                                                   self.units[start:end].tolist()):
+            records.append((None if quantity != quantity else quantity * servings,
+                            None if quantity_max != quantity_max else quantity_max * servings,
+                            UNIT_NAMES[unit] if unit >= 0 else None,
+                            self.vocabulary[i]))
+        return records
+
+
+def _parse_values(values, ids):
+    # Zerlegt die Zutatenlisten; gleiche Zutaten-Texte (z.B. '1 oz Lime Juice') werden nur einmal geparst.
+    parsed, sizes, entries = {}, [], []
+    for value in values:
+        recipe = split_ingredients(value)
+        sizes.append(len(recipe))
+        for text in recipe:
+            entry = parsed.get(text)
+            if entry is None:
+                quantity, quantity_max, unit, name = parse_ingredient(text)
+                entry = parsed[text] = (ids.setdefault(name, len(ids)),
+                                        np.nan if quantity is None else quantity,
+                                        np.nan if quantity_max is None else quantity_max,
+                                        -1 if unit is None else UNIT_NAMES.index(unit))
+            entries.append(entry)
+    columns = np.asarray(entries, dtype=np.float64).reshape(-1, 4)
+    return (np.asarray(sizes, dtype=np.int64), columns[:, 0].astype(np.int32), columns[:, 1].astype(np.float32),
+            columns[:, 2].astype(np.float32), columns[:, 3].astype(np.int8))
+
+
+def _vocabulary(ids):
+    vocabulary = [None] * len(ids)
+    for name, i in ids.items():
+        vocabulary[i] = name
+    return vocabulary
+
+
+def build_ingredient_table(df):
+    ids = {}
+    values = df['Ingredients'].tolist() if 'Ingredients' in df else [None] * len(df)
+    sizes, ingredient_ids, quantities, quantities_max, units = _parse_values(values, ids)
+    indptr = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=indptr[1:])
+    return IngredientTable(_vocabulary(ids), indptr, ingredient_ids, quantities, quantities_max, units)
+
+
+def refresh_ingredient_table(old, diff, df):
+    # Neue Version des Datensatzes (siehe cocktail_diff.py): Unveränderte Rezepte übernehmen ihre Einträge,
+    # nur eingefügte bzw. geänderte Zeilen werden geparst. Die alte Tabelle bleibt unverändert.
+    ids = dict(old.ids)
+    values = df['Ingredients'].iloc[diff.inserted].tolist() if 'Ingredients' in df else [None] * len(diff.inserted)
+    inserted_sizes, *inserted = _parse_values(values, ids)
+
+    n = len(diff.old_for_new)
+    matched = np.flatnonzero(diff.old_for_new >= 0)
+    sizes = np.zeros(n, dtype=np.int64)
+    sizes[matched] = old.sizes[diff.old_for_new[matched]]
+    sizes[diff.inserted] = inserted_sizes
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(sizes, out=indptr[1:])
+    source = segment_positions(old.indptr[diff.old_for_new[matched]], sizes[matched])
+    target = segment_positions(indptr[matched], sizes[matched])
+    target_inserted = segment_positions(indptr[diff.inserted], sizes[diff.inserted])
+    columns = []
+    for old_column, inserted_column in zip((old.ingredient_ids, old.quantities, old.quantities_max, old.units),
+                                           inserted):
+        column = np.empty(int(indptr[-1]), dtype=old_column.dtype)
+        column[target] = old_column[source]
+        column[target_inserted] = inserted_column
+        columns.append(column)
+
+    vocabulary = _vocabulary(ids)
+    # Die Basen der alten Zutaten sind schon bekannt, getaggt werden nur die neu dazugekommenen Namen.
+    base_tags = {key: np.concatenate([tags, tagger_for(key).tag_all(vocabulary[len(old.vocabulary):])])
+                 for key, tags in old._base_tags.items()}
+    # Zutaten, die nur in gelöschten Rezepten vorkamen, fallen aus dem Vokabular (die Nummern bleiben aufsteigend).
+    used = np.bincount(columns[0], minlength=len(vocabulary)) > 0
+    if not used.all():
+        renumber = np.cumsum(used) - 1
+        columns[0] = renumber[columns[0]].astype(np.int32)
+        vocabulary = [name for name, keep in zip(vocabulary, used.tolist()) if keep]
+        base_tags = {key: tags[used] for key, tags in base_tags.items()}
+    table = IngredientTable(vocabulary, indptr, *columns)
+    table._base_tags.update(base_tags)
+    return table
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    servings = 1
+    if '--servings' in args:
+        position = args.index('--servings')
+        servings = float(args[position + 1])
+        del args[position:position + 2]
+    if not args:
+        sys.exit("Usage: python cocktail_ingredients.py <ingredient> [<ingredient> ...] [--servings N]")
+    for text in args:
+        quantity, quantity_max, unit, name = parse_ingredient(text)
+        print(f"{scale_ingredient(text, servings)}\t(quantity={quantity}, quantity_max={quantity_max}, "
+              f"unit={unit}, ingredient={name!r})")
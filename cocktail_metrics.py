@@ -0,0 +1,169 @@
+# Zeitmessung pro Rerun: Abschnitte ("Spans") wie Download, CSV-Parsing, Filter, Widgets oder Diagramme werden
+# gemessen und dem laufenden Rerun zugeordnet; zusätzlich führen wir prozessweite Histogramme (Rerun-Dauer pro Tab,
+# Dauer pro Abschnitt) und Zähler (z.B. Treffer im Filter-Cache). Kostet pro Span nur zwei perf_counter()-Aufrufe und ein paar Additionen und kann daher
+# auch im Betrieb eingeschaltet bleiben.
+#
+# Export über Umgebungsvariablen:
+#   COCKTAILS_METRICS_JSONL=/pfad/reruns.jsonl   eine JSON-Zeile pro Rerun (Tab, Gesamtdauer, Abschnitte)
+#   COCKTAILS_METRICS_PROM=/pfad/cocktails.prom  Histogramme im Prometheus-Textformat (z.B. für den node_exporter
+#                                                textfile collector), höchstens einmal pro Sekunde neu geschrieben
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Obergrenzen der Histogramm-Klassen in Millisekunden.
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PROM_INTERVAL = 1.0
+
+JSONL_PATH = os.environ.get('COCKTAILS_METRICS_JSONL')
+PROM_PATH = os.environ.get('COCKTAILS_METRICS_PROM')
+
+_current = contextvars.ContextVar('cocktail_rerun', default=None)
+_lock = threading.Lock()
+_histograms = {}  # (Metrik, Label-Tupel) -> [Zähler pro Klasse..., +Inf], Summe, Anzahl
+_counters = {}  # (Metrik, Label-Tupel) -> Wert
+_last_prom_write = 0.0
+
+
+def observe(metric, value_ms, **labels):
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': [0] * (len(BUCKETS_MS) + 1), 'sum': 0.0, 'count': 0}
+        i = 0
+        while i < len(BUCKETS_MS) and value_ms > BUCKETS_MS[i]:
+            i += 1
+        histogram['buckets'][i] += 1
+        histogram['sum'] += value_ms
+        histogram['count'] += 1
+
+
+def count(metric, value=1, **labels):
+    key = (metric, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def counters(metric):
+    # Label-Tupel -> Wert für eine Metrik.
+    with _lock:
+        return {labels: value for (name, labels), value in _counters.items() if name == metric}
+
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        observe('cocktail_span_ms', elapsed, span=name)
+        record = _current.get()
+        if record is not None:
+            record['spans'].append((name, round(elapsed, 3)))
+
+
+@contextmanager
+def rerun(tab=None):
+    # Umschliesst einen ganzen Skriptdurchlauf. Der Tab kann nachträglich gesetzt werden (record['tab'] = ...).
+    record = {'tab': tab, 'start': time.time(), 'total_ms': None, 'spans': []}
+    token = _current.set(record)
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['total_ms'] = round((time.perf_counter() - start) * 1000, 3)
+        _current.reset(token)
+        observe('cocktail_rerun_ms', record['total_ms'], tab=record['tab'] or 'unknown')
+        _export(record)
+
+
+def _export(record):
+    global _last_prom_write
+    if JSONL_PATH:
+        try:
+            with open(JSONL_PATH, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError:
+            pass
+    if PROM_PATH and time.time() - _last_prom_write >= PROM_INTERVAL:
+        _last_prom_write = time.time()
+        try:
+            write_prometheus(PROM_PATH)
+        except OSError:
+            pass
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = [(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in pairs]
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+
+def prometheus_text():
+    with _lock:
+        snapshot = {key: {'buckets': list(h['buckets']), 'sum': h['sum'], 'count': h['count']}
+                    for key, h in _histograms.items()}
+        counter_snapshot = dict(_counters)
+    lines, described = [], set()
+    for (metric, labels), value in sorted(counter_snapshot.items()):
+        if metric not in described:
+            described.add(metric)
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_format_labels(labels)} {value}")
+    for (metric, labels), histogram in sorted(snapshot.items()):
+        if metric not in described:
+            described.add(metric)
+            lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, count in zip(list(BUCKETS_MS) + ['+Inf'], histogram['buckets']):
+            cumulative += count
+            lines.append(f"{metric}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{metric}_sum{_format_labels(labels)} {histogram['sum']:.3f}")
+        lines.append(f"{metric}_count{_format_labels(labels)} {histogram['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+
+def _quantile(histogram, q):
+    # Obergrenze der Klasse, in der das Quantil liegt (genauer geht es mit festen Klassen nicht).
+    target, cumulative = q * histogram['count'], 0
+    for bound, count in zip(list(BUCKETS_MS) + [float('inf')], histogram['buckets']):
+        cumulative += count
+        if cumulative >= target:
+            return bound
+    return float('inf')
+
+
+def rerun_summary():
+    # Pro Tab: Anzahl Reruns, Mittelwert und (über die Klassen) p50/p95 in Millisekunden.
+    with _lock:
+        rows = []
+        for (metric, labels), histogram in sorted(_histograms.items()):
+            if metric == 'cocktail_rerun_ms' and histogram['count']:
+                rows.append({
+                    'tab': dict(labels).get('tab'),
+                    'reruns': histogram['count'],
+                    'mean_ms': round(histogram['sum'] / histogram['count'], 1),
+                    'p50_ms': _quantile(histogram, 0.5),
+                    'p95_ms': _quantile(histogram, 0.95),
+                })
+    return rows
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
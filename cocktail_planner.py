@@ -0,0 +1,163 @@
+# Filter-Tab: Reihenfolge der Bedingungen nach Selektivität und ein prozessweiter Cache für die Ergebnisse.
+#
+# Für jede Bedingung einer Abfrage (Anzahl Zutaten, Glas, Alkohole im Schrank) wird aus Spaltenstatistiken geschätzt,
+# wie viele Zeilen sie übrig lässt (FilterStats, einmal pro Datensatz-Version). Die selektivste Bedingung wird zuerst
+# ausgewertet; bleiben danach nur wenige Kandidaten übrig, prüfen die weiteren Bedingungen nur noch diese, sonst
+# werden ganze Masken verknüpft (ein Vergleich über eine ganze Spalte ist pro Zeile viel billiger als ein Zugriff
+# über Zeilennummern). Trifft eine Bedingung sicher nichts (unbekanntes Glas), wird gar nichts ausgewertet.
+# Die Ergebnisse (Zeilennummern als int32, nur lesbar) landen in einem LRU-Cache für alle Sitzungen mit dem Schlüssel
+# (Anzahl Zutaten, Glas, frozenset(Schrank), Datensatz-Version): Gleiche Filter verschiedener Benutzer kommen aus
+# dem Speicher, eine neue Version des Datensatzes erzeugt automatisch neue Schlüssel. Begrenzt wird der Cache wie
+# der Diagramm-Cache (cocktail_charts.py) über die Grösse in Bytes, ein breiter Filter belegt also mehr Platz als
+# ein enger.
+#
+#   COCKTAILS_FILTER_CACHE_BYTES   Grösse des Caches (Standard 32 MB)
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from cocktail_metrics import count
+
+FILTER_CACHE_BYTES = int(os.environ.get('COCKTAILS_FILTER_CACHE_BYTES', 32 << 20))
+# Kandidaten als Zeilennummern herauszuziehen und über ihre Nummer zu prüfen kostet pro Kandidat etwa so viel, wie
+# GATHER_COST Zeilen einer ganzen Spalte zu vergleichen (gemessen mit numpy bei 100k Zeilen).
+GATHER_COST = 32
+
+
+class Predicate:
+    # estimate: geschätzte Anzahl Treffer. mask(): Maske über alle Zeilen, test(rows): Maske über die gegebenen Zeilen
+    # (None, wenn dafür ohnehin die ganze Maske gebraucht wird).
+    __slots__ = ('name', 'estimate', 'mask', 'test')
+
+    def __init__(self, name, estimate, mask, test):
+        self.name = name
+        self.estimate = estimate
+        self.mask = mask
+        self.test = test
+
+
+class FilterStats:
+    # Spalten als numpy-Arrays plus Histogramme für die Schätzungen.
+    def __init__(self, df, ingredient_index):
+        self.n = len(df)
+        self.ingredient_index = ingredient_index
+        counts = df['Ingredient Count'] if 'Ingredient Count' in df else pd.Series(np.zeros(self.n, dtype=np.int32))
+        self.ingredient_counts = counts.to_numpy(dtype=np.int32, na_value=0)
+        self.count_histogram = np.bincount(self.ingredient_counts, minlength=1)
+        glassware = df['Glassware'] if 'Glassware' in df else pd.Series([None] * self.n, dtype=object)
+        if not isinstance(glassware.dtype, pd.CategoricalDtype):
+            glassware = glassware.astype('category')
+        self.glassware_codes = {value: code for code, value in enumerate(glassware.cat.categories.tolist())}
+        self.glassware = glassware.cat.codes.to_numpy()
+        self.glassware_histogram = np.bincount(self.glassware + 1, minlength=1)[1:]  # Code -1 = kein Glas
+        self.base_sizes = {base: len(rowset) for base, rowset in ingredient_index.bases.items()}
+        self.with_ingredients = int(ingredient_index.has_ingredients.sum())
+
+    def predicates(self, query):
+        predicates = [self._cabinet(list(query.cabinet))]
+        if query.num_ingredients is not None:
+            value = int(query.num_ingredients)
+            estimate = int(self.count_histogram[value]) if 0 <= value < len(self.count_histogram) else 0
+            predicates.append(Predicate('num_ingredients', estimate, lambda: self.ingredient_counts == value,
+                                        lambda rows: self.ingredient_counts[rows] == value))
+        if query.glassware is not None:
+            code = self.glassware_codes.get(query.glassware, -2)  # -2: kommt nicht vor, trifft keine Zeile
+            estimate = int(self.glassware_histogram[code]) if code >= 0 else 0
+            predicates.append(Predicate('glassware', estimate, lambda: self.glassware == code,
+                                        lambda rows: self.glassware[rows] == code))
+        return predicates
+
+    def _cabinet(self, cabinet):
+        index = self.ingredient_index
+        if not cabinet:
+            return Predicate('cabinet', self.with_ingredients, lambda: index.cabinet_mask(cabinet),
+                             lambda rows: index.has_ingredients[rows])
+        # Obergrenze: Summe der Zeilen pro Alkohol (Cocktails mit mehreren Alkoholen zählen mehrfach).
+        # Die Zeilenmengen werden gepackt verodert, einzelne Zeilen lassen sich nicht billiger prüfen.
+        estimate = min(self.n, sum(self.base_sizes.get(base, 0) for base in cabinet))
+        return Predicate('cabinet', estimate, lambda: index.cabinet_mask(cabinet), None)
+
+
+def plan(predicates):
+    return sorted(predicates, key=lambda predicate: predicate.estimate)
+
+
+def execute(n, predicates):
+    # Sortierte Zeilennummern (int32) der Zeilen, die alle Bedingungen erfüllen.
+    ordered = plan(predicates)
+    if ordered[0].estimate == 0:
+        return np.zeros(0, dtype=np.int32)
+    mask, rows = ordered[0].mask(), None
+    remaining = ordered[0].estimate  # geschätzte Kandidaten, Bedingungen als unabhängig angenommen
+    for predicate in ordered[1:]:
+        if rows is None and predicate.test is not None and remaining * GATHER_COST < n:
+            rows = np.flatnonzero(mask)
+        if rows is None:
+            mask &= predicate.mask()
+        else:
+            rows = rows[predicate.mask()[rows] if predicate.test is None else predicate.test(rows)]
+            if not len(rows):
+                break
+        remaining = remaining * predicate.estimate / max(n, 1)
+    return (np.flatnonzero(mask) if rows is None else rows).astype(np.int32)
+
+
+class ResultCache:
+    def __init__(self, max_bytes=FILTER_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        count('cocktail_filter_cache_total', result='miss' if rows is None else 'hit')
+        return rows
+
+    def put(self, key, rows):
+        if rows.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.nbytes
+            self._entries[key] = rows
+            self.size += rows.nbytes
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+_results = ResultCache()
+
+
+def cached_rows(key, compute):
+    rows = _results.get(key)
+    if rows is None:
+        rows = compute()
+        rows.setflags(write=False)  # wird von allen Sitzungen geteilt
+        _results.put(key, rows)
+    return rows
+
+
+def cache_stats():
+    return {'entries': len(_results), 'bytes': _results.size, 'hits': _results.hits, 'misses': _results.misses}
@@ -0,0 +1,154 @@
+# "Mehr davon": ähnliche Cocktails und Empfehlungen aus den Favoriten.
+#
+# Jedes Rezept wird ein dünn besetzter Vektor über seine Merkmale: normalisierte Zutaten (Vokabular aus
+# cocktail_coverage.py), Alkoholbasen und Glas. Gewichtet wird mit TF-IDF (binär, seltene Merkmale zählen mehr),
+# verglichen mit Kosinus-Ähnlichkeit. Die K ähnlichsten Cocktails pro Rezept werden einmal pro Datensatz-Version
+# vorberechnet; eine Abfrage ist danach nur noch ein Nachschlagen in einer Tabelle (Cocktails x K).
+#
+# Vorberechnung in Blöcken von Zeilen: Kandidaten sind die Rezepte, die ein Merkmal teilen, angefangen beim seltensten
+# Merkmal der Zeile (das trägt am meisten zur Ähnlichkeit bei). Von sehr häufigen Merkmalen (z.B. 'lime juice') kommt
+# nur eine feste Zufallsauswahl dazu, insgesamt höchstens CANDIDATES_PER_ROW; für diese Paare wird die Ähnlichkeit
+# exakt berechnet. Gemessen bei 100k Rezepten: 4 bis 10 Sekunden je nach Rechner, zu lang für einen Rerun; die
+# App baut die Tabelle deshalb im Hintergrund (catalog_for in cocktail_catalog.py) und zeigt "More like this" erst
+# danach. Kleine Kataloge (bis EXACT_ROWS, z.B. cocktails.csv) vergleichen alle Paare und bekommen die exakten
+# Nachbarn.
+import numpy as np
+
+from cocktail_diff import segment_positions
+
+NEIGHBOURS = 10          # vorberechnete Nachbarn pro Cocktail
+CANDIDATES_PER_FEATURE = 48  # so viele Rezepte werden pro Merkmal höchstens als Kandidaten genommen
+CANDIDATES_PER_ROW = 96      # und so viele pro Cocktail insgesamt
+EXACT_ROWS = 2000            # bis zu dieser Grösse werden alle Paare verglichen (exakte Nachbarn)
+BLOCK_ROWS = 512
+GLASSWARE_WEIGHT = 0.5   # das Glas zählt weniger als eine Zutat
+
+
+class Recommender:
+    def __init__(self, neighbours, scores):
+        self.neighbours = neighbours  # Cocktails x K Zeilennummern, -1 = kein weiterer Nachbar
+        self.scores = scores          # Cocktails x K Kosinus-Ähnlichkeiten, absteigend
+
+    def similar(self, row, limit=NEIGHBOURS):
+        rows = self.neighbours[row]
+        keep = rows >= 0
+        return rows[keep][:limit], self.scores[row][keep][:limit]
+
+    def for_favorites(self, rows, limit=10):
+        # Summe der Ähnlichkeiten über die Nachbarn aller Favoriten; die Favoriten selbst werden ausgelassen.
+        # Kosten: Anzahl Favoriten x K, unabhängig von der Grösse des Katalogs.
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        if not len(rows):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        candidates = self.neighbours[rows].ravel()
+        weights = self.scores[rows].ravel()
+        keep = (candidates >= 0) & ~np.isin(candidates, rows)
+        candidates, inverse = np.unique(candidates[keep], return_inverse=True)
+        totals = np.bincount(inverse, weights=weights[keep]).astype(np.float32)
+        order = np.lexsort((candidates, -totals))[:limit]
+        return candidates[order], totals[order]
+
+
+def _feature_matrix(df, coverage_index, ingredient_index, bases):
+    # Merkmale pro Rezept als CSR (indptr, features): zuerst die Zutaten, dann die Basen, dann das Glas.
+    n = coverage_index.n
+    vocabulary = len(coverage_index.vocabulary)
+    columns = [[] for _ in range(n)]
+    for i, base in enumerate(bases):
+        for row in np.flatnonzero(ingredient_index.base_mask(base)).tolist():
+            columns[row].append(vocabulary + i)
+    glass_weights = {}
+    if 'Glassware' in df:
+        codes = {}
+        glass_offset = vocabulary + len(bases)
+        for row, glass in enumerate(df['Glassware'].tolist()):
+            if isinstance(glass, str) and glass.strip():
+                feature = glass_offset + codes.setdefault(glass.strip().lower(), len(codes))
+                columns[row].append(feature)
+                glass_weights[feature] = GLASSWARE_WEIGHT
+        features_total = glass_offset + len(codes)
+    else:
+        features_total = vocabulary + len(bases)
+    extra_sizes = np.fromiter((len(column) for column in columns), dtype=np.int64, count=n)
+    sizes = coverage_index.sizes.astype(np.int64) + extra_sizes
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(sizes, out=indptr[1:])
+    features = np.empty(int(indptr[-1]), dtype=np.int32)
+    features[segment_positions(indptr[:-1], coverage_index.sizes)] = coverage_index.indices
+    features[segment_positions(indptr[:-1] + coverage_index.sizes, extra_sizes)] = \
+        np.fromiter((feature for column in columns for feature in column), dtype=np.int32, count=int(extra_sizes.sum()))
+    scale = np.ones(features_total, dtype=np.float32)
+    for feature, weight in glass_weights.items():
+        scale[feature] = weight
+    return indptr, features, scale
+
+
+def build_recommender(df, coverage_index, ingredient_index, bases, k=NEIGHBOURS, seed=0):
+    n = coverage_index.n
+    neighbours = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    if n < 2:
+        return Recommender(neighbours, scores)
+    indptr, features, scale = _feature_matrix(df, coverage_index, ingredient_index, bases)
+    sizes = np.diff(indptr)
+    entry_rows = np.repeat(np.arange(n, dtype=np.int64), sizes)
+
+    # TF-IDF-Gewichte pro Eintrag, jede Zeile auf Länge 1 normiert.
+    document_frequency = np.bincount(features, minlength=len(scale))
+    idf = np.log((1 + n) / (1 + document_frequency)).astype(np.float32) + 1
+    weights = (idf * scale)[features]
+    norms = np.sqrt(np.bincount(entry_rows, weights=weights.astype(np.float64) ** 2, minlength=n))
+    weights = (weights / np.where(norms > 0, norms, 1)[entry_rows]).astype(np.float32)
+
+    # Merkmal -> Rezepte in fester Zufallsreihenfolge (die ersten CANDIDATES_PER_FEATURE sind eine Stichprobe).
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permutation(len(features))
+    order = shuffled[np.argsort(features[shuffled], kind='stable')]
+    posting_rows = entry_rows[order]
+    posting_ptr = np.zeros(len(scale) + 1, dtype=np.int64)
+    np.cumsum(document_frequency, out=posting_ptr[1:])
+    exact = n <= EXACT_ROWS
+    posting_take = document_frequency if exact else np.minimum(document_frequency, CANDIDATES_PER_FEATURE)
+
+    for start in range(0, n, BLOCK_ROWS):
+        block = np.arange(start, min(n, start + BLOCK_ROWS))
+        # Kandidatenpaare (Zeile im Block, anderes Rezept) über die Merkmale der Blockzeilen.
+        block_entries = segment_positions(indptr[block], sizes[block])
+        entry_features = features[block_entries]
+        entry_block = np.repeat(np.arange(len(block)), sizes[block])
+        # Seltenste Merkmale zuerst, bis das Budget der Zeile aufgebraucht ist.
+        rarest = np.lexsort((document_frequency[entry_features], entry_block))
+        take = posting_take[entry_features[rarest]]
+        row_take = np.bincount(entry_block, weights=take, minlength=len(block)).astype(np.int64)
+        taken_before = np.cumsum(take) - take - np.repeat(np.cumsum(row_take) - row_take, sizes[block])
+        if not exact:
+            take = np.clip(CANDIDATES_PER_ROW - taken_before, 0, take)
+        pair_block = np.repeat(entry_block[rarest], take)
+        pair_rows = posting_rows[segment_positions(posting_ptr[entry_features[rarest]], take)]
+        keys = pair_block.astype(np.int64) * n + pair_rows
+        keys.sort()
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) else keys
+        pair_block, pair_rows = keys // n, keys % n
+        keep = pair_rows != block[pair_block]
+        pair_block, pair_rows = pair_block[keep], pair_rows[keep]
+        if not len(pair_rows):
+            continue
+
+        # Exakte Kosinus-Ähnlichkeit der Paare: Merkmale des Kandidaten gegen die dichte Zeile des Blocks.
+        dense = np.zeros((len(block), len(scale)), dtype=np.float32)
+        dense[entry_block, entry_features] = weights[block_entries]
+        candidate_entries = segment_positions(indptr[pair_rows], sizes[pair_rows])
+        pair_of_entry = np.repeat(np.arange(len(pair_rows)), sizes[pair_rows])
+        products = dense[pair_block[pair_of_entry], features[candidate_entries]] * weights[candidate_entries]
+        similarity = np.bincount(pair_of_entry, weights=products, minlength=len(pair_rows)).astype(np.float32)
+
+        # Die K besten Kandidaten pro Zeile (bei Gleichstand die kleinere Zeilennummer).
+        ranked = np.lexsort((pair_rows, -similarity, pair_block))
+        ranked_block = pair_block[ranked]
+        group_start = np.searchsorted(ranked_block, ranked_block, side='left')
+        rank = np.arange(len(ranked)) - group_start
+        top = ranked[rank < k]
+        top_rank = rank[rank < k]
+        neighbours[block[pair_block[top]], top_rank] = pair_rows[top]
+        scores[block[pair_block[top]], top_rank] = similarity[top]
+    return Recommender(neighbours, scores)
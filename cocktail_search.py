@@ -0,0 +1,178 @@
+# Suchmaschine für Cocktail-Namen: wird einmal pro Datensatz-Version gebaut und beantwortet Suchanfragen
+# bei jedem Tastendruck, ohne alle Namen linear zu durchsuchen.
+#
+# Rangfolge der Treffer: exakter Name > Name beginnt mit der Eingabe > Eingabe kommt im Namen vor > Tippfehler
+# (Editierdistanz). Innerhalb einer Stufe kommen kürzere Namen zuerst. Es werden höchstens 'limit' Treffer geliefert.
+import bisect
+import re
+
+import numpy as np
+
+EXACT, PREFIX, SUBSTRING, FUZZY = 0, 1, 2, 3
+FUZZY_CANDIDATES = 200  # So viele Namen mit den meisten gemeinsamen Trigrammen werden auf Tippfehler geprüft.
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_name(name):
+    return _SPACES_RE.sub(' ', name.strip().lower()) if isinstance(name, str) else ''
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def edit_distance(a, b, max_distance):
+    # Editierdistanz (Levenshtein, vertauschte Nachbarbuchstaben zählen als ein Fehler) mit Abbruch,
+    # sobald eine ganze Zeile die erlaubte Distanz überschreitet.
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > max_distance:
+            return max_distance + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def _trigram_postings(names, rows):
+    # Trigramm -> Zeilennummern (aufsteigend) für die angegebenen Zeilen.
+    postings = {}
+    for row in rows:
+        for gram in trigrams(names[row]):
+            postings.setdefault(gram, []).append(row)
+    return postings
+
+
+class NameSearch:
+    # names: normalisierte Namen (normalize_name), trigram_postings: Trigramm -> int32-Array der Zeilennummern.
+    def __init__(self, names, trigram_postings):
+        self.names = names
+        self.trigrams = trigram_postings
+        self.lengths = np.fromiter((len(name) for name in self.names), dtype=np.int32, count=len(self.names))
+
+        # Exakte Namen und sortierte Liste für Präfix-Suche per Binärsuche.
+        self.exact = {}
+        for row, name in enumerate(self.names):
+            self.exact.setdefault(name, []).append(row)
+        order = sorted(range(len(self.names)), key=self.names.__getitem__)
+        self.sorted_names = [self.names[row] for row in order]
+        self.sorted_rows = np.asarray(order, dtype=np.int32)
+
+    def _by_length(self, rows, limit):
+        # Kürzere Namen zuerst, bei gleicher Länge in der ursprünglichen Reihenfolge.
+        rows = np.asarray(rows, dtype=np.int32)
+        if len(rows) > limit:
+            rows = rows[np.argpartition(self.lengths[rows], limit - 1)[:limit]]
+        return rows[np.lexsort((rows, self.lengths[rows]))]
+
+    def _prefix_rows(self, query):
+        start = bisect.bisect_left(self.sorted_names, query)
+        end = bisect.bisect_left(self.sorted_names, query + '\U0010ffff', lo=start)
+        return self.sorted_rows[start:end]
+
+    def _substring_rows(self, query):
+        grams = trigrams(query)
+        if not grams:
+            return np.zeros(0, dtype=np.int32)  # Unter 3 Zeichen reichen exakter Name und Präfix.
+        postings = sorted((self.trigrams.get(gram) for gram in grams), key=lambda rows: 0 if rows is None else len(rows))
+        if postings[0] is None:
+            return np.zeros(0, dtype=np.int32)
+        candidates = postings[0]
+        for rows in postings[1:]:
+            candidates = np.intersect1d(candidates, rows, assume_unique=True)
+            if not len(candidates):
+                break
+        return np.asarray([row for row in candidates if query in self.names[row]], dtype=np.int32)
+
+    def _fuzzy_rows(self, query, exclude, limit):
+        grams = [self.trigrams[gram] for gram in trigrams(query) if gram in self.trigrams]
+        if not grams:
+            return np.zeros(0, dtype=np.int32)
+        shared = np.bincount(np.concatenate(grams), minlength=len(self.names))
+        shared[exclude] = 0
+        candidates = np.flatnonzero(shared)
+        if len(candidates) > FUZZY_CANDIDATES:
+            # Meiste gemeinsame Trigramme zuerst, bei Gleichstand die kürzeren Namen.
+            score = shared[candidates].astype(np.int64) * 4096 - np.minimum(self.lengths[candidates], 4095)
+            candidates = candidates[np.argpartition(-score, FUZZY_CANDIDATES - 1)[:FUZZY_CANDIDATES]]
+
+        # Verglichen wird mit dem ganzen Namen, mit jedem Wort und mit dem gleich langen Namensanfang
+        # (bei der Suche während des Tippens ist die Eingabe oft erst ein Teil des Namens).
+        max_distance = max(1, len(query) // 4)
+        scored = []
+        for row in candidates:
+            name = self.names[row]
+            distance = min(edit_distance(query, part, max_distance) for part in [name, name[:len(query)]] + name.split(' '))
+            if distance <= max_distance:
+                scored.append((distance, len(name), int(row)))
+        scored.sort()
+        return np.asarray([row for _, _, row in scored[:limit]], dtype=np.int32)
+
+    def search_ranked(self, query, limit=20):
+        # Liefert (Zeilennummern, Stufen) in Rangfolge.
+        query = normalize_name(query)
+        if not query or limit <= 0:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int8)
+        found, tiers, seen = [], [], np.zeros(len(self.names), dtype=bool)
+        stages = [
+            (EXACT, lambda: self.exact.get(query, [])),
+            (PREFIX, lambda: self._prefix_rows(query)),
+            (SUBSTRING, lambda: self._substring_rows(query)),
+            (FUZZY, lambda: self._fuzzy_rows(query, np.flatnonzero(seen), limit)),
+        ]
+        remaining = limit
+        for tier, rows in stages:
+            if tier == FUZZY and len(query) < 3:
+                break
+            rows = np.asarray(rows(), dtype=np.int32)
+            rows = rows[~seen[rows]]
+            if tier != FUZZY:
+                rows = self._by_length(rows, remaining)
+            rows = rows[:remaining]
+            seen[rows] = True
+            found.append(rows)
+            tiers.append(np.full(len(rows), tier, dtype=np.int8))
+            remaining -= len(rows)
+            if remaining == 0:
+                break
+        return np.concatenate(found), np.concatenate(tiers)
+
+    def search(self, query, limit=20):
+        return self.search_ranked(query, limit)[0]
+
+
+def build_name_search(df):
+    names = [normalize_name(name) for name in (df['Cocktail Name'].tolist() if 'Cocktail Name' in df else [])]
+    # Trigramm -> Zeilennummern, für Teilstring- und Tippfehler-Suche.
+    postings = _trigram_postings(names, range(len(names)))
+    return NameSearch(names, {gram: np.asarray(rows, dtype=np.int32) for gram, rows in postings.items()})
+
+
+def refresh_name_search(old, diff, df):
+    # Neue Version des Datensatzes (siehe cocktail_diff.py): Namen und Trigramm-Listen unveränderter Zeilen werden
+    # auf die neuen Zeilennummern umgeschrieben, nur eingefügte Zeilen werden normalisiert und zerlegt.
+    names = np.empty(len(diff.old_for_new), dtype=object)
+    matched = np.flatnonzero(diff.old_for_new >= 0)
+    names[matched] = np.asarray(old.names, dtype=object)[diff.old_for_new[matched]]
+    raw = df['Cocktail Name'].iloc[diff.inserted].tolist() if 'Cocktail Name' in df else [None] * len(diff.inserted)
+    for row, name in zip(diff.inserted.tolist(), raw):
+        names[row] = normalize_name(name)
+    names = names.tolist()
+
+    added = _trigram_postings(names, diff.inserted.tolist())
+    postings = {}
+    for gram in set(old.trigrams) | set(added):
+        rows = diff.new_for_old[old.trigrams[gram]] if gram in old.trigrams else np.zeros(0, dtype=np.int64)
+        rows = rows[rows >= 0]
+        if gram in added:
+            rows = np.concatenate([rows, added[gram]])
+        if len(rows):
+            postings[gram] = np.sort(rows).astype(np.int32)
+    return NameSearch(names, postings)
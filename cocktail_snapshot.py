@@ -0,0 +1,120 @@
+# Vorkompilierter, spaltenorientierter Snapshot unseres Datensatzes (Arrow IPC, unkomprimiert).
+# cocktails.csv wird einmal eingelesen und als Arrow-Datei gespeichert. Beim Laden wird die Datei nur per mmap
+# eingeblendet: Das Betriebssystem teilt die Seiten zwischen allen Workern, es wird kein CSV mehr geparst.
+# Beim Kompilieren werden zusätzlich abgeleitete Spalten einmal pro Datensatz-Version berechnet (siehe DERIVED_COLUMNS).
+# Spalten mit wenigen verschiedenen Werten (Glas, Bartender, ...) werden als Wörterbuch gespeichert und als
+# pandas-Kategorien geladen: jeder Wert liegt nur einmal im Speicher, pro Zeile bleibt ein Code von 1-2 Bytes.
+# Aufruf als Ingest-Schritt: python cocktail_snapshot.py cocktails.csv cocktails.arrow
+import os
+import sys
+import threading
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow wird mit Streamlit installiert, ohne pyarrow lesen wir einfach das CSV.
+    pa = None
+
+SNAPSHOT_SUFFIX = '.arrow'
+# Wird bei jeder Änderung am Aufbau des Snapshots erhöht, ältere Snapshots werden dann neu kompiliert.
+SNAPSHOT_FORMAT = '3'
+
+# Abgeleitete Spalten: Anzahl Zutaten (wie bisher len(x.split(','))) und die aufgetrennte und gestrippte Zutatenliste.
+DERIVED_COLUMNS = ['Ingredient Count', 'Ingredient List']
+CATEGORICAL_COLUMNS = ['Glassware', 'Bartender', 'Location', 'Garnish', 'Bar/Company', 'Source']
+
+
+def available():
+    return pa is not None
+
+
+def _derive_table(table):
+    ingredients = table.column('Ingredients')
+    parts = pc.split_pattern(ingredients, ',')
+    # Die Teilstücke werden in einem Durchgang gestrippt, die Listen-Offsets bleiben unverändert.
+    ingredient_list = pa.chunked_array([
+        pa.ListArray.from_arrays(pc.subtract(chunk.offsets, chunk.offsets[0]),
+                                 pc.utf8_trim_whitespace(chunk.flatten()), mask=chunk.is_null())
+        for chunk in parts.chunks
+    ], type=pa.list_(pa.string()))
+    derived = {
+        'Ingredient Count': pc.fill_null(pc.list_value_length(parts), 0).cast(pa.int32()),
+        'Ingredient List': ingredient_list,
+    }
+    for name in DERIVED_COLUMNS:
+        if name in table.column_names:
+            table = table.drop_columns([name])
+        table = table.append_column(name, derived[name])
+    for name in CATEGORICAL_COLUMNS:
+        if name in table.column_names:
+            table = table.set_column(table.column_names.index(name), name, pc.dictionary_encode(table.column(name)))
+    return table.replace_schema_metadata({'cocktails_format': SNAPSHOT_FORMAT})
+
+
+def derive_columns(df):
+    # Gleiche abgeleitete Spalten für den Fall ohne pyarrow (reines pandas).
+    df = df.copy()
+    ingredient_list = df['Ingredients'].map(lambda x: [part.strip() for part in x.split(',')] if isinstance(x, str) else None)
+    df['Ingredient Count'] = ingredient_list.map(lambda x: len(x) if x is not None else 0).astype('int32')
+    df['Ingredient List'] = ingredient_list
+    for name in CATEGORICAL_COLUMNS:
+        if name in df:
+            df[name] = df[name].astype('category')
+    return df
+
+
+def _write_table(table, snapshot_path):
+    tmp_path = f"{snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, snapshot_path)  # Atomar, damit ein anderer Prozess nie eine halbe Datei einblendet.
+
+
+def read_csv_table(csv_path):
+    # Alle Spalten als Text, leere Felder als fehlende Werte (wie bei pd.read_csv).
+    table = pa_csv.read_csv(
+        csv_path,
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True, quoted_strings_can_be_null=True),
+    )
+    return table.cast(pa.schema([pa.field(name, pa.string()) for name in table.column_names]))
+
+
+def compile_snapshot(source, snapshot_path):
+    # source ist entweder der Pfad zu einem CSV oder ein DataFrame.
+    if isinstance(source, pd.DataFrame):
+        source = source.drop(columns=[name for name in DERIVED_COLUMNS if name in source])
+        table = pa.Table.from_pandas(source.astype(object).where(source.notna(), None), preserve_index=False)
+        table = table.cast(pa.schema([pa.field(name, pa.string()) for name in table.column_names]))
+    else:
+        table = read_csv_table(source)
+    _write_table(_derive_table(table), snapshot_path)
+    return snapshot_path
+
+
+def is_current(snapshot_path):
+    try:
+        with pa.memory_map(snapshot_path, 'r') as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    return metadata.get(b'cocktails_format') == SNAPSHOT_FORMAT.encode()
+
+
+def open_snapshot(snapshot_path):
+    # mmap statt read: Die Arrow-Puffer zeigen direkt in die Datei, pandas-Spalten werden ohne Kopie darübergelegt.
+    # Nur die Wörterbuch-Spalten werden zu pandas-Kategorien (Codes plus einmal die Werte).
+    source = pa.memory_map(snapshot_path, 'r')
+    table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas(types_mapper=lambda type_: None if pa.types.is_dictionary(type_) else pd.ArrowDtype(type_))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python cocktail_snapshot.py <cocktails.csv> <snapshot.arrow>")
+    compile_snapshot(sys.argv[1], sys.argv[2])
+    print(f"Snapshot written to {sys.argv[2]}")
@@ -0,0 +1,201 @@
+# Mehrere Datenquellen zu einem Katalog zusammenführen (eigene Rezeptliste, öffentliches cocktails.csv, Partner-Feeds).
+#
+# Alle Quellen werden gleichzeitig geladen (asyncio, höchstens MAX_CONCURRENCY gleichzeitig, Zeitlimit pro Quelle),
+# die Startzeit hängt also von der langsamsten Quelle ab und nicht von der Summe. Jede Quelle wird auf die Spalten
+# der App gebracht; Cocktails mit gleichem (normalisiertem) Namen werden nur einmal übernommen, frühere Quellen
+# haben Vorrang. Eine Quelle, die ausfällt, wird übersprungen, solange mindestens eine andere geladen werden konnte.
+#
+# Quellen sind URLs (CSV, laufen über cocktail_cache.py mit ETag und Festplatten-Kopie) oder lokale Dateien
+# (.csv, .json, .jsonl):
+#   COCKTAILS_SOURCES="hausrezepte.csv https://github.com/OzanGenc/CocktailAnalysis/raw/main/cocktails.csv"
+#   python cocktail_sources.py hausrezepte.csv partner.jsonl merged.csv
+import asyncio
+import hashlib
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+
+import pandas as pd
+
+import cocktail_snapshot
+from cocktail_cache import CACHE_DIR, load_cocktails
+from cocktail_metrics import span
+
+MAX_CONCURRENCY = 4
+SOURCE_TIMEOUT = 30  # Sekunden pro Quelle
+FAILURE_BACKOFF = 60  # Sekunden, bis eine ausgefallene Quelle erneut versucht wird (sonst bremst sie jeden Rerun)
+
+# Spalten der App in der Reihenfolge von cocktails.csv, plus die Herkunft jedes Rezepts.
+COLUMNS = ['Cocktail Name', 'Ingredients', 'Preparation', 'Garnish', 'Glassware', 'Bartender', 'Location']
+SOURCE_COLUMN = 'Source'
+
+# Andere Spaltennamen, wie sie in Partner-Feeds vorkommen (verglichen ohne Gross-/Kleinschreibung und Sonderzeichen).
+COLUMN_ALIASES = {
+    'Cocktail Name': ['cocktailname', 'name', 'cocktail', 'drink', 'title'],
+    'Ingredients': ['ingredients', 'ingredientlist', 'recipe'],
+    'Preparation': ['preparation', 'instructions', 'method', 'directions'],
+    'Garnish': ['garnish', 'garnishes'],
+    'Glassware': ['glassware', 'glass', 'glasstype'],
+    'Bartender': ['bartender', 'author', 'creator'],
+    'Location': ['location', 'bar', 'venue'],
+}
+
+SourceReport = namedtuple('SourceReport', ['source', 'rows', 'added', 'seconds', 'error'])
+IngestResult = namedtuple('IngestResult', ['df', 'version', 'reports'])
+
+# Zusammengeführte Kataloge: Versionen aller Quellen -> (DataFrame, Version). Bei einem Rerun ohne neue Daten
+# wird nichts neu zusammengeführt.
+_merged = {}
+_local = {}  # Pfad -> (Version, DataFrame): lokale Dateien werden nur neu gelesen, wenn sie sich geändert haben
+_failures = {}  # Quelle -> (Zeitpunkt, Fehlermeldung) des letzten Ausfalls
+
+
+def _is_url(source):
+    return re.match(r'https?://', source) is not None
+
+
+def _column_key(name):
+    return re.sub(r'[^a-z0-9]', '', str(name).lower())
+
+
+def _read_local(path):
+    if path.endswith('.jsonl'):
+        return pd.read_json(path, lines=True, dtype=False)
+    if path.endswith('.json'):
+        return pd.read_json(path, dtype=False)
+    return pd.read_csv(path, dtype=str)
+
+
+def _local_version(path):
+    # Grösse und Änderungszeit reichen, um eine geänderte Datei zu erkennen, ohne sie bei jedem Rerun zu hashen.
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def normalize_frame(df, source):
+    # Bringt eine Quelle auf die Spalten der App. Fehlende Spalten bleiben leer, zusätzliche werden verworfen.
+    # Zutaten als Liste (JSON-Feeds) werden wie in cocktails.csv mit Komma verbunden.
+    by_key = {}
+    for column in df.columns:
+        by_key.setdefault(_column_key(column), column)
+    normalized = {}
+    for column in COLUMNS:
+        match = next((by_key[key] for key in [_column_key(column)] + COLUMN_ALIASES[column] if key in by_key), None)
+        if match is None:
+            normalized[column] = pd.Series([None] * len(df), dtype=object)
+            continue
+        values = df[match]
+        if values.dtype == object:
+            values = values.map(lambda x: ', '.join(str(part) for part in x) if isinstance(x, (list, tuple)) else x,
+                                na_action='ignore')
+        normalized[column] = values.astype('string').str.strip().reset_index(drop=True)
+    result = pd.DataFrame(normalized)
+    result[SOURCE_COLUMN] = source
+    return result[result['Cocktail Name'].fillna('').ne('').to_numpy()].reset_index(drop=True)
+
+
+def _load_source(source, primary, timeout, cache_dir):
+    # Läuft in einem Worker-Thread. Liefert das Rohdaten-DataFrame und die Version der Quelle.
+    if _is_url(source):
+        df, version = load_cocktails(source, cache_dir=cache_dir, timeout=timeout, bundled=primary)
+        return df[[column for column in df.columns if column not in cocktail_snapshot.DERIVED_COLUMNS]], version
+    version = _local_version(source)
+    cached = _local.get(source)
+    if cached is None or cached[0] != version:
+        cached = _local[source] = (version, _read_local(source))
+    return cached[1], version
+
+
+async def _fetch_all(sources, max_concurrency, timeout, cache_dir):
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(i, source):
+        failure = _failures.get(source)
+        if failure is not None and time.time() - failure[0] < FAILURE_BACKOFF:
+            return None, None, f"skipped, failed recently: {failure[1]}", 0.0
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                frame, version = await asyncio.wait_for(
+                    asyncio.to_thread(_load_source, source, i == 0, timeout, cache_dir), timeout)
+                _failures.pop(source, None)
+                return frame, version, None, time.perf_counter() - start
+            except Exception as e:  # Eine Quelle darf den Katalog nicht blockieren, der Fehler steht im Bericht.
+                message = f"timed out after {timeout}s" if isinstance(e, asyncio.TimeoutError) else str(e)
+                _failures[source] = (time.time(), message)
+                return None, None, message, time.perf_counter() - start
+
+    return await asyncio.gather(*[fetch(i, source) for i, source in enumerate(sources)])
+
+
+def merge_frames(frames):
+    # frames: Liste von (Quelle, normalisiertes DataFrame) in Vorrang-Reihenfolge.
+    # Liefert das zusammengeführte DataFrame und pro Quelle die Anzahl neu übernommener Cocktails.
+    parts, added, seen = [], [], set()
+    for source, frame in frames:
+        # Wie normalize_name aus cocktail_search.py, aber für die ganze Spalte auf einmal.
+        keys = frame['Cocktail Name'].str.strip().str.lower().str.replace(r'\s+', ' ', regex=True)
+        keep = ~keys.duplicated() & ~keys.isin(seen)
+        seen.update(keys[keep])
+        parts.append(frame[keep.to_numpy()])
+        added.append(int(keep.sum()))
+    merged = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=COLUMNS + [SOURCE_COLUMN])
+    return merged, added
+
+
+def _materialize(merged, version, cache_dir):
+    # Wie eine einzelne Quelle als Arrow-Snapshot ablegen und einblenden (gleiche Spaltentypen wie sonst in der App).
+    if not cocktail_snapshot.available():
+        return cocktail_snapshot.derive_columns(merged)
+    os.makedirs(cache_dir, exist_ok=True)
+    snapshot_path = os.path.join(cache_dir, f"merged-{version}{cocktail_snapshot.SNAPSHOT_SUFFIX}")
+    if not os.path.exists(snapshot_path) or not cocktail_snapshot.is_current(snapshot_path):
+        cocktail_snapshot.compile_snapshot(merged, snapshot_path)
+        # Ältere zusammengeführte Snapshots aufräumen (bereits eingeblendete bleiben unter Linux bis zum Schliessen gültig).
+        for name in os.listdir(cache_dir):
+            if name.startswith('merged-') and name != os.path.basename(snapshot_path):
+                try:
+                    os.remove(os.path.join(cache_dir, name))
+                except OSError:
+                    pass
+    return cocktail_snapshot.open_snapshot(snapshot_path)
+
+
+def ingest(sources, max_concurrency=MAX_CONCURRENCY, timeout=SOURCE_TIMEOUT, cache_dir=None):
+    cache_dir = cache_dir or CACHE_DIR
+    with span('ingest'):
+        fetched = asyncio.run(_fetch_all(sources, max_concurrency, timeout, cache_dir))
+        if all(frame is None for frame, _, _, _ in fetched):
+            raise RuntimeError("no source could be loaded: " + '; '.join(
+                f"{source}: {error}" for source, (_, _, error, _) in zip(sources, fetched)))
+
+        key = tuple((source, version) for source, (_, version, _, _) in zip(sources, fetched))
+        version = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+        loaded = [(source, frame) for source, (frame, _, _, _) in zip(sources, fetched) if frame is not None]
+        cached = _merged.get(key)
+        if cached is None:
+            with span('merge'):
+                merged, added = merge_frames([(source, normalize_frame(frame, source)) for source, frame in loaded])
+                df = _materialize(merged, version, cache_dir)
+            if len(_merged) >= 2:
+                _merged.clear()
+            cached = _merged[key] = (df, dict(zip([source for source, _ in loaded], added)))
+        df, added = cached
+
+    reports = [SourceReport(source, None if frame is None else len(frame), added.get(source, 0),
+                            round(seconds, 3), error)
+               for source, (frame, _, error, seconds) in zip(sources, fetched)]
+    return IngestResult(df, version, reports)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python cocktail_sources.py <source> [<source> ...] <merged.csv>")
+    result = ingest(sys.argv[1:-1])
+    result.df[COLUMNS + [SOURCE_COLUMN]].to_csv(sys.argv[-1], index=False)
+    for report in result.reports:
+        status = report.error or f"{report.rows} rows, {report.added} added"
+        print(f"{report.source}: {status} ({report.seconds:.2f}s)")
+    print(f"Wrote {len(result.df)} cocktails to {sys.argv[-1]}")
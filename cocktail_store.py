@@ -0,0 +1,204 @@
+# Dauerhafte Ablage von Favoriten und Schrank pro Benutzer in SQLite, damit sie einen Neustart überleben.
+#
+# - Mengen-Semantik: (user, name) ist Primärschlüssel, doppelte Likes werden ignoriert (INSERT OR IGNORE).
+# - WAL-Modus: Leser blockieren den Schreiber nicht, mehrere Prozesse können dieselbe Datei benutzen.
+# - Verbindungen werden in einem kleinen Pool wiederverwendet statt pro Zugriff neu geöffnet.
+# - Schreiben läuft gebündelt in einem Hintergrund-Thread: alle anstehenden Änderungen in einer Transaktion.
+#   Die App hält die Werte ihrer Sitzung selbst im Speicher und wartet daher nie auf die Festplatte.
+#   Lesende Zugriffe schreiben vorher die anstehenden Änderungen weg (read-your-writes).
+# - Ist die Datenbank länger gesperrt (anderer Prozess), bleiben die Änderungen eingereiht und werden nach
+#   RETRY_INTERVAL noch einmal versucht; verloren gehen sie erst, wenn der Prozess mit gesperrter Datenbank endet.
+#
+#   COCKTAILS_STORE=/pfad/cocktails.db   Ort der Datenbank (Standard: cocktails.db neben dem Skript)
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from cocktail_metrics import span
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_PATH = os.environ.get('COCKTAILS_STORE', os.path.join(APP_DIR, 'cocktails.db'))
+POOL_SIZE = 4
+FLUSH_INTERVAL = 0.05  # Sekunden, die Änderungen höchstens gesammelt werden
+BUSY_TIMEOUT = 5        # Sekunden, die SQLite pro Versuch auf eine gesperrte Datenbank wartet
+RETRY_INTERVAL = 1.0    # Pause, bevor eine fehlgeschlagene Transaktion wiederholt wird
+FLUSH_TIMEOUT = 10      # so lange wartet ein Lesezugriff höchstens auf anstehende Änderungen
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS favorites (
+    user TEXT NOT NULL,
+    name TEXT NOT NULL,
+    added REAL NOT NULL,
+    PRIMARY KEY (user, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cabinet (
+    user TEXT NOT NULL,
+    item TEXT NOT NULL,
+    PRIMARY KEY (user, item)
+) WITHOUT ROWID;
+'''
+
+
+class CocktailStore:
+    def __init__(self, path=STORE_PATH, pool_size=POOL_SIZE, flush_interval=FLUSH_INTERVAL, busy_timeout=BUSY_TIMEOUT):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.busy_timeout = busy_timeout
+        self.last_error = None
+        self._pool = queue.LifoQueue()
+        for _ in range(pool_size):
+            self._pool.put(self._open())
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+        # Anstehende Änderungen als Liste von (sql, parameter); die Reihenfolge bleibt erhalten.
+        self._pending = []
+        self._queued = 0      # Anzahl bisher eingereihter Änderungen
+        self._written = 0     # Anzahl bisher geschriebener (oder verworfener) Änderungen, Rest steht in _pending
+        self._cond = threading.Condition()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name='cocktail-store-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, check_same_thread=False, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    # Schreiben: nur einreihen, der Hintergrund-Thread bündelt.
+    def _enqueue(self, *operations):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("store is closed")
+            self._pending.extend(operations)
+            self._queued += len(operations)
+            self._cond.notify_all()
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending and self._closed:
+                    return
+            time.sleep(self.flush_interval)  # weitere Änderungen sammeln
+            with self._cond:
+                batch, self._pending = self._pending, []
+            done = self._write_batch(batch)
+            with self._cond:
+                if not done and self._closed:
+                    log.error("Dropping %d changes, %s is still locked at exit: %s", len(batch), self.path,
+                              self.last_error)
+                    done = True
+                if done:
+                    self._written += len(batch)
+                else:
+                    self._pending[:0] = batch  # vorne wieder einreihen, die Reihenfolge bleibt erhalten
+                self._cond.notify_all()
+            if not done:
+                log.warning("Writing %d changes to %s failed, retrying in %s s: %s", len(batch), self.path,
+                            RETRY_INTERVAL, self.last_error)
+                time.sleep(RETRY_INTERVAL)
+
+    def _write_batch(self, batch):
+        # True, wenn die Änderungen geschrieben (oder als fehlerhaft verworfen) sind; False, wenn die Datenbank
+        # gesperrt war und sie später noch einmal versucht werden sollen.
+        with span('store_write'), self._connection() as conn:
+            for attempt in range(3):
+                try:
+                    conn.execute('BEGIN IMMEDIATE')
+                    # Aufeinanderfolgende gleiche Anweisungen gehen als ein executemany an SQLite.
+                    start = 0
+                    while start < len(batch):
+                        end = start
+                        while end < len(batch) and batch[end][0] == batch[start][0]:
+                            end += 1
+                        conn.executemany(batch[start][0], [params for _, params in batch[start:end]])
+                        start = end
+                    conn.execute('COMMIT')
+                    return True
+                except sqlite3.Error as e:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                    self.last_error = e
+                    if not isinstance(e, sqlite3.OperationalError):
+                        # Fehlerhafte Änderungen werden auch beim nächsten Versuch nicht besser; die Sitzung behält
+                        # ihre Werte im Speicher.
+                        log.error("Dropping %d changes that %s rejected: %s", len(batch), self.path, e)
+                        return True
+                    time.sleep(0.1 * (attempt + 1))  # Datenbank gesperrt (anderer Prozess): gleich nochmals
+            return False
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        # Wartet, bis alle bis jetzt eingereihten Änderungen geschrieben sind. False, wenn das nach timeout Sekunden
+        # noch nicht der Fall ist (Datenbank gesperrt).
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            target = self._queued
+            while self._written < target:
+                if not self._writer.is_alive():
+                    raise RuntimeError(f"store writer thread has stopped, {target - self._written} changes not written")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, 1.0))  # regelmässig nachsehen, ob der Schreib-Thread noch lebt
+            return True
+
+    def close(self):
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._writer.join()
+        while not self._pool.empty():
+            self._pool.get().close()
+
+    def _read(self, sql, params):
+        if not self.flush():
+            log.warning("Reading from %s before all changes are written: %s", self.path, self.last_error)
+        with self._connection() as conn:
+            return [row[0] for row in conn.execute(sql, params)]
+
+    # Favoriten, in der Reihenfolge, in der sie geliked wurden.
+    def favorites(self, user):
+        return self._read('SELECT name FROM favorites WHERE user = ? ORDER BY added, name', (user,))
+
+    def add_favorites(self, user, names):
+        now = time.time()
+        self._enqueue(*[('INSERT OR IGNORE INTO favorites (user, name, added) VALUES (?, ?, ?)', (user, name, now))
+                        for name in names])
+
+    def add_favorite(self, user, name):
+        self.add_favorites(user, [name])
+
+    def clear_favorites(self, user):
+        self._enqueue(('DELETE FROM favorites WHERE user = ?', (user,)))
+
+    # Schrank
+    def cabinet(self, user):
+        return self._read('SELECT item FROM cabinet WHERE user = ? ORDER BY item', (user,))
+
+    def add_to_cabinet(self, user, item):
+        self._enqueue(('INSERT OR IGNORE INTO cabinet (user, item) VALUES (?, ?)', (user, item)))
+
+    def set_cabinet(self, user, items):
+        self._enqueue(('DELETE FROM cabinet WHERE user = ?', (user,)),
+                      *[('INSERT OR IGNORE INTO cabinet (user, item) VALUES (?, ?)', (user, item)) for item in items])
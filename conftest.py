@@ -0,0 +1,15 @@
+# Gemeinsame Fixtures der Tests: ein kleiner, zufällig erzeugter Katalog (make_frame in test_cocktail_catalog.py).
+import pytest
+
+from cocktail_catalog import CocktailCatalog
+from test_cocktail_catalog import make_frame
+
+
+@pytest.fixture(scope='module')
+def df():
+    return make_frame(300, seed=1)
+
+
+@pytest.fixture
+def catalog(df, tmp_path):
+    return CocktailCatalog(df, cache_dir=str(tmp_path))
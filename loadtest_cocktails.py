@@ -0,0 +1,374 @@
+# Lasttest: wie viele gleichzeitige Benutzer verträgt ein App-Prozess, bevor die Reruns langsamer werden?
+#
+# Die App läuft als echter Streamlit-Server (streamlit run "FINAL VERSION.py"), die Daten kommen von einem lokalen
+# HTTP-Server (ein synthetischer Katalog aus bench_cocktails.py oder eine eigene CSV mit --csv). Jede simulierte
+# Sitzung ist ein eigener Websocket-Client ohne Browser: Er schickt wie das Frontend pro Interaktion einen
+# Rerun mit allen Widget-Werten und wartet auf das Ende des Skripts. AppTest eignet sich dafür nicht, weil es
+# pro Prozess nur ein Skript gleichzeitig ausführen kann (globale Runtime).
+#
+# Jede Sitzung spielt Abläufe wie ein Benutzer durch: Schrank bearbeiten und speichern, einen Cocktail suchen und
+# liken, filtern, My Favorites öffnen (mit Denkpausen dazwischen). Gemessen wird die Zeit vom Senden bis zum Ende
+# des Reruns, pro Tab als p50/p95/p99, dazu der Durchsatz (fertige Reruns pro Sekunde). Mit mehreren Werten für
+# --sessions läuft der Test nacheinander mit steigender Last gegen denselben Server.
+#
+#   python loadtest_cocktails.py --sessions 1 5 10 20 --duration 60 --output loadtest_report.json
+#   python loadtest_cocktails.py --size 100000 --sessions 10 --think 0
+#   python loadtest_cocktails.py --csv cocktails.csv --sessions 5
+#   python loadtest_cocktails.py --app-url http://localhost:8501 --sessions 20
+#
+# Der Client selbst braucht wenig Rechenzeit (Protobuf lesen), auf einer Maschine mit einem Kern teilt er sie aber
+# mit dem Server; für genaue Zahlen --app-url auf einen Server auf einer anderen Maschine zeigen lassen.
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+from bench_cocktails import APP_DIR, APP_SCRIPT, generate_catalog, git_revision, serve_directory
+
+TABS = ["Hello Mixologist", "Manage Liquor Cabinet", "Cocktail Search", "Cocktail Filter", "My Favorites"]
+RERUN_TIMEOUT = 120  # Sekunden, danach gilt ein Rerun als Fehler
+# Größe des synthetischen Katalogs, wenn keine CSV angegeben ist.
+DEFAULT_SIZE = 1000
+
+
+def connect_app(app_url):
+    # Websocket wie im Browser (Kontextmanager, schliesst die Verbindung am Ende).
+    from websockets.sync.client import connect
+    return connect(app_url.replace('http', 'ws', 1).rstrip('/') + '/_stcore/stream',
+                   subprotocols=['streamlit'], max_size=None, open_timeout=RERUN_TIMEOUT)
+
+
+class Session:
+    # Eine Browser-Sitzung: Websocket zum Server, Werte der Widgets und die Elemente des letzten Reruns.
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.query_string = ''
+        self.values = {}     # Widget-Id -> WidgetState, wird wie vom Frontend bei jedem Rerun mitgeschickt
+        self.elements = []   # (Typ, Proto) aller Elemente des letzten Reruns
+        self.tab = TABS[0]
+
+    def rerun(self, trigger=None):
+        # Ein Rerun mit den aktuellen Widget-Werten (plus optional einem Button-Klick). Liefert Millisekunden und
+        # die Fehlermeldungen der App.
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        message = BackMsg()
+        message.rerun_script.query_string = self.query_string
+        message.rerun_script.widget_states.widgets.extend(self.values.values())
+        if trigger is not None:
+            message.rerun_script.widget_states.widgets.append(trigger)
+        start = time.perf_counter()
+        self.websocket.send(message.SerializeToString())
+        elements, errors = [], []
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self.websocket.recv(timeout=RERUN_TIMEOUT))
+            kind = forward.WhichOneof('type')
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                element_type = element.WhichOneof('type')
+                elements.append((element_type, getattr(element, element_type)))
+                if element_type == 'exception':
+                    errors.append(f"{element.exception.type}: {element.exception.message}")
+            elif kind == 'page_info_changed':
+                self.query_string = forward.page_info_changed.query_string  # z.B. ?user=... von current_user()
+            elif kind == 'script_finished':
+                break
+        elapsed = (time.perf_counter() - start) * 1000
+        # Wie im Browser: Widgets, die nicht mehr angezeigt werden, schicken keinen Wert mehr.
+        shown = {proto.id for _, proto in elements if getattr(proto, 'id', '')}
+        self.values = {widget_id: state for widget_id, state in self.values.items() if widget_id in shown}
+        self.elements = elements
+        return elapsed, errors
+
+    def find(self, element_type, label):
+        for found_type, proto in self.elements:
+            if found_type == element_type and proto.label == label:
+                return proto
+        return None
+
+    def find_all(self, element_type, label=None):
+        return [proto for found_type, proto in self.elements
+                if found_type == element_type and (label is None or proto.label == label)]
+
+    def set_value(self, proto, **value):
+        # z.B. set_value(checkbox, bool_value=True) oder set_value(selectbox, string_value='Coupe')
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        state = WidgetState(id=proto.id, **value)
+        self.values[proto.id] = state
+
+    def trigger(self, proto):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+        return WidgetState(id=proto.id, trigger_value=True)
+
+
+class Recorder:
+    # Gemeinsame Liste aller Reruns (Tab, Millisekunden, Endzeit) und Fehler über alle Sitzungen.
+    def __init__(self):
+        self.reruns = []
+        self.errors = []
+        self._lock = threading.Lock()
+
+    def add(self, tab, elapsed, errors):
+        with self._lock:
+            self.reruns.append((tab, elapsed, time.perf_counter()))
+            self.errors += [f"{tab}: {error}" for error in errors]
+
+
+class User:
+    # Skriptet die Abläufe einer Sitzung. Jede Interaktion ist ein Rerun, danach folgt eine Denkpause.
+    def __init__(self, session, recorder, rng, search_terms, think, deadline):
+        self.session = session
+        self.recorder = recorder
+        self.rng = rng
+        self.search_terms = search_terms
+        self.think = think
+        self.deadline = deadline
+
+    def step(self, trigger=None):
+        elapsed, errors = self.session.rerun(trigger)
+        self.recorder.add(self.session.tab, elapsed, errors)
+        if self.think:
+            time.sleep(self.rng.uniform(0.5, 1.5) * self.think)
+        return time.perf_counter() < self.deadline
+
+    def open_tab(self, tab):
+        radio = self.session.find('radio', 'Select Tab')
+        self.session.set_value(radio, string_value=tab)
+        self.session.tab = tab
+        return self.step()
+
+    def click(self, proto):
+        return proto is None or self.step(self.session.trigger(proto))
+
+    def edit_cabinet(self):
+        if not self.open_tab("Manage Liquor Cabinet"):
+            return False
+        checkboxes = [proto for proto in self.session.find_all('checkbox') if proto.label != "Load recipes only when opened"]
+        for checkbox in self.rng.sample(checkboxes, min(len(checkboxes), self.rng.randint(1, 3))):
+            self.session.set_value(checkbox, bool_value=self.rng.random() < 0.7)
+            if not self.step():
+                return False
+        return self.click(self.session.find('button', 'Save Liquor Cabinet'))
+
+    def search_and_like(self):
+        if not self.open_tab("Cocktail Search"):
+            return False
+        self.session.set_value(self.session.find('text_input', "Search for a cocktail"),
+                               string_value=self.rng.choice(self.search_terms))
+        if not self.step():
+            return False
+        lazy = self.session.find('checkbox', "Load recipes only when opened")
+        if lazy is None:  # keine Treffer
+            return True
+        self.session.set_value(lazy, bool_value=False)  # Rezepte aufklappen, damit die Like-Buttons erscheinen
+        if not self.step():
+            return False
+        likes = self.session.find_all('button', 'Like')
+        return not likes or self.click(self.rng.choice(likes))
+
+    def filter(self):
+        if not self.open_tab("Cocktail Filter"):
+            return False
+        for label in ["Maximum Number of Ingredients", "Type of Glassware"]:
+            selectbox = self.session.find('selectbox', label)
+            if selectbox is not None and self.rng.random() < 0.7:
+                self.session.set_value(selectbox, string_value=self.rng.choice(list(selectbox.options)))
+                if not self.step():
+                    return False
+        return self.click(self.session.find('button', 'Display Cocktails'))
+
+    def journeys(self):
+        return [self.edit_cabinet, self.search_and_like, self.filter, lambda: self.open_tab("My Favorites")]
+
+    def run(self):
+        if not self.step():  # erster Aufruf der Seite (Willkommen-Tab)
+            return
+        while self.rng.choice(self.journeys())():
+            pass
+
+
+def search_terms_from(csv_path, count=200, seed=0):
+    # Suchbegriffe wie von Benutzern: ganze Namen, Namensanfänge und einzelne Wörter aus den Cocktailnamen.
+    with open(csv_path, encoding='utf-8', newline='') as f:
+        names = [row['Cocktail Name'] for row in csv.DictReader(f) if row.get('Cocktail Name')]
+    rng = random.Random(seed)
+    terms = []
+    for name in rng.sample(names, min(count, len(names))):
+        words = name.split()
+        terms.append(rng.choice([name, name[:max(3, len(name) // 2)], rng.choice(words)]))
+    return terms or ['negroni']
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def summarize(sessions, tab, timings, duration, errors=0):
+    ordered = sorted(timings)
+    return {
+        'sessions': sessions,
+        'tab': tab,
+        'reruns': len(ordered),
+        'throughput_per_s': round(len(ordered) / duration, 2),
+        'p50_ms': round(percentile(ordered, 0.50), 2),
+        'p95_ms': round(percentile(ordered, 0.95), 2),
+        'p99_ms': round(percentile(ordered, 0.99), 2),
+        'errors': errors,
+    }
+
+
+def run_level(app_url, sessions, duration, think, ramp_up, search_terms, seed):
+    # sessions Benutzer gleichzeitig; sie starten über ramp_up Sekunden verteilt und spielen bis zum Ende von
+    # duration Abläufe durch. Gezählt werden nur Reruns, die im Messfenster (nach dem Hochfahren) fertig werden.
+    recorder = Recorder()
+    failures = []
+    start = time.perf_counter()
+    window_start, deadline = start + ramp_up, start + ramp_up + duration
+
+    def simulate(number):
+        time.sleep(ramp_up * number / sessions)
+        try:
+            with connect_app(app_url) as websocket:
+                User(Session(websocket), recorder, random.Random(seed * 1000 + number), search_terms, think,
+                     deadline).run()
+        except Exception as e:  # Verbindung abgelehnt oder abgebrochen, Zeitüberschreitung
+            failures.append(f"{type(e).__name__}: {e}")
+
+    threads = [threading.Thread(target=simulate, args=(number,), daemon=True) for number in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    measured = [(tab, elapsed) for tab, elapsed, finished in recorder.reruns if window_start <= finished <= deadline]
+    errors = recorder.errors + failures
+    results = []
+    if measured:
+        results.append(summarize(sessions, 'all', [elapsed for _, elapsed in measured], duration, len(errors)))
+    for tab in TABS:
+        timings = [elapsed for measured_tab, elapsed in measured if measured_tab == tab]
+        if timings:
+            results.append(summarize(sessions, tab, timings, duration))
+    return results, errors
+
+
+def warm_up(app_url, search_terms, seed):
+    # Jeder Ablauf einmal ohne Messung, damit Katalog und Indizes gebaut sind.
+    with connect_app(app_url) as websocket:
+        user = User(Session(websocket), Recorder(), random.Random(seed), search_terms, 0, float('inf'))
+        user.step()
+        for journey in user.journeys():
+            journey()
+    return user.recorder.errors
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_app(env, port):
+    # Echter Streamlit-Server mit der App, ohne Browser und ohne Dateiüberwachung.
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', APP_SCRIPT, '--server.headless', 'true',
+         '--server.port', str(port), '--server.address', '127.0.0.1', '--server.fileWatcherType', 'none',
+         '--browser.gatherUsageStats', 'false'],
+        env=env, cwd=APP_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + 60
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"streamlit exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(f"{url}/_stcore/health", timeout=1)
+            return process, url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("streamlit did not start within 60 seconds")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the cocktail app with concurrent simulated sessions.")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 10, 20],
+                        help="concurrent sessions, one run per value")
+    parser.add_argument('--duration', type=float, default=30, help="measured seconds per run")
+    parser.add_argument('--ramp-up', type=float, default=5, help="seconds over which the sessions start")
+    parser.add_argument('--think', type=float, default=1.0, help="mean pause between interactions in seconds")
+    catalog = parser.add_mutually_exclusive_group()
+    catalog.add_argument('--csv', help="serve this CSV instead of a synthetic catalog")
+    catalog.add_argument('--size', type=int, default=DEFAULT_SIZE,
+                         help=f"cocktails in the synthetic catalog (default {DEFAULT_SIZE})")
+    parser.add_argument('--app-url', help="test an already running app instead of starting one")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='cocktail-loadtest-')
+    csv_path = os.path.join(workdir, 'cocktails.csv')
+    if args.csv is None:
+        generate_catalog(args.size, csv_path)
+    elif os.path.exists(args.csv):
+        shutil.copy(args.csv, csv_path)
+    else:
+        parser.error(f"{args.csv} not found")
+    server = serve_directory(workdir)
+    process = None
+    report = {
+        'meta': {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'revision': git_revision(),
+                 'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(),
+                 'catalog': os.path.basename(args.csv) if args.csv else args.size, 'duration_s': args.duration, 'think_s': args.think},
+        'results': [],
+        'errors': [],
+    }
+    try:
+        app_url = args.app_url
+        if app_url is None:
+            env = dict(os.environ,
+                       COCKTAILS_DATA_URL=f"http://127.0.0.1:{server.server_port}/cocktails.csv",
+                       COCKTAILS_CACHE_DIR=os.path.join(workdir, 'cache'),
+                       COCKTAILS_STORE=os.path.join(workdir, 'store.db'))
+            process, app_url = start_app(env, free_port())
+        search_terms = search_terms_from(csv_path, seed=args.seed)
+        errors = warm_up(app_url, search_terms, args.seed)
+        if errors:
+            print(f"warm-up: {len(errors)} errors, first: {errors[0]}")
+            report['errors'] += [f"warm-up: {error}" for error in errors[:20]]
+        for sessions in args.sessions:
+            results, errors = run_level(app_url, sessions, args.duration, args.think, args.ramp_up,
+                                        search_terms, args.seed)
+            report['results'] += results
+            report['errors'] += [f"{sessions} sessions: {error}" for error in errors[:20]]
+            for row in results:
+                print(f"{sessions:>4} sessions {row['tab']:<22} {row['reruns']:>6} reruns {row['throughput_per_s']:>8.2f}/s"
+                      f"  p50 {row['p50_ms']:>9.2f} ms  p95 {row['p95_ms']:>9.2f} ms  p99 {row['p99_ms']:>9.2f} ms")
+            if errors:
+                print(f"{sessions:>4} sessions {len(errors)} errors, first: {errors[0]}")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
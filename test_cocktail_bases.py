@@ -0,0 +1,32 @@
+# Prüft, welche Alkoholbasen der Automat in einer Zutat findet (Synonyme, ganze Wörter, längerer Begriff gewinnt),
+# und die Erweiterung der Taxonomie über eine JSON-Datei.
+import json
+
+import pytest
+
+from cocktail_bases import BaseTagger, load_taxonomy, tagger_for
+from cocktail_catalog import alcohol_bases
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('Rye Bread Syrup', set()), ('Maraschino Cherry', set()), ('Port Charlotte', {'Whiskey'}),
+    ('Rittenhouse Rye', {'Whiskey'}), ('Luxardo Maraschino', {'Liqueurs'}), ('Ruby Port', {'Port'}),
+    ('Ginger Beer', set()), ('Passion fruit Portion', set()), ('Old Tom Gin', {'Gin'}), ('Cachaça', {'Cachaca'}),
+])
+def test_base_tags(text, expected):
+    tagger = tagger_for(tuple(alcohol_bases))
+    assert {tagger.bases[i] for i in tagger.tag(text)} == expected
+
+
+def test_taxonomy_file_adds_terms(tmp_path):
+    path = tmp_path / 'taxonomy.json'
+    path.write_text(json.dumps({'Whiskey': ['kavalan']}), encoding='utf-8')
+    tagger = BaseTagger(tuple(alcohol_bases), load_taxonomy(str(path)))
+    assert {tagger.bases[i] for i in tagger.tag('Kavalan Single Malt')} == {'Whiskey'}
+
+
+def test_taxonomy_file_rejects_unknown_base(tmp_path):
+    path = tmp_path / 'taxonomy.json'
+    path.write_text(json.dumps({'Whisky': ['kavalan']}), encoding='utf-8')
+    with pytest.raises(ValueError, match='Whisky'):
+        load_taxonomy(str(path))
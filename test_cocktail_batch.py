@@ -0,0 +1,34 @@
+# Prüft die Batch-Auswertung vieler Schrank-Profile gegen catalog.filter, Profil für Profil.
+import pandas as pd
+import pytest
+
+from cocktail_batch import batch_filter, main, profile_matrix, rows_for_profile
+from cocktail_catalog import Query
+from test_cocktail_catalog import CABINETS
+
+
+@pytest.mark.parametrize('num_ingredients, glassware', [(None, None), (3, None), (None, 'Coupe'), (2, 'Hurricane')])
+def test_batch_filter_matches_filter(catalog, num_ingredients, glassware):
+    cabinets = CABINETS + CABINETS[::-1]  # doppelte Profile werden nur einmal ausgewertet
+    result = batch_filter(catalog, profile_matrix(cabinets, catalog.bases), num_ingredients=num_ingredients,
+                          glassware=glassware, workers=1)
+    for p, cabinet in enumerate(cabinets):
+        expected = catalog.filter(Query(num_ingredients, glassware, tuple(cabinet)))
+        assert rows_for_profile(result, p).tolist() == expected.tolist()
+
+
+def test_batch_filter_rejects_bad_input(catalog):
+    with pytest.raises(ValueError):
+        batch_filter(catalog, [[True]], columns=[])
+    with pytest.raises(ValueError):
+        batch_filter(catalog, [[True, False]], columns=['Gin'])
+
+
+@pytest.mark.parametrize('text', ['name,Gin,Rum\nbar,1,0\n', 'profile,Whisky\nbar,1\n'])
+def test_main_explains_missing_columns(tmp_path, text):
+    profiles = tmp_path / 'profiles.csv'
+    profiles.write_text(text, encoding='utf-8')
+    with pytest.raises(SystemExit) as exit_info:
+        main([str(profiles), str(tmp_path / 'menus.csv')])
+    assert 'Usage: python cocktail_batch.py' in str(exit_info.value.code)
+    assert not (tmp_path / 'menus.csv').exists()
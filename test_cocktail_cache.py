@@ -0,0 +1,127 @@
+# Prüft cocktail_cache.py gegen einen lokalen HTTP-Server mit ETag: 304-Revalidierung, Ablauf der TTL,
+# stale-while-revalidate, Offline-Betrieb mit alter Kopie bzw. Offline-Kopie und kaputte Downloads.
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import cocktail_cache
+from cocktail_cache import clear_memory_cache, load_cocktails
+
+HEADER = 'Cocktail Name,Bartender,Bar/Company,Location,Ingredients,Garnish,Glassware,Preparation,Notes\n'
+
+
+def csv_body(*names):
+    return (HEADER + ''.join(f'{name},,,,2 oz Gin,,Coupe,,\n' for name in names)).encode('utf-8')
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.headers.get('If-None-Match'))
+        if server.down:
+            self.send_error(503)
+            return
+        etag = f'"{server.etag}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.body, httpd.etag, httpd.down, httpd.requests = csv_body('Negroni', 'Gimlet'), 'v1', False, []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = f'http://127.0.0.1:{httpd.server_address[1]}/cocktails.csv'
+    clear_memory_cache()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    clear_memory_cache()
+
+
+def publish(server, *names):
+    server.body, server.etag = csv_body(*names), f'v{len(server.requests) + 2}'
+
+
+def names(df):
+    return df['Cocktail Name'].tolist()
+
+
+def test_memory_and_disk_within_ttl(server, tmp_path):
+    df, version = load_cocktails(server.url, ttl=60, cache_dir=str(tmp_path))
+    assert names(df) == ['Negroni', 'Gimlet']
+    assert load_cocktails(server.url, ttl=60, cache_dir=str(tmp_path))[1] == version
+    clear_memory_cache()  # neuer Prozess: die Kopie auf der Festplatte genügt
+    assert load_cocktails(server.url, ttl=60, cache_dir=str(tmp_path))[1] == version
+    assert server.requests == [None]
+
+
+def test_revalidation_with_304(server, tmp_path):
+    _, version = load_cocktails(server.url, ttl=0, cache_dir=str(tmp_path), background=False)
+    df, revalidated = load_cocktails(server.url, ttl=0, cache_dir=str(tmp_path), background=False)
+    assert server.requests == [None, '"v1"']
+    assert revalidated == version and names(df) == ['Negroni', 'Gimlet']
+
+
+def test_ttl_expiry_fetches_new_version(server, tmp_path):
+    _, version = load_cocktails(server.url, ttl=0, cache_dir=str(tmp_path), background=False)
+    publish(server, 'Paloma')
+    df, new_version = load_cocktails(server.url, ttl=0, cache_dir=str(tmp_path), background=False)
+    assert new_version != version and names(df) == ['Paloma']
+
+
+def test_stale_while_revalidate(server, tmp_path):
+    _, version = load_cocktails(server.url, ttl=0, cache_dir=str(tmp_path))
+    publish(server, 'Paloma')
+    df, stale = load_cocktails(server.url, ttl=0, cache_dir=str(tmp_path))
+    assert stale == version and names(df) == ['Negroni', 'Gimlet']  # sofort die alte Kopie
+    for _ in range(100):
+        if not cocktail_cache._refreshing and len(server.requests) == 2:
+            break
+        time.sleep(0.05)
+    df, fresh = load_cocktails(server.url, ttl=60, cache_dir=str(tmp_path))
+    assert fresh != version and names(df) == ['Paloma']
+
+
+def test_offline_uses_stale_copy(server, tmp_path):
+    _, version = load_cocktails(server.url, ttl=0, cache_dir=str(tmp_path), background=False)
+    server.down = True
+    clear_memory_cache()
+    df, stale = load_cocktails(server.url, ttl=0, cache_dir=str(tmp_path), background=False)
+    assert stale == version and names(df) == ['Negroni', 'Gimlet']
+
+
+def test_broken_download_keeps_copy(server, tmp_path):
+    _, version = load_cocktails(server.url, ttl=0, cache_dir=str(tmp_path), background=False)
+    server.body, server.etag = b'\x00\xff', 'broken'
+    df, kept = load_cocktails(server.url, ttl=0, cache_dir=str(tmp_path), background=False)
+    assert kept == version and names(df) == ['Negroni', 'Gimlet']
+    clear_memory_cache()
+    assert load_cocktails(server.url, ttl=60, cache_dir=str(tmp_path))[1] == version
+
+
+def test_offline_first_start(server, tmp_path, monkeypatch):
+    server.down = True
+    with pytest.raises(requests.HTTPError):
+        load_cocktails(server.url, cache_dir=str(tmp_path / 'cache'))
+    bundled = tmp_path / 'bundled.csv'
+    bundled.write_bytes(csv_body('Daiquiri'))
+    monkeypatch.setattr(cocktail_cache, 'BUNDLED_CSV', str(bundled))
+    with pytest.raises(requests.HTTPError):  # nur die Hauptquelle fällt auf die Offline-Kopie zurück
+        load_cocktails(server.url, cache_dir=str(tmp_path / 'cache'), bundled=False)
+    df, _ = load_cocktails(server.url, cache_dir=str(tmp_path / 'cache'))
+    assert names(df) == ['Daiquiri']
@@ -0,0 +1,80 @@
+# Prüft den Filter des Katalogs gegen eine naive Umsetzung mit pandas und regulären Ausdrücken auf einem kleinen,
+# zufällig erzeugten Datensatz. make_frame und die naiven Hilfen werden auch von den anderen test_cocktail_*.py benutzt.
+#   python -m pytest -q
+import random
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from cocktail_bases import BASE_TAXONOMY, NON_BASE_TERMS
+from cocktail_catalog import Query
+from cocktail_snapshot import derive_columns
+
+INGREDIENTS = ['1 1/2 oz Gin', '2 oz London Dry Gin', '1 oz Old Tom Gin', '4 oz Ginger Beer', '2 oz Vodka',
+               '2 oz Bourbon', '2 oz Rittenhouse Rye', '1 oz Cognac', '3/4 oz Lime Juice', '1/2 oz Lemon Juice',
+               '1/2 oz Simple Syrup', 'Soda Water', '2 dashes Angostura Bitters', '1 oz Sweet Vermouth',
+               '1/2 oz Maraschino Liqueur', '1 Maraschino Cherry', '1/2 oz Rye Bread Syrup', '1 oz Ruby Port',
+               'Passion fruit Portion', '1 1/2 oz Aged Rum', '1 oz Mezcal', '1 oz Tequila', 'Half a lime',
+               'Top with Champagne', '3 Mint Leaves', '1 oz Fino Sherry']
+GLASSWARE = ['Coupe', 'Rocks', 'Highball', 'Nick & Nora']
+WORDS = ['Sour', 'Negroni', 'Fizz', 'Old', 'Fashioned', 'Paloma', 'Last', 'Word', 'Jungle', 'Bird', 'Royal', 'Mint']
+PREPARATION = ['Shake with ice and strain.', 'Stir and strain into a chilled glass.', 'Build in glass, top with soda.',
+               'Shake hard, add lime juice last.']
+QUERIES = [Query(), Query(3), Query(None, 'Coupe'), Query(None, 'Tiki Mug'), Query(2, 'Rocks', ('Gin',)),
+           Query(None, None, ('Whiskey',)), Query(None, None, ('Liqueurs', 'Port')), Query(4, None, ('Rum', 'Gin')),
+           Query(None, 'Highball', ('Vodka', 'Sherry', 'Mezcal')),
+           # Seltenes Glas: der Planer prüft die weiteren Bedingungen nur noch auf den wenigen Kandidaten.
+           Query(3, 'Hurricane'), Query(None, 'Hurricane', ('Gin', 'Rum')), Query(2, 'Hurricane', ('Vodka',))]
+CABINETS = [[], ['Gin'], ['Whiskey', 'Vermouth'], ['Gin', 'Liqueurs', 'Port'], ['Rum', 'Tequila', 'Brandy']]
+
+
+def make_frame(size, seed):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        ingredients = ', '.join(rng.sample(INGREDIENTS, rng.randint(1, 5))) if rng.random() > 0.03 else None
+        rows.append({'Cocktail Name': f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}", 'Ingredients': ingredients,
+                     'Preparation': rng.choice(PREPARATION), 'Garnish': rng.choice(['Lime wheel', 'Mint sprig']),
+                     'Glassware': rng.choice(GLASSWARE) if rng.random() > 0.03 else 'Hurricane',
+                     'Bartender': rng.choice(['Ann Lee', 'Bo Chen']),
+                     'Location': rng.choice(['London', 'Paris', 'New York'])})
+    rows.append(dict(rows[0], **{'Cocktail Name': 'Sour'}))  # exakter Name für die Suche
+    return derive_columns(pd.DataFrame(rows))
+
+
+# Naive Umsetzung: ein Regex pro Basis über den Text, Begriffe aus NON_BASE_TERMS werden vorher entfernt.
+def base_pattern(base):
+    terms = {term.lower() for term in [base] + BASE_TAXONOMY[base]}
+    terms |= {term[:-1] for term in terms if term.endswith('s') and len(term) > 3}
+    return re.compile(r"(?<![a-z0-9])(?:" + '|'.join(map(re.escape, terms)) + r")s?(?![a-z0-9])")
+
+
+def strip_non_base(text):
+    text = text.lower()
+    for term in NON_BASE_TERMS:
+        text = re.sub(rf"(?<![a-z0-9]){re.escape(term)}(?![a-z0-9])", ' ', text)
+    return text
+
+
+def naive_has_base(text, bases):
+    text = strip_non_base(text)
+    return any(base_pattern(base).search(text) for base in bases)
+
+
+def naive_filter(df, query):
+    ingredients = df['Ingredients']
+    mask = ingredients.notna()
+    if query.cabinet:
+        mask &= ingredients.map(lambda text: isinstance(text, str) and naive_has_base(text, query.cabinet))
+    if query.num_ingredients is not None:
+        mask &= ingredients.map(lambda text: len(text.split(',')) if isinstance(text, str) else 0) == query.num_ingredients
+    if query.glassware is not None:
+        mask &= df['Glassware'].astype(object) == query.glassware
+    return np.flatnonzero(mask.to_numpy(dtype=bool))
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_filter_matches_pandas(catalog, df, query):
+    assert catalog.filter(query).tolist() == naive_filter(df, query).tolist()
@@ -0,0 +1,34 @@
+# Prüft "What can I make" gegen eine naive Umsetzung: fehlende Zutaten pro Rezept ohne Vorrat und ohne die Basen im
+# Schrank, sortiert nach fehlenden Zutaten und danach nach Anzahl Zutaten.
+import pytest
+
+from cocktail_coverage import PANTRY_STAPLES
+from cocktail_ingredients import canonical_ingredient, split_ingredients
+from test_cocktail_catalog import CABINETS, naive_has_base
+
+
+def naive_makeable(df, cabinet, max_missing):
+    staples = {canonical_ingredient(item) for item in PANTRY_STAPLES}
+    ranked = []
+    for row, text in enumerate(df['Ingredients']):
+        names = {canonical_ingredient(part) for part in split_ingredients(text)}
+        if not names:
+            continue
+        missing = sum(1 for name in names if name not in staples and not naive_has_base(name, cabinet))
+        if missing <= max_missing:
+            ranked.append((missing, len(names), row))
+    return [row for _, _, row in sorted(ranked)]
+
+
+@pytest.mark.parametrize('cabinet', CABINETS)
+@pytest.mark.parametrize('max_missing', [0, 1, 3])
+def test_makeable_matches_pandas(catalog, df, cabinet, max_missing):
+    rows, missing = catalog.makeable(cabinet, max_missing)
+    assert rows.tolist() == naive_makeable(df, cabinet, max_missing)
+    assert (missing <= max_missing).all()
+
+
+def test_missing_ingredients(catalog, df):
+    rows, missing = catalog.makeable(['Gin'], 2)
+    for row, count in zip(rows[:20].tolist(), missing[:20].tolist()):
+        assert len(catalog.missing_ingredients(row, ['Gin'])) == count
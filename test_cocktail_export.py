@@ -0,0 +1,53 @@
+# Prüft den Export der Treffer als CSV, JSON Lines und Parquet: gleiche Zeilen in gleicher Reihenfolge wie die
+# Treffer, Spalten wie im Datensatz, auch über mehrere Blöcke und ohne Treffer.
+import io
+
+import pandas as pd
+import pytest
+
+from cocktail_export import export_rows, format_for_path
+from cocktail_snapshot import DERIVED_COLUMNS
+
+READERS = {
+    'csv': lambda data: pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False),
+    'jsonl': lambda data: pd.read_json(io.BytesIO(data), lines=True, dtype=False),
+    'parquet': lambda data: pd.read_parquet(io.BytesIO(data)),
+}
+
+
+def exported(df, row_ids, fmt, chunk_rows):
+    out = io.BytesIO()
+    assert export_rows(df, row_ids, fmt, out, chunk_rows=chunk_rows) == len(row_ids)
+    return out.getvalue()
+
+
+def as_text(frame):
+    return frame.astype(object).where(frame.notna(), '').astype(str).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'jsonl', 'parquet'])
+@pytest.mark.parametrize('chunk_rows', [7, 5000])
+def test_export_round_trip(df, fmt, chunk_rows):
+    if fmt == 'parquet':
+        pytest.importorskip('pyarrow')
+    row_ids = [42, 3, 17, 250, 0] + list(range(100, 130))  # Reihenfolge der Treffer, nicht des Datensatzes
+    result = READERS[fmt](exported(df, row_ids, fmt, chunk_rows))
+    columns = [column for column in df.columns if column not in DERIVED_COLUMNS]
+    assert result.columns.tolist() == columns
+    assert as_text(result).equals(as_text(df.iloc[row_ids][columns]))
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_export_without_rows_keeps_columns(df, fmt):
+    if fmt == 'parquet':
+        pytest.importorskip('pyarrow')
+    result = READERS[fmt](exported(df, [], fmt, 5000))
+    assert len(result) == 0
+    assert result.columns.tolist() == [column for column in df.columns if column not in DERIVED_COLUMNS]
+
+
+def test_unknown_format_and_paths(df):
+    with pytest.raises(ValueError):
+        export_rows(df, [0], 'xlsx', io.BytesIO())
+    assert [format_for_path(path) for path in ['menu.PARQUET', 'menu.jsonl', 'menu.csv', 'menu']] == \
+        ['parquet', 'jsonl', 'csv', 'csv']
@@ -0,0 +1,38 @@
+# Prüft die Volltextsuche gegen reguläre Ausdrücke: Phrasen, Felder, Grenzen zwischen Zutaten und den gespeicherten
+# Index.
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from cocktail_catalog import CocktailCatalog
+from cocktail_fulltext import fulltext_for, fulltext_path
+from cocktail_snapshot import derive_columns
+
+
+def test_fulltext_phrase_and_field(catalog, df):
+    fields = df[['Ingredients', 'Preparation', 'Garnish', 'Bartender', 'Location']].astype(object).fillna('')
+    phrase = fields.apply(lambda row: any(re.search(r'\blime juice\b', value, re.I) for value in row), axis=1)
+    assert sorted(catalog.search_text('"lime juice"', limit=len(df)).tolist()) == np.flatnonzero(phrase).tolist()
+    garnish = (df['Garnish'].astype(object) == 'Mint sprig') & (df['Location'].astype(object) == 'Paris')
+    assert sorted(catalog.search_text('garnish:mint location:paris', limit=len(df)).tolist()) == \
+        np.flatnonzero(garnish).tolist()
+
+
+def test_fulltext_phrase_stops_at_ingredient(tmp_path):
+    df = derive_columns(pd.DataFrame({'Cocktail Name': ['Gimlet', 'Daiquiri'], 'Glassware': ['Coupe', 'Coupe'],
+                                      'Ingredients': ['2 oz Gin, Lime Juice, Simple Syrup',
+                                                      '2 oz Rum, 1 oz Juice Simple Mix']}))
+    catalog = CocktailCatalog(df, cache_dir=str(tmp_path))
+    assert catalog.search_text('"juice simple"').tolist() == [1]
+    assert catalog.search_text('"lime juice"').tolist() == [0]
+    assert catalog.search_text('"gin lime"').tolist() == []
+
+
+def test_fulltext_saved_per_version(df, tmp_path):
+    built = fulltext_for(df, 'test-fulltext', str(tmp_path))
+    assert os.path.exists(fulltext_path(str(tmp_path), 'test-fulltext'))
+    loaded = fulltext_for(df, 'test-fulltext', str(tmp_path))
+    for text in ['"lime juice"', 'garnish:mint', 'shake strain', 'bartender:"ann lee" paris']:
+        assert loaded.search(text, limit=len(df)).tolist() == built.search(text, limit=len(df)).tolist()
@@ -0,0 +1,32 @@
+# Prüft das Zerlegen der Zutaten in Menge, Einheit und Zutat und das Umrechnen auf mehrere Portionen.
+import pytest
+
+from cocktail_ingredients import parse_ingredient, scale_ingredient
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1 1/2 oz London Dry Gin*', (1.5, None, 'oz', 'london dry gin')),
+    ('1-2 dashes Bitters', (1.0, 2.0, 'dash', 'bitters')),
+    ('Half a lime', (0.5, None, None, 'lime')),
+    ('Parts Unknown Gin', (None, None, None, 'parts unknown gin')),
+    ('Top with Soda Water', (None, None, 'top', 'soda water')),
+])
+def test_parse_ingredient(text, expected):
+    assert parse_ingredient(text) == expected
+
+
+@pytest.mark.parametrize('text, servings, expected', [
+    ('1 1/2 oz Gin', 3, '4 1/2 oz Gin'),
+    ('1-2 dashes Bitters', 2, '2-4 dashes Bitters'),
+    ('Top with Soda', 2, 'Top with Soda'),
+])
+def test_scale_ingredient(text, servings, expected):
+    assert scale_ingredient(text, servings) == expected
+
+
+def test_recipe_scales_with_servings(catalog, df):
+    row = int(df['Ingredients'].notna().to_numpy().argmax())
+    single, double = catalog.recipe(row, 1), catalog.recipe(row, 2)
+    assert [entry[3] for entry in single] == [entry[3] for entry in double]
+    for one, two in zip(single, double):
+        assert two[0] == (None if one[0] is None else 2 * one[0])
@@ -0,0 +1,51 @@
+# Prüft den Ergebnis-Cache des Filters: Begrenzung über Bytes, LRU-Reihenfolge und Zähler für Treffer.
+import numpy as np
+
+from cocktail_catalog import CocktailCatalog, Query
+from cocktail_planner import ResultCache, cache_stats
+
+
+def rows(n):
+    return np.arange(n, dtype=np.int32)  # 4 Bytes pro Zeile
+
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = ResultCache(max_bytes=400)
+    cache.put('a', rows(40))
+    cache.put('b', rows(40))
+    assert cache.get('a') is not None  # a ist jetzt zuletzt benutzt
+    cache.put('c', rows(40))          # 480 Bytes: b fällt heraus
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert (len(cache), cache.size) == (2, 320)
+    cache.put('a', rows(10))          # Ersetzen rechnet die alte Grösse heraus
+    assert cache.size == 200
+
+
+def test_oversized_result_is_not_cached():
+    cache = ResultCache(max_bytes=100)
+    cache.put('small', rows(10))
+    cache.put('huge', rows(1000))
+    assert cache.get('huge') is None and cache.get('small') is not None
+    assert cache.size == 40
+
+
+def test_counts_hits_and_misses():
+    cache = ResultCache(max_bytes=1000)
+    assert cache.get('a') is None
+    cache.put('a', rows(5))
+    cache.get('a')
+    cache.get('a')
+    assert (cache.hits, cache.misses) == (2, 1)
+    cache.clear()
+    assert (len(cache), cache.size) == (0, 0)
+
+
+def test_filter_results_are_cached_and_read_only(df, tmp_path):
+    catalog = CocktailCatalog(df, 'test-planner', cache_dir=str(tmp_path))
+    before = cache_stats()
+    first = catalog.filter(Query(None, 'Coupe', ('Gin',)))
+    second = catalog.filter(Query(None, 'Coupe', ('Gin',)))
+    after = cache_stats()
+    assert second is first and not first.flags.writeable
+    assert (after['misses'] - before['misses'], after['hits'] - before['hits']) == (1, 1)
@@ -0,0 +1,59 @@
+# Prüft refresh() gegen einen neu gebauten Katalog und den Wechsel auf eine neue Version in catalog_for.
+import pandas as pd
+import pytest
+
+import cocktail_catalog
+from cocktail_catalog import WARM_INDEXES, CocktailCatalog, Query, catalog_for
+from cocktail_snapshot import derive_columns
+from test_cocktail_catalog import CABINETS, QUERIES, make_frame
+
+
+def new_version(df):
+    # Zeilen gelöscht, geändert und eingefügt.
+    changed = df.drop(columns=['Ingredient Count', 'Ingredient List']).astype(object).drop(index=range(10, 40))
+    changed.loc[changed.index[:15], 'Ingredients'] = '2 oz Bourbon, 1 oz Sweet Vermouth, 2 dashes Angostura Bitters'
+    changed.loc[changed.index[15:20], 'Glassware'] = 'Tiki Mug'
+    extra = make_frame(40, seed=2).drop(columns=['Ingredient Count', 'Ingredient List']).astype(object)
+    return derive_columns(pd.concat([changed, extra], ignore_index=True))
+
+
+def test_refresh_matches_rebuild(df, tmp_path):
+    old = CocktailCatalog(df, 'test-refresh-1', cache_dir=str(tmp_path))
+    for name in ['ingredient_table', 'ingredient_index', 'name_search', 'base_matrix', 'coverage_index']:
+        getattr(old, name)
+    new_df = new_version(df)
+
+    refreshed = old.refresh(new_df, 'test-refresh-2')
+    rebuilt = CocktailCatalog(new_df, cache_dir=str(tmp_path))
+    for query in QUERIES + [Query(None, 'Tiki Mug')]:
+        assert refreshed.filter(query).tolist() == rebuilt.filter(query).tolist()
+    for text in ['sour', 'negroni', 'fizz 3']:
+        assert refreshed.search(text, limit=50).tolist() == rebuilt.search(text, limit=50).tolist()
+    for cabinet in CABINETS:
+        assert refreshed.makeable(cabinet, 1)[0].tolist() == rebuilt.makeable(cabinet, 1)[0].tolist()
+    favorites = new_df['Cocktail Name'].tolist()[::7]
+    assert refreshed.base_counts(favorites) == rebuilt.base_counts(favorites)
+
+
+@pytest.fixture
+def fresh_latest(tmp_path, monkeypatch):
+    monkeypatch.setattr(cocktail_catalog, 'CACHE_DIR', str(tmp_path))
+    for name in ['_latest', '_pending', '_warming']:
+        monkeypatch.setattr(cocktail_catalog, name, None)
+
+
+def test_catalog_for_swaps_after_warming(df, fresh_latest):
+    first = catalog_for(df, 'test-swap-1')
+    assert catalog_for(df, 'test-swap-1') is first
+    cocktail_catalog._warming.join()
+    assert all(first.ready(name) for name in WARM_INDEXES)
+
+    new_df = new_version(df)
+    # Solange die neue Version im Hintergrund gebaut wird, bleibt es beim alten Katalog.
+    assert catalog_for(new_df, 'test-swap-2') is first
+    cocktail_catalog._warming.join()
+    second = catalog_for(new_df, 'test-swap-2')
+    assert second is not first and second.version == 'test-swap-2' and len(second) == len(new_df)
+    assert all(second.ready(name) for name in WARM_INDEXES)
+    assert second.search_text('"lime juice"', limit=10).tolist() == \
+        CocktailCatalog(new_df).search_text('"lime juice"', limit=10).tolist()
@@ -0,0 +1,28 @@
+# Prüft die Rangfolge der Namenssuche gegen eine naive Umsetzung: exakter Name, Namensanfang, Teil des Namens.
+import pytest
+
+from cocktail_search import normalize_name
+
+
+def naive_search(df, query):
+    # Exakter Name, Namensanfang, Teil des Namens; innerhalb einer Stufe kürzere Namen zuerst.
+    query = normalize_name(query)
+    ranked = []
+    for row, name in enumerate(df['Cocktail Name'].map(normalize_name)):
+        if query in name:
+            tier = 0 if name == query else 1 if name.startswith(query) else 2
+            ranked.append((tier, len(name), row))
+    return [row for _, _, row in sorted(ranked)]
+
+
+@pytest.mark.parametrize('text', ['sour', 'SOUR', 'negroni', 'old fash', 'bird 1', 'word 29', 'xyz'])
+def test_search_matches_pandas(catalog, df, text):
+    expected = naive_search(df, text)
+    # Danach dürfen noch Namen mit Tippfehlern folgen.
+    assert catalog.search(text, limit=len(df)).tolist()[:len(expected)] == expected
+
+
+@pytest.mark.parametrize('text', ['negorni', 'paloam'])
+def test_search_finds_typos(catalog, df, text):
+    names = df['Cocktail Name'].iloc[catalog.search(text, limit=5)].map(normalize_name).tolist()
+    assert names and all(text[:2] in name for name in names)
@@ -0,0 +1,55 @@
+# Prüft das Zusammenführen mehrerer Quellen: Spaltennamen aus Partner-Feeds, doppelte Cocktails (frühere Quelle
+# gewinnt) und ausgefallene Quellen.
+import json
+
+import pytest
+
+from cocktail_sources import SOURCE_COLUMN, ingest
+
+
+@pytest.fixture
+def sources(tmp_path):
+    house = tmp_path / 'house.csv'
+    house.write_text('Cocktail Name,Ingredients,Glassware\n'
+                     'Negroni,"1 oz Gin, 1 oz Campari, 1 oz Sweet Vermouth",Rocks\n'
+                     'House Sour,"2 oz Bourbon, 3/4 oz Lemon Juice",Coupe\n', encoding='utf-8')
+    partner = tmp_path / 'partner.jsonl'
+    partner.write_text('\n'.join(json.dumps(row) for row in [
+        {'title': '  negroni ', 'recipe': ['1 oz Gin', '1 oz Aperol'], 'glass': 'Coupe', 'author': 'Bo Chen'},
+        {'title': 'Paloma', 'recipe': ['2 oz Tequila', 'Grapefruit Soda'], 'glass': 'Highball', 'venue': 'Oaxaca'},
+        {'title': 'Paloma', 'recipe': ['2 oz Mezcal'], 'glass': 'Rocks'},
+    ]) + '\n', encoding='utf-8')
+    return str(house), str(partner)
+
+
+def test_merge_maps_aliases_and_drops_duplicates(sources, tmp_path):
+    house, partner = sources
+    result = ingest([house, partner], cache_dir=str(tmp_path / 'cache'))
+    df = result.df.set_index('Cocktail Name')
+    assert df.index.tolist() == ['Negroni', 'House Sour', 'Paloma']
+    # Die frühere Quelle gewinnt, auch bei anderer Schreibweise des Namens.
+    assert df.loc['Negroni', 'Ingredients'] == '1 oz Gin, 1 oz Campari, 1 oz Sweet Vermouth'
+    assert df.loc['Negroni', SOURCE_COLUMN] == house
+    assert df.loc['Paloma', 'Ingredients'] == '2 oz Tequila, Grapefruit Soda'
+    assert (df.loc['Paloma', 'Glassware'], df.loc['Paloma', 'Location']) == ('Highball', 'Oaxaca')
+    assert [(report.rows, report.added) for report in result.reports] == [(2, 2), (3, 1)]
+
+
+def test_failed_source_is_skipped(sources, tmp_path):
+    house, _ = sources
+    missing = str(tmp_path / 'missing.csv')
+    result = ingest([missing, house], cache_dir=str(tmp_path / 'cache'))
+    assert result.df['Cocktail Name'].tolist() == ['Negroni', 'House Sour']
+    assert result.reports[0].error and result.reports[0].rows is None
+    with pytest.raises(RuntimeError, match='no source could be loaded'):
+        ingest([str(tmp_path / 'also-missing.csv')], cache_dir=str(tmp_path / 'cache'))
+
+
+def test_version_changes_with_a_source(sources, tmp_path):
+    house, partner = sources
+    first = ingest([house, partner], cache_dir=str(tmp_path / 'cache'))
+    assert ingest([house, partner], cache_dir=str(tmp_path / 'cache')).version == first.version
+    with open(partner, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'title': 'Gimlet', 'recipe': ['2 oz Gin', '3/4 oz Lime Juice']}) + '\n')
+    second = ingest([house, partner], cache_dir=str(tmp_path / 'cache'))
+    assert second.version != first.version and second.df['Cocktail Name'].tolist()[-1] == 'Gimlet'
@@ -0,0 +1,73 @@
+# Prüft die SQLite-Ablage: Favoriten und Schrank überleben einen Neustart, Änderungen werden gebündelt geschrieben
+# und gehen bei einer gesperrten Datenbank nicht verloren.
+import sqlite3
+
+import pytest
+
+from cocktail_store import CocktailStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'cocktails.db')
+
+
+def test_round_trip(path):
+    store = CocktailStore(path)
+    store.add_favorites('ann', ['Negroni', 'Last Word'])
+    store.add_favorite('ann', 'Negroni')  # doppelte Likes zählen einmal
+    store.add_favorite('bo', 'Paloma')
+    store.set_cabinet('ann', ['Gin', 'Vermouth'])
+    store.add_to_cabinet('ann', 'Rum')
+    store.set_cabinet('bo', ['Tequila'])
+    store.close()
+
+    store = CocktailStore(path)  # Neustart
+    assert store.favorites('ann') == ['Last Word', 'Negroni']  # gleiche Zeit: nach Name
+    assert store.favorites('bo') == ['Paloma']
+    assert store.cabinet('ann') == ['Gin', 'Rum', 'Vermouth']
+    store.clear_favorites('ann')
+    store.set_cabinet('ann', ['Brandy'])
+    assert store.favorites('ann') == [] and store.cabinet('ann') == ['Brandy']
+    assert store.favorites('bo') == ['Paloma']
+    store.close()
+
+
+def test_writes_are_batched(path, monkeypatch):
+    store = CocktailStore(path, flush_interval=0.2)
+    batches = []
+    write_batch = store._write_batch
+    monkeypatch.setattr(store, '_write_batch', lambda batch: batches.append(len(batch)) or write_batch(batch))
+    for i in range(100):
+        store.add_favorite('ann', f"Cocktail {i}")
+    assert len(store.favorites('ann')) == 100
+    assert sum(batches) == 100 and len(batches) <= 2
+    store.close()
+
+
+def test_locked_database_keeps_changes(path, monkeypatch):
+    monkeypatch.setattr('cocktail_store.RETRY_INTERVAL', 0.1)
+    store = CocktailStore(path, busy_timeout=0.05)
+    blocker = sqlite3.connect(path, isolation_level=None)
+    blocker.execute('BEGIN IMMEDIATE')  # ein anderer Prozess hält die Schreibsperre
+    store.add_favorite('ann', 'Negroni')
+    assert not store.flush(timeout=1)
+    assert isinstance(store.last_error, sqlite3.OperationalError)
+    blocker.execute('ROLLBACK')
+    blocker.close()
+    assert store.flush(timeout=10)
+    assert store.favorites('ann') == ['Negroni']
+    store.close()
+
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_flush_notices_dead_writer(path, monkeypatch):
+    store = CocktailStore(path)
+
+    def crash(batch):
+        raise MemoryError
+
+    monkeypatch.setattr(store, '_write_batch', crash)
+    store.add_favorite('ann', 'Negroni')
+    with pytest.raises(RuntimeError, match='writer thread'):
+        store.flush(timeout=10)